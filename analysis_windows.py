@@ -0,0 +1,113 @@
+import re
+import math
+
+# --- Transcript Windows for Map-Reduce Analysis ---
+
+DEFAULT_WINDOW_MINUTES = 20
+# Neighbouring windows overlap by more than the longest clip (50 s), so every
+# candidate segment lies entirely inside at least one window.
+WINDOW_OVERLAP_SECONDS = 60
+# Transcripts up to this many windows long are still analysed in one prompt.
+SINGLE_PROMPT_WINDOWS = 1.5
+
+_SEGMENT_HEADER_RE = re.compile(r"(?=\*\*\s*Segment\s*\[?\d+\]?\s*\*\*)", re.IGNORECASE)
+_SEGMENT_NUMBER_RE = re.compile(r"\*\*\s*Segment\s*\[?\d+\]?\s*\*\*", re.IGNORECASE)
+_END_CUE_LINE_RE = re.compile(r"Start\s+Cue.*End\s+Cue[^\n]*\n", re.IGNORECASE | re.DOTALL)
+_SCORE_RE = re.compile(r"Virality\s+Score[^:\n]*:\**\s*(\d+(?:\.\d+)?)", re.IGNORECASE)
+
+
+def plan_analysis_windows(duration, chapters=None, window_seconds=DEFAULT_WINDOW_MINUTES * 60,
+                          overlap_seconds=WINDOW_OVERLAP_SECONDS):
+    """
+    Splits [0, duration] into analysis windows of about `window_seconds`, each
+    extended by half the overlap on both sides. The remaining time is always shared
+    evenly between the windows still needed (a remainder shorter than the overlap is
+    absorbed), so windows are of similar length. YouTube chapter boundaries are used
+    as cut points when one lies near the even cut: short chapters are merged up to
+    the target length, and chapters longer than a window are cut inside.
+    Returns a list of (start, end) in seconds.
+    """
+    boundaries = sorted({
+        point
+        for c in chapters or []
+        if c.get("start_time") is not None and c.get("end_time") is not None and c["end_time"] > c["start_time"]
+        for point in (c["start_time"], c["end_time"])
+    })
+    duration = max(duration or 0.0, boundaries[-1] if boundaries else 0.0)
+    margin = overlap_seconds / 2
+
+    windows = []
+    start = 0.0
+    while True:
+        remaining = duration - start
+        count = max(1, math.ceil((remaining - overlap_seconds) / window_seconds))
+        if count == 1:
+            end = duration
+        else:
+            target = start + remaining / count
+            near = [b for b in boundaries if start + (target - start) / 2 <= b <= start + window_seconds]
+            end = min(near, key=lambda b: abs(b - target)) if near else target
+        windows.append((max(0.0, start - margin), min(duration, end + margin)))
+        if end >= duration:
+            return windows
+        start = end
+
+
+def chunked_analysis_windows(duration, chapters=None, window_minutes=DEFAULT_WINDOW_MINUTES):
+    """Windows for the map-reduce analysis, or None when the transcript fits one prompt (or windows are disabled)."""
+    if not window_minutes or duration <= window_minutes * 60 * SINGLE_PROMPT_WINDOWS:
+        return None
+    return plan_analysis_windows(duration, chapters, window_minutes * 60)
+
+
+def split_segment_blocks(analysis_text):
+    """Splits an analysis in the "**Segment N**" format into its segment blocks."""
+    return [block.strip() for block in _SEGMENT_HEADER_RE.split(analysis_text) if "Start Cue" in block]
+
+
+def segment_score(block):
+    match = _SCORE_RE.search(block)
+    return float(match.group(1)) if match else 0.0
+
+
+def strip_score(block):
+    return "\n".join(line for line in block.splitlines() if not _SCORE_RE.search(line))
+
+
+def renumber_segment(block, number):
+    return _SEGMENT_NUMBER_RE.sub(f"**Segment {number}**", block, count=1)
+
+
+class SegmentStreamParser:
+    """
+    Finds "**Segment N**" blocks in a streamed analysis as soon as they can be aligned:
+    once the block's End Cue line is finished (or the next block or the end of the
+    stream is reached). The justification text that follows is not waited for.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._emitted = 0
+
+    def feed(self, chunk):
+        """Appends streamed text; returns the blocks that became ready."""
+        self.text += chunk
+        return self._ready(final=False)
+
+    def close(self):
+        """Returns the remaining blocks at the end of the stream."""
+        return self._ready(final=True)
+
+    def _ready(self, final):
+        headers = [match.start() for match in _SEGMENT_NUMBER_RE.finditer(self.text)]
+        ready = []
+        while self._emitted < len(headers):
+            i = self._emitted
+            has_next = i + 1 < len(headers)
+            block = self.text[headers[i]:headers[i + 1] if has_next else len(self.text)]
+            if not (has_next or final or _END_CUE_LINE_RE.search(block)):
+                break
+            self._emitted += 1
+            if "Start Cue" in block:
+                ready.append(block.strip())
+        return ready
@@ -0,0 +1,143 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+
+from processors.base import Colors
+
+# --- Content-Addressed Artifact Cache ---
+
+ARTIFACTS_SUBDIR = "artifacts"
+# Files up to this size are hashed in full; larger ones (videos, long WAVs) are
+# fingerprinted by size plus their first and last megabyte.
+FULL_HASH_LIMIT = 32 * 1024 * 1024
+SAMPLE_BYTES = 1024 * 1024
+# Outputs that cannot be hard-linked are only copied into the store below this size.
+MAX_COPY_BYTES = 512 * 1024 * 1024
+
+_fingerprint_memo = {}
+_fingerprint_lock = threading.Lock()
+
+
+def file_fingerprint(path):
+    """Returns a content hash of `path`, memoized per (path, size, mtime)."""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _fingerprint_lock:
+        if memo_key in _fingerprint_memo:
+            return _fingerprint_memo[memo_key]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        if stat.st_size <= FULL_HASH_LIMIT:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        else:
+            digest.update(str(stat.st_size).encode())
+            digest.update(f.read(SAMPLE_BYTES))
+            f.seek(-SAMPLE_BYTES, os.SEEK_END)
+            digest.update(f.read(SAMPLE_BYTES))
+    fingerprint = digest.hexdigest()
+    with _fingerprint_lock:
+        _fingerprint_memo[memo_key] = fingerprint
+    return fingerprint
+
+
+def compute_cache_key(step_name, params, input_paths):
+    """Hashes a step's name, its relevant arguments and the content of its input artifacts."""
+    digest = hashlib.sha256()
+    digest.update(step_name.encode())
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    for path in sorted(p for p in input_paths if p):
+        digest.update(os.path.basename(path).encode())
+        digest.update(file_fingerprint(path).encode() if os.path.exists(path) else b"missing")
+    return digest.hexdigest()[:32]
+
+
+def _link_or_copy(src, dst):
+    """Hard-links src to dst (copying across devices). Returns False if the file was too big to copy."""
+    try:
+        os.link(src, dst)
+        return True
+    except OSError:
+        if os.path.getsize(src) > MAX_COPY_BYTES:
+            return False
+        shutil.copy2(src, dst)
+        return True
+
+
+def remove_files(paths):
+    """
+    Unlinks outputs before they are regenerated or restored. Producers write in place,
+    and must not truncate a file that is hard-linked into the store.
+    """
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class ArtifactStore:
+    """
+    Stores step outputs under <cache_dir>/artifacts/<StepName>/<cache_key>/ together with
+    the manifest fields the step set, so any previously computed parameter combination
+    can be restored without recomputation.
+    """
+
+    def __init__(self, cache_dir):
+        self.root = os.path.join(cache_dir, ARTIFACTS_SUBDIR)
+
+    def _dir(self, step_name, key):
+        return os.path.join(self.root, step_name, key)
+
+    def store(self, step_name, key, output_paths, entry_updates):
+        output_paths = [p for p in output_paths if p and os.path.exists(p)]
+        if not output_paths:
+            # Nothing to restore later (e.g. steps without output files of their own).
+            return False
+        target_dir = self._dir(step_name, key)
+        tmp_dir = f"{target_dir}.tmp{threading.get_ident()}"
+        try:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.makedirs(tmp_dir)
+            files = {}
+            for index, path in enumerate(output_paths):
+                stored_name = f"{index}_{os.path.basename(path)}"
+                if not _link_or_copy(path, os.path.join(tmp_dir, stored_name)):
+                    print(f"{Colors.WARNING}[WARNING]{Colors.RESET} Not caching {path}: too large to copy into {self.root}")
+                    shutil.rmtree(tmp_dir, ignore_errors=True)
+                    return False
+                files[stored_name] = os.path.abspath(path)
+            with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump({"files": files, "entry": entry_updates}, f, default=str)
+            shutil.rmtree(target_dir, ignore_errors=True)
+            os.replace(tmp_dir, target_dir)
+            return True
+        except OSError as e:
+            print(f"{Colors.WARNING}[WARNING]{Colors.RESET} Could not store {step_name} artifacts: {e}")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return False
+
+    def restore(self, step_name, key, current_outputs=()):
+        """
+        Links the stored outputs for `key` back to their original paths, replacing
+        `current_outputs`. Returns the stored manifest field updates, or None on a miss.
+        """
+        source_dir = self._dir(step_name, key)
+        try:
+            with open(os.path.join(source_dir, "meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        stored = {name: os.path.join(source_dir, name) for name in meta.get("files", {})}
+        if not stored or not all(os.path.exists(path) for path in stored.values()):
+            return None
+
+        remove_files(current_outputs)
+        for name, original_path in meta["files"].items():
+            os.makedirs(os.path.dirname(original_path), exist_ok=True)
+            remove_files([original_path])
+            _link_or_copy(stored[name], original_path)
+        return meta.get("entry", {})
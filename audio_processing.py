@@ -1,74 +1,409 @@
 import os
+import re
 import subprocess
-import stable_whisper
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 
 from processors.base import Colors
+from transcript import Transcript, write_transcript, TRANSCRIPT_SUFFIX
 
-def convert_to_mp3(input_path, output_mp3_path):
-    """Converts input to MP3. Returns output_mp3_path on success, None on failure."""
+# stable_whisper pulls in torch, so it is imported only when captions are generated.
+
+# --- Whisper Model Registry ---
+
+# Approximate resident size (MB) of each checkpoint, used when the loaded model
+# cannot report its own parameter size.
+WHISPER_MODEL_SIZES_MB = {
+    "tiny": 150,
+    "base": 290,
+    "small": 970,
+    "medium": 3000,
+    "large": 6200,
+    "turbo": 3200,
+}
+DEFAULT_WHISPER_CACHE_MB = 8192
+
+
+def _model_size_mb(model, model_name):
+    try:
+        total_bytes = sum(p.numel() * p.element_size() for p in model.parameters())
+        return total_bytes / (1024 * 1024)
+    except Exception:
+        base_name = model_name.split(".")[0].split("-")[0]
+        return WHISPER_MODEL_SIZES_MB.get(base_name, WHISPER_MODEL_SIZES_MB["large"])
+
+
+class WhisperModelRegistry:
+    """
+    Process-wide cache of loaded stable-whisper models, keyed by model name and load
+    options. Models stay loaded across videos; the least recently used ones are
+    evicted once the total size exceeds the memory budget.
+    """
+
+    def __init__(self, budget_mb=DEFAULT_WHISPER_CACHE_MB):
+        self.budget_mb = budget_mb
+        self._models = OrderedDict()  # key -> (model, size_mb)
+        self._lock = threading.Lock()
+        self._loading_locks = {}
+
+    def _evict_locked(self, incoming_mb):
+        used_mb = sum(size for _, size in self._models.values())
+        while self._models and used_mb + incoming_mb > self.budget_mb:
+            key, (_, size) = self._models.popitem(last=False)
+            used_mb -= size
+            print(f"{Colors.INFO}[INFO]{Colors.RESET} Evicting Whisper model {key[0]} ({size:.0f} MB) from cache.")
+
+    def get(self, model_name, device=None, **load_options):
+        """Returns a loaded model, loading it on first use."""
+        key = (model_name, device, tuple(sorted(load_options.items())))
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key][0]
+            loading_lock = self._loading_locks.setdefault(key, threading.Lock())
+
+        # Only one thread loads a given model; others wait and then reuse it.
+        with loading_lock:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key][0]
+
+            import stable_whisper
+
+            print(f"{Colors.INFO}[INFO]{Colors.RESET} Loading Whisper model '{model_name}'...")
+            model = stable_whisper.load_model(model_name, device=device, **load_options)
+            size_mb = _model_size_mb(model, model_name)
+            with self._lock:
+                self._evict_locked(size_mb)
+                self._models[key] = (model, size_mb)
+            return model
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+
+_whisper_registry = WhisperModelRegistry()
+
+
+def get_whisper_model(model_name, device=None, cache_budget_mb=None, **load_options):
+    """Returns a cached stable-whisper model from the process-wide registry."""
+    if cache_budget_mb is not None:
+        _whisper_registry.budget_mb = cache_budget_mb
+    return _whisper_registry.get(model_name, device=device, **load_options)
+
+WHISPER_SAMPLE_RATE = 16000
+
+
+def _run_ffmpeg_audio(input_path, output_path, codec_args, label):
+    """Runs an ffmpeg audio-only conversion. Returns output_path on success, None on failure."""
     try:
         subprocess.run(
-            [
-                "ffmpeg",
-                "-y",
-                "-i",
-                input_path,
-                "-vn",
-                "-ar",
-                "44100",
-                "-ac",
-                "2",
-                "-b:a",
-                "192k",
-                output_mp3_path,
-            ],
+            ["ffmpeg", "-y", "-nostdin", "-i", input_path, "-vn"] + codec_args + [output_path],
             stdout=subprocess.DEVNULL,  # Suppress ffmpeg output to keep console clean
             stderr=subprocess.DEVNULL,  # Suppress ffmpeg errors, handled by check=True
             check=True,  # Raise CalledProcessError on non-zero exit status
         )
-        # Clean up temporary input file if it was a temporary audio stream download
-        if (
-            "_audiotemp." in os.path.basename(input_path)  # Check if it's a temp file
-            and os.path.exists(input_path)
-            and input_path
-            != output_mp3_path  # Ensure we don't delete the output if it's same as input (e.g. re-encoding an mp3)
-        ):
-            try:
-                print(
-                    f"{Colors.WARNING}[WARNING]{Colors.RESET} Could not remove temporary audio file {input_path}: {oe}"
-                )
-            except OSError as oe:
-                print(
-                    f"{Colors.WARNING}[WARNING]{Colors.RESET} Could not remove temporary audio file {input_path}: {oe}"
-                )
-        print(f"{Colors.SUCCESS}[SUCCESS]{Colors.RESET} Audio converted to MP3: {output_mp3_path}")
-        return output_mp3_path
+        print(f"{Colors.SUCCESS}[SUCCESS]{Colors.RESET} Audio converted to {label}: {output_path}")
+        return output_path
     except subprocess.CalledProcessError as e:
         print(
             f"{Colors.ERROR}[ERROR]{Colors.RESET} ffmpeg conversion failed (return code {e.returncode}): {' '.join(e.cmd)}"
         )
     except Exception as e:  # Catch other potential errors during conversion
         print(
-            f"{Colors.ERROR}[ERROR]{Colors.RESET} ffmpeg conversion failed: {e} for {input_path} to {output_mp3_path}"
+            f"{Colors.ERROR}[ERROR]{Colors.RESET} ffmpeg conversion failed: {e} for {input_path} to {output_path}"
         )
+    return None
+
+
+def convert_to_mp3(input_path, output_mp3_path):
+    """Converts input to a 44.1 kHz stereo 192k MP3. Returns output_mp3_path on success, None on failure."""
+    return _run_ffmpeg_audio(
+        input_path, output_mp3_path, ["-ar", "44100", "-ac", "2", "-b:a", "192k"], "MP3"
+    )
+
 
-    # Attempt to remove temporary input file even on conversion error, if it exists and is a temp file
-    if (
-        "_audiotemp." in os.path.basename(input_path)
-        and os.path.exists(input_path)
-        and input_path != output_mp3_path
-    ):
+def convert_to_whisper_wav(input_path, output_wav_path):
+    """
+    Decodes input straight to the 16 kHz mono 16-bit PCM that Whisper consumes, so
+    transcription needs no further ffmpeg decode or resample.
+    Returns output_wav_path on success, None on failure.
+    """
+    return _run_ffmpeg_audio(
+        input_path,
+        output_wav_path,
+        ["-ac", "1", "-ar", str(WHISPER_SAMPLE_RATE), "-c:a", "pcm_s16le"],
+        "16 kHz PCM WAV",
+    )
+
+
+def remove_temp_audio(input_path):
+    """Removes a temporary `_audiotemp.` stream download once all conversions from it are done."""
+    if input_path and "_audiotemp." in os.path.basename(input_path) and os.path.exists(input_path):
         try:
             os.remove(input_path)
         except OSError as oe:
             print(
-                f"{Colors.WARNING}[WARNING]{Colors.RESET} Could not remove temporary file {input_path} on error: {oe}"
+                f"{Colors.WARNING}[WARNING]{Colors.RESET} Could not remove temporary audio file {input_path}: {oe}"
             )
-    return None
 
 
-def generate_caption_files(audio_path, output_dir, base_filename, model_name="tiny", transcript_output_dir=None):
-    """Generates caption files (.srt, .ass) and optionally a transcript (.txt) using stable-whisper."""
+def _wav_data_layout(wav_path):
+    """Returns (data_offset, n_samples) of a 16 kHz mono s16le WAV file, or None if it is not one."""
+    import struct
+
+    with open(wav_path, "rb") as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            return None
+        fmt_ok = False
+        while True:
+            chunk_header = f.read(8)
+            if len(chunk_header) < 8:
+                return None
+            chunk_id, chunk_size = struct.unpack("<4sI", chunk_header)
+            if chunk_id == b"fmt ":
+                fmt = f.read(chunk_size)
+                audio_format, channels, sample_rate = struct.unpack("<HHI", fmt[:8])
+                bits = struct.unpack("<H", fmt[14:16])[0]
+                fmt_ok = (audio_format, channels, sample_rate, bits) == (1, 1, WHISPER_SAMPLE_RATE, 16)
+                if chunk_size % 2:
+                    f.seek(1, os.SEEK_CUR)
+            elif chunk_id == b"data":
+                if not fmt_ok:
+                    return None
+                data_offset = f.tell()
+                data_size = min(chunk_size, os.path.getsize(wav_path) - data_offset)
+                return data_offset, data_size // 2
+            else:
+                f.seek(chunk_size + (chunk_size % 2), os.SEEK_CUR)
+
+
+def is_whisper_wav(path):
+    return bool(path) and path.lower().endswith(".wav") and _wav_data_layout(path) is not None
+
+
+def load_whisper_pcm(wav_path, start=None, end=None):
+    """
+    Memory-maps a 16 kHz mono WAV written by convert_to_whisper_wav and returns the
+    [start, end) seconds as the float32 array Whisper expects, without spawning ffmpeg.
+    """
+    import numpy as np
+
+    data_offset, n_samples = _wav_data_layout(wav_path)
+    samples = np.memmap(wav_path, dtype="<i2", mode="r", offset=data_offset, shape=(n_samples,))
+    first = int((start or 0) * WHISPER_SAMPLE_RATE)
+    last = n_samples if end is None else min(n_samples, int(end * WHISPER_SAMPLE_RATE))
+    return samples[first:last].astype(np.float32) / 32768.0
+
+
+def detect_silences_pcm(wav_path, noise_db=-35, min_silence=0.4, frame_seconds=0.02):
+    """Energy-based silence detection directly on the memory-mapped PCM of a Whisper WAV."""
+    import numpy as np
+
+    data_offset, n_samples = _wav_data_layout(wav_path)
+    samples = np.memmap(wav_path, dtype="<i2", mode="r", offset=data_offset, shape=(n_samples,))
+    frame = int(frame_seconds * WHISPER_SAMPLE_RATE)
+    threshold = (10 ** (noise_db / 20) * 32768.0) ** 2
+    block_frames = 3000  # Process a minute of audio at a time to bound memory use.
+
+    silent = []
+    for block_start in range(0, n_samples // frame, block_frames):
+        block = samples[block_start * frame:(block_start + block_frames) * frame]
+        usable = (len(block) // frame) * frame
+        energy = np.square(block[:usable].astype(np.float32)).reshape(-1, frame).mean(axis=1)
+        silent.append(energy < threshold)
+    if not silent:
+        return []
+    silent = np.concatenate(silent)
+
+    silences, run_start = [], None
+    for index, is_silent in enumerate(np.append(silent, False)):
+        if is_silent and run_start is None:
+            run_start = index
+        elif not is_silent and run_start is not None:
+            if (index - run_start) * frame_seconds >= min_silence:
+                silences.append((run_start * frame_seconds, index * frame_seconds))
+            run_start = None
+    return silences
+
+
+# --- Chunked, Multi-Process Transcription ---
+
+DEFAULT_CHUNK_SECONDS = 300
+_SILENCE_RE = re.compile(r"silence_(start|end): (-?[0-9.]+)")
+
+
+def get_media_duration(path):
+    """Returns the duration of a media file in seconds (ffprobe, or the header of a Whisper WAV), or None."""
+    if is_whisper_wav(path):
+        return _wav_data_layout(path)[1] / WHISPER_SAMPLE_RATE
+    try:
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+            capture_output=True, text=True, check=True,
+        )
+        return float(result.stdout.strip())
+    except (subprocess.CalledProcessError, ValueError, OSError):
+        return None
+
+
+def detect_silences(audio_path, noise_db=-35, min_silence=0.4):
+    """Returns a list of (start, end) silent intervals found by ffmpeg's silencedetect filter."""
+    result = subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-nostdin", "-i", audio_path, "-vn",
+            "-af", f"silencedetect=noise={noise_db}dB:d={min_silence}",
+            "-f", "null", "-",
+        ],
+        capture_output=True, text=True, check=False,
+    )
+    silences, start = [], None
+    for kind, value in _SILENCE_RE.findall(result.stderr):
+        if kind == "start":
+            start = max(0.0, float(value))
+        elif start is not None:
+            silences.append((start, float(value)))
+            start = None
+    return silences
+
+
+def plan_chunks(duration, silences, chunk_seconds=DEFAULT_CHUNK_SECONDS):
+    """
+    Splits [0, duration] into chunks of roughly `chunk_seconds`, cutting in the middle
+    of the silence nearest to each target boundary so no word is split in two.
+    Falls back to a hard cut when there is no silence within a quarter chunk.
+    """
+    midpoints = [(start + end) / 2 for start, end in silences]
+    window = chunk_seconds / 4
+    cuts, position = [], 0.0
+    while duration - position > chunk_seconds * 1.25:
+        target = position + chunk_seconds
+        nearby = [m for m in midpoints if abs(m - target) <= window and m > position]
+        cut = min(nearby, key=lambda m: abs(m - target)) if nearby else target
+        cuts.append(cut)
+        position = cut
+    bounds = [0.0] + cuts + [duration]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def decode_audio_segment(audio_path, start, end):
+    """Decodes [start, end) of a media file to 16 kHz mono float32 PCM, as Whisper expects."""
+    import numpy as np
+
+    command = [
+        "ffmpeg", "-nostdin", "-v", "error",
+        "-ss", f"{start:.3f}", "-t", f"{end - start:.3f}", "-i", audio_path,
+        "-vn", "-ac", "1", "-ar", str(WHISPER_SAMPLE_RATE), "-f", "s16le", "-",
+    ]
+    raw = subprocess.run(command, capture_output=True, check=True).stdout
+    return np.frombuffer(raw, np.int16).astype(np.float32) / 32768.0
+
+
+def _offset_result_dict(result_dict, offset):
+    """Shifts every segment and word timestamp in a stable-ts result dict by `offset` seconds."""
+    for segment in result_dict.get("segments", []):
+        segment["start"] += offset
+        segment["end"] += offset
+        for word in segment.get("words") or []:
+            word["start"] += offset
+            word["end"] += offset
+    return result_dict
+
+
+def _init_transcription_worker(torch_threads):
+    try:
+        import torch
+
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+
+
+def _transcribe_chunk(audio_path, start, end, model_name, device):
+    """Worker entry point: transcribes one chunk and returns an offset-corrected result dict."""
+    if is_whisper_wav(audio_path):
+        audio = load_whisper_pcm(audio_path, start, end)
+    else:
+        audio = decode_audio_segment(audio_path, start, end)
+    model = get_whisper_model(model_name, device=device)
+    result = model.transcribe(audio, fp16=bool(device and device.startswith("cuda")))
+    return _offset_result_dict(result.to_dict(), start)
+
+
+_transcription_pools = {}
+_transcription_pools_lock = threading.Lock()
+
+
+def _get_transcription_pool(workers):
+    """Returns a long-lived process pool, so workers keep their loaded models between videos."""
+    with _transcription_pools_lock:
+        pool = _transcription_pools.get(workers)
+        if pool is None:
+            torch_threads = max(1, (os.cpu_count() or workers) // workers)
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                # Forking a process that already holds torch threads is unsafe.
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_transcription_worker,
+                initargs=(torch_threads,),
+            )
+            _transcription_pools[workers] = pool
+        return pool
+
+
+def transcribe_parallel(audio_path, model_name, workers, chunk_seconds=DEFAULT_CHUNK_SECONDS, device=None):
+    """
+    Transcribes `audio_path` by splitting it at silences and running the chunks in a
+    process pool. Returns a single stable-ts WhisperResult with word timestamps
+    relative to the start of the file.
+    """
+    import stable_whisper
+
+    duration = get_media_duration(audio_path)
+    if not duration:
+        raise RuntimeError(f"Could not determine duration of {audio_path}")
+    silences = detect_silences_pcm(audio_path) if is_whisper_wav(audio_path) else detect_silences(audio_path)
+    chunks = plan_chunks(duration, silences, chunk_seconds)
+    print(
+        f"{Colors.INFO}[INFO]{Colors.RESET} Transcribing {duration:.0f}s of audio as {len(chunks)} chunk(s) on {workers} worker(s)..."
+    )
+
+    pool = _get_transcription_pool(workers)
+    futures = [
+        pool.submit(_transcribe_chunk, audio_path, start, end, model_name, device)
+        for start, end in chunks
+    ]
+    chunk_results = [future.result() for future in futures]
+
+    merged = {
+        "language": chunk_results[0].get("language") if chunk_results else None,
+        "segments": [segment for result in chunk_results for segment in result.get("segments", [])],
+    }
+    return stable_whisper.WhisperResult(merged)
+
+
+def generate_caption_files(
+    audio_path,
+    output_dir,
+    base_filename,
+    model_name="tiny",
+    transcript_output_dir=None,
+    device=None,
+    cache_budget_mb=None,
+    workers=1,
+    chunk_seconds=DEFAULT_CHUNK_SECONDS,
+):
+    """
+    Transcribes with stable-whisper into a word-level transcript artifact (.words.jsonl)
+    and derives the caption files (.srt, .ass) and optionally a transcript (.txt) from it.
+    The model comes from the process-wide registry, so it is loaded once per run. With
+    `workers` > 1, long audio is split at silences and transcribed in parallel processes.
+    """
     if not os.path.exists(audio_path):
         print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Audio file not found for caption generation: {audio_path}")
         return None
@@ -77,23 +412,40 @@ def generate_caption_files(audio_path, output_dir, base_filename, model_name="ti
         f"{Colors.INFO}[INFO]{Colors.RESET} Generating captions and transcript for {audio_path} using stable-whisper model '{model_name}'..."
     )
     try:
-        model = stable_whisper.load_model(model_name)
         os.makedirs(output_dir, exist_ok=True)
         if transcript_output_dir:
             os.makedirs(transcript_output_dir, exist_ok=True)
 
-        result = model.transcribe(audio_path, fp16=False)
+        duration = get_media_duration(audio_path) if workers > 1 else None
+        if duration and duration > chunk_seconds * 1.25:
+            result = transcribe_parallel(audio_path, model_name, workers, chunk_seconds, device)
+        else:
+            model = get_whisper_model(model_name, device=device, cache_budget_mb=cache_budget_mb)
+            # A Whisper WAV is handed over as an in-memory array, skipping Whisper's own ffmpeg decode.
+            audio = load_whisper_pcm(audio_path) if is_whisper_wav(audio_path) else audio_path
+            result = model.transcribe(audio, fp16=bool(device and device.startswith("cuda")))
 
+        # The word-level transcript is the source of truth; every text format is derived from it.
+        words_path = write_transcript(
+            result.to_dict(), os.path.join(output_dir, f"{base_filename}{TRANSCRIPT_SUFFIX}")
+        )
         srt_path = os.path.join(output_dir, f"{base_filename}.srt")
         ass_path = os.path.join(output_dir, f"{base_filename}.ass")
         txt_path = os.path.join(transcript_output_dir, f"{base_filename}.txt") if transcript_output_dir else None
 
-        result.to_srt_vtt(srt_path)
-        result.to_ass(ass_path)
-        if txt_path:
-            result.to_txt(txt_path)
+        transcript = Transcript(words_path)
+        try:
+            # Caption files keep stable-ts' word-highlighted layout.
+            derived = [(srt_path, transcript.to_srt(word_level=True)), (ass_path, transcript.to_ass())]
+            if txt_path:
+                derived.append((txt_path, transcript.to_txt()))
+        finally:
+            transcript.close()
+        for path, content in derived:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
 
-        generated_files = {}
+        generated_files = {"words": words_path}
         if os.path.exists(srt_path):
             generated_files["srt"] = srt_path
         if os.path.exists(ass_path):
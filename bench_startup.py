@@ -0,0 +1,90 @@
+"""
+Startup-time benchmark for the CLI.
+
+Times `main.py --help` and `main.py manage list` in a scratch directory and checks
+that neither pulls in the heavy dependencies (torch, stable_whisper, yt_dlp,
+google.generativeai, pandas). Exits non-zero if a heavy module is imported or the
+median wall time exceeds the budget, so it can guard against import regressions.
+
+Usage: python bench_startup.py [--runs 5] [--budget 1.0]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+MAIN_PY = os.path.join(REPO_DIR, "main.py")
+HEAVY_MODULES = ["torch", "stable_whisper", "yt_dlp", "google.generativeai", "pandas"]
+
+COMMANDS = {
+    "--help": ["--help"],
+    "manage list": ["manage", "list"],
+}
+
+# Runs the CLI in-process and reports which heavy modules ended up imported.
+_PROBE = """
+import sys
+sys.path.insert(0, {repo!r})
+sys.argv = ["main.py"] + {argv!r}
+import main
+try:
+    main.main()
+except SystemExit:
+    pass
+print("HEAVY:" + ",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def time_command(argv, cwd, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, MAIN_PY] + argv,
+            cwd=cwd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=False,
+        )
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def heavy_modules_loaded(argv, cwd):
+    probe = _PROBE.format(repo=REPO_DIR, argv=argv, heavy=HEAVY_MODULES)
+    result = subprocess.run(
+        [sys.executable, "-c", probe], cwd=cwd, capture_output=True, text=True, check=False
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith("HEAVY:"):
+            return [m for m in line[len("HEAVY:"):].split(",") if m]
+    raise RuntimeError(f"Probe failed for {argv}: {result.stderr.strip()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI startup-time benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per command (default: 5)")
+    parser.add_argument(
+        "--budget", type=float, default=1.0, help="Max median seconds per command (default: 1.0)"
+    )
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        for name, argv in COMMANDS.items():
+            median = time_command(argv, scratch_dir, args.runs)
+            heavy = heavy_modules_loaded(argv, scratch_dir)
+            ok = median <= args.budget and not heavy
+            failed |= not ok
+            status = "OK" if ok else "FAIL"
+            heavy_note = f", heavy imports: {', '.join(heavy)}" if heavy else ""
+            print(f"[{status}] {name:<12} median {median * 1000:7.1f} ms (budget {args.budget * 1000:.0f} ms){heavy_note}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,18 @@
 import argparse
 import os
+import sys
 from manifest import DEFAULT_MANIFEST_FILE # For default manifest file path
 
+def read_url_list(path):
+    """Reads one URL per line from a file ('-' for stdin), skipping blanks and # comments."""
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith("#")]
+
+
 def parse_arguments():
     parser = argparse.ArgumentParser(
         description="🎥 YouTube Downloader & Analyzer with Caching",
@@ -10,7 +21,7 @@ def parse_arguments():
     parser.add_argument(
         "--manifest-file",
         default=DEFAULT_MANIFEST_FILE,
-        help=f"Path to the processing manifest CSV file (default: {DEFAULT_MANIFEST_FILE})",
+        help=f"Path to the processing manifest database, relative to the output directory (default: {DEFAULT_MANIFEST_FILE})",
     )
 
     subparsers = parser.add_subparsers(
@@ -19,9 +30,74 @@ def parse_arguments():
 
     # --- Process Command ---
     process_parser = subparsers.add_parser(
-        "process", help="Download and process a YouTube video"
+        "process", help="Download and process one or more YouTube videos"
+    )
+    process_parser.add_argument("url", nargs="?", help="YouTube video URL")
+    process_parser.add_argument(
+        "--from-file",
+        default=None,
+        help="Process every URL listed in this file (one per line, '-' for stdin) as a concurrent batch.",
+    )
+    process_parser.add_argument(
+        "--network-jobs",
+        type=int,
+        default=None,
+        help="Batch mode: max concurrent yt-dlp requests (default: 4).",
+    )
+    process_parser.add_argument(
+        "--transcription-jobs",
+        type=int,
+        default=None,
+        help="Batch mode: max concurrent Whisper transcriptions (default: 1).",
+    )
+    process_parser.add_argument(
+        "--llm-jobs",
+        type=int,
+        default=None,
+        help="Batch mode: max concurrent Gemini-bound steps (default: 4).",
+    )
+    process_parser.add_argument(
+        "--llm-rpm",
+        type=int,
+        default=None,
+        help="Gemini requests per minute allowed by the shared client's rate limiter (default: 60).",
+    )
+    process_parser.add_argument(
+        "--llm-tpm",
+        type=int,
+        default=None,
+        help="Estimated Gemini prompt tokens per minute allowed by the rate limiter (default: 1000000).",
+    )
+    process_parser.add_argument(
+        "--llm-concurrency",
+        type=int,
+        default=None,
+        help="Max Gemini requests in flight at once across all videos (default: 8).",
+    )
+    process_parser.add_argument(
+        "--llm-retries",
+        type=int,
+        default=None,
+        help="Retries for rate-limited or transient Gemini errors, with exponential backoff and jitter (default: 5).",
+    )
+    process_parser.add_argument(
+        "--ffmpeg-jobs",
+        type=int,
+        default=None,
+        help="Batch mode: max concurrent ffmpeg jobs (default: a quarter of the CPU cores).",
+    )
+    process_parser.add_argument(
+        "--clip-jobs",
+        type=int,
+        default=None,
+        help="Clips of one video rendered concurrently, one ffmpeg each (default: a quarter of the CPU cores).",
+    )
+    process_parser.add_argument(
+        "--ffmpeg-threads",
+        type=int,
+        default=None,
+        help="Thread budget (-threads) per clip-rendering ffmpeg (default: CPU cores / --clip-jobs).",
     )
-    process_parser.add_argument("url", help="YouTube video URL")
     process_parser.add_argument(
         "-o",
         "--output",
@@ -38,6 +114,30 @@ def parse_arguments():
         default="best",
         help="Video quality/format selection for yt-dlp (e.g., 'best', 'bestvideo[height<=720]').",
     )
+    process_parser.add_argument(
+        "--audio-first",
+        action="store_true",
+        help="Transcribe and analyse from the smallest audio-only stream, and download the video only once the "
+        "clip timestamps are known, capped at the resolution the clips need.",
+    )
+    process_parser.add_argument(
+        "--download-sections",
+        action="store_true",
+        help="Download only the (padded) time ranges the clips are cut from, after the timestamps are known, "
+        "instead of the full video. The audio for transcription comes from the audio-only stream.",
+    )
+    process_parser.add_argument(
+        "--concurrent-fragments",
+        type=int,
+        default=None,
+        help="DASH/HLS fragments of one download fetched concurrently by yt-dlp (default: 4).",
+    )
+    process_parser.add_argument(
+        "--download-retries",
+        type=int,
+        default=None,
+        help="Retries per failed download request or fragment, with exponential backoff and jitter (default: 10).",
+    )
     process_parser.add_argument(
         "--audio-quality",
         default="bestaudio",
@@ -49,6 +149,11 @@ def parse_arguments():
         action="store_true",
         help="Download audio-only (MP3). No video download.",
     )
+    process_parser.add_argument(
+        "--mp3",
+        action="store_true",
+        help="Also encode a 192k MP3 of the audio. Transcription always uses a 16 kHz mono WAV.",
+    )
     process_parser.add_argument(
         "--audio-dir",
         default=None,
@@ -80,6 +185,32 @@ def parse_arguments():
         action="store_true",
         help="Get viral timestamps from viral analysis.",
     )
+    process_parser.add_argument(
+        "--llm-timestamps",
+        action="store_true",
+        help="Always ask Gemini for viral timestamps instead of aligning the analysis cues to the transcript locally.",
+    )
+    process_parser.add_argument(
+        "--stream-clips",
+        action="store_true",
+        help="Stream the viral analysis and start rendering each clip as soon as its segment has been generated "
+        "and aligned, instead of waiting for the full analysis and timestamps.",
+    )
+    process_parser.add_argument(
+        "--analysis-window-minutes",
+        type=float,
+        default=20,
+        help="Transcripts longer than 1.5 windows are analysed map-reduce style: overlapping windows of this many "
+        "minutes (following YouTube chapters when known) are scored concurrently and a reduce prompt picks the best "
+        "segments (default: 20, 0 = always one prompt).",
+    )
+    process_parser.add_argument(
+        "--prompt-token-budget",
+        type=int,
+        default=100000,
+        help="Estimated-token budget for the transcript inlined into each Gemini prompt. Transcripts are sent as "
+        "compact second-anchored lines, merged into coarser lines only when needed to fit (default: 100000).",
+    )
     process_parser.add_argument(
         "--number-of-sections",
         type=int,
@@ -106,6 +237,29 @@ def parse_arguments():
         default="tiny",
         help="Whisper model to use for caption generation (e.g., tiny, small, base, medium, large).",
     )
+    process_parser.add_argument(
+        "--whisper-device",
+        default=None,
+        help="Device for the Whisper model (e.g., cpu, cuda). Defaults to stable-whisper's choice.",
+    )
+    process_parser.add_argument(
+        "--whisper-cache-mb",
+        type=int,
+        default=None,
+        help="Memory budget for keeping loaded Whisper models between videos (default: 8192).",
+    )
+    process_parser.add_argument(
+        "--transcribe-workers",
+        type=int,
+        default=1,
+        help="Split long audio at silences and transcribe the chunks in this many processes (default: 1).",
+    )
+    process_parser.add_argument(
+        "--transcribe-chunk-seconds",
+        type=int,
+        default=300,
+        help="Target chunk length in seconds for parallel transcription (default: 300).",
+    )
     process_parser.add_argument(
         "--caption-dir",
         default=None,
@@ -119,13 +273,40 @@ def parse_arguments():
     process_parser.add_argument(
         "--burn-clips",
         action="store_true",
-        help="Burn .ass subtitles into the video clips. Requires --generate-captions.",
+        help="Render captioned clips: trimming, reel scale/pad and the clip's subtitles are applied in a single encode of the source video.",
+    )
+    process_parser.add_argument(
+        "--keep-uncaptioned-clips",
+        action="store_true",
+        help="Also write uncaptioned clips to [OUTPUT]/viral_clips (an extra encode per clip).",
     )
     process_parser.add_argument(
         "--burned-video-dir",
         default=None,
         help="Directory for videos with burned subtitles (default: [OUTPUT]/burned_videos)",
     )
+    process_parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory for cached metadata and artifacts (default: [OUTPUT]/.cache)",
+    )
+    process_parser.add_argument(
+        "--metadata-ttl",
+        type=float,
+        default=6,
+        help="Hours a cached video metadata record stays valid (default: 6).",
+    )
+    process_parser.add_argument(
+        "--no-llm-cache",
+        action="store_true",
+        help="Always call Gemini, bypassing the on-disk response cache in [CACHE_DIR]/llm.",
+    )
+    process_parser.add_argument(
+        "--llm-cache-mb",
+        type=int,
+        default=None,
+        help="Size bound of the Gemini response cache; least recently used responses are evicted (default: 256).",
+    )
     process_parser.add_argument(
         "--force",
         action="store_true",
@@ -139,7 +320,7 @@ def parse_arguments():
     process_parser.add_argument(
         "--no-reel",
         action="store_true",
-        help="Disable 9:16 aspect ratio re-encoding for viral clips, using simple copy instead.",
+        help="Keep clips at the source's 16:9 resolution. For h264 sources the whole GOPs inside each clip are stream-copied and only the edges are re-encoded.",
     )
 
     # --- Manage Command ---
@@ -171,6 +352,18 @@ def parse_arguments():
 
     # Set up effective directory paths for process command
     if args.command_name == "process":
+        if bool(args.url) == bool(args.from_file):
+            process_parser.error("provide either a URL or --from-file, but not both")
+        if args.from_file and args.filename:
+            process_parser.error("--filename cannot be used with --from-file")
+        if (args.clip_jobs is not None and args.clip_jobs < 1) or (
+            args.ffmpeg_threads is not None and args.ffmpeg_threads < 1
+        ):
+            process_parser.error("--clip-jobs and --ffmpeg-threads must be at least 1")
+        if args.concurrent_fragments is not None and args.concurrent_fragments < 1:
+            process_parser.error("--concurrent-fragments must be at least 1")
+        args.urls = read_url_list(args.from_file) if args.from_file else None
+
         base_out = os.path.abspath(args.output)
         args.effective_audio_dir = (
             os.path.abspath(args.audio_dir)
@@ -202,5 +395,11 @@ def parse_arguments():
             if args.burned_video_dir
             else os.path.join(base_out, "burned_videos")
         )
+        args.effective_cache_dir = (
+            os.path.abspath(args.cache_dir)
+            if args.cache_dir
+            else os.path.join(base_out, ".cache")
+        )
+        args.metadata_ttl_seconds = args.metadata_ttl * 3600
 
     return args
@@ -0,0 +1,192 @@
+import os
+import glob
+import json
+import time
+import random
+import threading
+
+from processors.base import Colors
+
+# --- Resumable Downloads ---
+#
+# Every yt-dlp download shares one policy: DASH/HLS fragments are fetched
+# concurrently, partial files are kept as `.part` (plus yt-dlp's `.ytdl` fragment
+# state) and continued on the next attempt, and failed requests and fragments are
+# retried with exponential backoff and full jitter. A missing fragment fails the
+# download instead of silently leaving a gap in the video.
+#
+# Progress (bytes and fragments done per stream) is recorded in the manifest's
+# `download_progress` column while the download runs, so an interrupted batch run
+# reports where each transfer stopped and continues from the `.part` files. A
+# recorded transfer of another format is discarded rather than resumed.
+
+DEFAULT_CONCURRENT_FRAGMENTS = 4
+DEFAULT_DOWNLOAD_RETRIES = 10
+FILE_ACCESS_RETRIES = 3
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_CAP_SECONDS = 30.0
+# Minimum interval between progress writes to the manifest while downloading.
+PROGRESS_SAVE_SECONDS = 5.0
+
+_settings = {
+    "concurrent_fragments": DEFAULT_CONCURRENT_FRAGMENTS,
+    "retries": DEFAULT_DOWNLOAD_RETRIES,
+}
+# Video and audio downloads of one video update the same manifest field.
+_progress_lock = threading.Lock()
+
+
+def configure_downloads(**settings):
+    """Sets the concurrent_fragments/retries used by every subsequent download."""
+    _settings.update({k: v for k, v in settings.items() if v is not None})
+
+
+def backoff_delay(n):
+    """Sleep before retry `n` (0-based), as called by yt-dlp's retry_sleep_functions."""
+    return random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** n))
+
+
+def download_options(format_selector, output_path, progress=None, **extra):
+    """yt-dlp options for a resumable download of `format_selector` to `output_path`."""
+    retries = _settings["retries"]
+    options = {
+        "format": format_selector,
+        "outtmpl": output_path,
+        "quiet": True,
+        "concurrent_fragment_downloads": max(1, _settings["concurrent_fragments"]),
+        "continuedl": True,
+        "nopart": False,
+        "retries": retries,
+        "fragment_retries": retries,
+        "file_access_retries": FILE_ACCESS_RETRIES,
+        "retry_sleep_functions": {"http": backoff_delay, "fragment": backoff_delay},
+        "skip_unavailable_fragments": False,
+    }
+    if progress:
+        options["progress_hooks"] = [progress.hook]
+    options.update(extra)
+    return options
+
+
+def _partial_files(path):
+    """The `.part`, `.part-FragN` and `.ytdl` files yt-dlp keeps for an unfinished `path`."""
+    return glob.glob(glob.escape(path) + ".part*") + glob.glob(glob.escape(path) + ".ytdl")
+
+
+def partial_download_files(entry):
+    """Partial files of every unfinished download recorded for `entry`."""
+    try:
+        progress = json.loads(entry.get("download_progress") or "{}")
+    except ValueError:
+        return []
+    return [
+        path
+        for state in progress.values()
+        for name in state.get("streams", {})
+        for path in _partial_files(os.path.join(state.get("directory", ""), name))
+    ]
+
+
+def _mib(size):
+    return f"{size / 2 ** 20:.1f} MiB"
+
+
+class DownloadProgress:
+    """
+    Tracks one download (`kind`: "video" or "audio") of a manifest entry through
+    yt-dlp progress hooks. The entry's `download_progress` JSON maps each kind to
+    {"format", "directory", "streams": {filename: {"bytes", "total", "fragments", "fragment_count"}}}.
+    `save` persists changed entry fields (e.g. ProcessingStep.save_progress).
+    """
+
+    def __init__(self, entry, kind, format_selector, directory, save=None):
+        self.entry = entry
+        self.kind = kind
+        self.format = format_selector
+        self.directory = directory
+        self.save = save
+        self.streams = {}
+        self._lock = threading.Lock()
+        self._saved_at = 0.0
+
+    def _load(self):
+        try:
+            return json.loads(self.entry.get("download_progress") or "{}")
+        except ValueError:
+            return {}
+
+    def _store(self, state):
+        with _progress_lock:
+            progress = self._load()
+            if state:
+                progress[self.kind] = state
+            else:
+                progress.pop(self.kind, None)
+            self.entry["download_progress"] = json.dumps(progress, sort_keys=True) if progress else None
+            fields = {"download_progress": self.entry["download_progress"]}
+        if self.save:
+            self.save(fields)
+
+    def resume(self):
+        """
+        Reports a recorded, unfinished transfer that will be continued, or removes its
+        partial files if it was of another format or directory. Call before starting the download.
+        """
+        recorded = self._load().get(self.kind)
+        if not recorded:
+            return
+        streams = recorded.get("streams", {})
+        directory = recorded.get("directory", self.directory)
+        partials = [p for name in streams for p in _partial_files(os.path.join(directory, name))]
+        if recorded.get("format") != self.format or directory != self.directory:
+            for path in partials:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            print(
+                f"{Colors.INFO}[INFO]{Colors.RESET} Discarding the partial {self.kind} download of format "
+                f"'{recorded.get('format')}' in {directory}; now downloading '{self.format}'."
+            )
+            self._store(None)
+            return
+        if not partials:
+            return
+        self.streams = streams
+        done = sum(s.get("bytes") or 0 for s in streams.values())
+        fragments = sum(s.get("fragments") or 0 for s in streams.values())
+        fragment_count = sum(s.get("fragment_count") or 0 for s in streams.values())
+        fragment_note = f", {fragments}/{fragment_count} fragments" if fragment_count else ""
+        print(f"{Colors.INFO}[INFO]{Colors.RESET} Resuming the {self.kind} download at {_mib(done)}{fragment_note}.")
+
+    def hook(self, d):
+        """yt-dlp progress hook. Saves at most every PROGRESS_SAVE_SECONDS, and when a stream ends."""
+        status = d.get("status")
+        if status not in ("downloading", "finished", "error") or not d.get("filename"):
+            return
+        name = os.path.basename(d["filename"])
+        with self._lock:
+            stream = self.streams.setdefault(name, {})
+            stream["bytes"] = d.get("downloaded_bytes") or stream.get("bytes") or 0
+            stream["total"] = d.get("total_bytes") or d.get("total_bytes_estimate") or stream.get("total")
+            if d.get("fragment_count"):
+                stream["fragments"] = d.get("fragment_index") or 0
+                stream["fragment_count"] = d["fragment_count"]
+            if status == "finished":
+                stream["fragments"] = stream.get("fragment_count")
+            now = time.monotonic()
+            if status == "downloading" and now - self._saved_at < PROGRESS_SAVE_SECONDS:
+                return
+            self._saved_at = now
+            state = self._state()
+        self._store(state)
+
+    def finish(self, succeeded):
+        """Clears the record of a completed download; keeps (and saves) it after a failure."""
+        with self._lock:
+            state = self._state() if not succeeded and self.streams else None
+        self._store(state)
+
+    def _state(self):
+        streams = {name: dict(stream) for name, stream in self.streams.items()}
+        return {"format": self.format, "directory": self.directory, "streams": streams}
@@ -0,0 +1,226 @@
+import os
+import time
+import json
+import random
+import asyncio
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+from processors.base import Colors
+
+# --- Shared Gemini Client ---
+#
+# One client per process owns a background event loop. Callers on any thread submit
+# requests to it; the loop admits them through request and token rate limiters and a
+# concurrency bound, runs the blocking SDK call on a worker thread, and retries
+# rate-limit and transient errors with exponential backoff and full jitter. The SDK
+# is configured once and model handles are reused across requests.
+
+DEFAULT_LLM_RPM = 60
+DEFAULT_LLM_TPM = 1_000_000
+DEFAULT_LLM_CONCURRENCY = 8
+DEFAULT_LLM_RETRIES = 5
+BACKOFF_BASE_SECONDS = 2.0
+BACKOFF_CAP_SECONDS = 60.0
+REQUEST_TIMEOUT_SECONDS = 900
+# Points the SDK at another server (e.g. gemini_standin.py) over REST instead of the Google API.
+ENDPOINT_ENV = "GEMINI_API_ENDPOINT"
+
+_RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+_RETRYABLE_NAMES = {
+    "ResourceExhausted",
+    "TooManyRequests",
+    "ServiceUnavailable",
+    "DeadlineExceeded",
+    "InternalServerError",
+    "GatewayTimeout",
+}
+
+
+def estimate_tokens(text):
+    """Rough prompt size in tokens (about four characters per token for English)."""
+    return max(1, len(text) // 4)
+
+
+def is_retryable(exc):
+    code = getattr(exc, "code", None)
+    if isinstance(code, int) and code in _RETRYABLE_STATUS:
+        return True
+    return type(exc).__name__ in _RETRYABLE_NAMES or isinstance(exc, (ConnectionError, TimeoutError))
+
+
+def gemini_credentials_available():
+    return bool(os.environ.get("GOOGLE_API_KEY") or os.environ.get(ENDPOINT_ENV))
+
+
+class TokenBucket:
+    """Async token bucket holding up to one minute of budget, refilled continuously."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount=1):
+        amount = min(float(amount), self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class GeminiClient:
+    def __init__(
+        self,
+        rpm=DEFAULT_LLM_RPM,
+        tpm=DEFAULT_LLM_TPM,
+        concurrency=DEFAULT_LLM_CONCURRENCY,
+        max_retries=DEFAULT_LLM_RETRIES,
+    ):
+        self.max_retries = max_retries
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="gemini-client", daemon=True).start()
+        self._requests = TokenBucket(rpm)
+        self._tokens = TokenBucket(tpm)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="gemini-call")
+        self._models = {}
+        self._models_lock = threading.Lock()
+        self._configured = False
+
+    def _model(self, model_name, generation_config):
+        """
+        The SDK model handle, configuring the SDK on first use. Called on the caller's
+        thread before a request is submitted, so the import never blocks the event loop.
+        """
+        key = (model_name, json.dumps(generation_config or {}, sort_keys=True, default=str))
+        with self._models_lock:
+            if key not in self._models:
+                import google.generativeai as genai
+
+                if not self._configured:
+                    endpoint = os.environ.get(ENDPOINT_ENV)
+                    if endpoint:
+                        genai.configure(
+                            api_key=os.environ.get("GOOGLE_API_KEY") or "stand-in",
+                            transport="rest",
+                            client_options={"api_endpoint": endpoint},
+                        )
+                    else:
+                        genai.configure(api_key=os.environ.get("GOOGLE_API_KEY"))
+                    self._configured = True
+                self._models[key] = genai.GenerativeModel(model_name=model_name, generation_config=generation_config)
+            return self._models[key]
+
+    async def _generate(self, model, model_name, prompt):
+        tokens = estimate_tokens(prompt)
+        call = partial(model.generate_content, [prompt], request_options={"timeout": REQUEST_TIMEOUT_SECONDS})
+        attempt = 0
+        while True:
+            await self._requests.acquire(1)
+            await self._tokens.acquire(tokens)
+            async with self._semaphore:
+                try:
+                    return await self._loop.run_in_executor(self._executor, call)
+                except Exception as e:
+                    if attempt >= self.max_retries or not is_retryable(e):
+                        raise
+                    error = e
+            delay = random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+            attempt += 1
+            print(
+                f"{Colors.WARNING}[WARNING]{Colors.RESET} {model_name} request failed ({type(error).__name__}), "
+                f"retry {attempt}/{self.max_retries} in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+
+    async def _generate_stream(self, model, model_name, prompt, on_chunk):
+        tokens = estimate_tokens(prompt)
+        delivered = []
+
+        def consume():
+            stream = model.generate_content(
+                [prompt], stream=True, request_options={"timeout": REQUEST_TIMEOUT_SECONDS}
+            )
+            for chunk in stream:
+                delivered.append(True)
+                on_chunk(chunk)
+
+        attempt = 0
+        while True:
+            await self._requests.acquire(1)
+            await self._tokens.acquire(tokens)
+            async with self._semaphore:
+                try:
+                    return await self._loop.run_in_executor(self._executor, consume)
+                except Exception as e:
+                    # Once chunks have reached the caller, a retry would deliver them twice.
+                    if delivered or attempt >= self.max_retries or not is_retryable(e):
+                        raise
+                    error = e
+            delay = random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+            attempt += 1
+            print(
+                f"{Colors.WARNING}[WARNING]{Colors.RESET} {model_name} stream failed ({type(error).__name__}), "
+                f"retry {attempt}/{self.max_retries} in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+
+    def generate(self, model_name, prompt, generation_config=None):
+        """Blocking call usable from any thread; returns the SDK response."""
+        model = self._model(model_name, generation_config)
+        future = asyncio.run_coroutine_threadsafe(self._generate(model, model_name, prompt), self._loop)
+        return future.result()
+
+    def generate_stream(self, model_name, prompt, on_chunk, generation_config=None):
+        """
+        Blocking streaming call: `on_chunk` is called with each response chunk as it
+        arrives (on a worker thread). Returns when the stream is finished.
+        """
+        model = self._model(model_name, generation_config)
+        future = asyncio.run_coroutine_threadsafe(self._generate_stream(model, model_name, prompt, on_chunk), self._loop)
+        future.result()
+
+    def generate_many(self, model_name, prompts, generation_config=None):
+        """
+        Submits all prompts at once, so the rate limiters and the concurrency bound pace
+        the whole fan-out, and returns their responses (or exceptions) in order.
+        """
+        model = self._model(model_name, generation_config)
+        futures = [
+            asyncio.run_coroutine_threadsafe(self._generate(model, model_name, prompt), self._loop)
+            for prompt in prompts
+        ]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+
+_client = None
+_client_lock = threading.Lock()
+_client_settings = {}
+
+
+def configure_gemini_client(**settings):
+    """Sets the rpm/tpm/concurrency/max_retries used when the shared client is created."""
+    _client_settings.update({k: v for k, v in settings.items() if v is not None})
+
+
+def get_gemini_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = GeminiClient(**_client_settings)
+        return _client
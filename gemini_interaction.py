@@ -1,13 +1,14 @@
 import os
-import google.generativeai as genai
 import json
 import re
 
 from processors.base import Colors
 
+# google.generativeai is slow to import, so gemini_client loads it only when a request is made.
+
 # --- Gemini Interaction Functions ---
 
-def get_viral_clip_identifier_prompt_text(transcript_text, number_of_sections, niche_prompt=None): # Renamed to avoid conflict if we later import the original prompts.py for some reason
+def get_viral_clip_identifier_prompt_text(transcript_text, number_of_sections, niche_prompt=None, anchored=False): # Renamed to avoid conflict if we later import the original prompts.py for some reason
     """
     Generates the prompt text for identifying viral clips using a detailed template.
     The number of sections and transcript are injected into the template.
@@ -54,7 +55,7 @@ def get_viral_clip_identifier_prompt_text(transcript_text, number_of_sections, n
         *   **Why it will keep people watching:** [Specific elements that contribute to retention for this clip]
     *   **Potential Viral Angle/Headline Idea (Optional but helpful):** [e.g., "You WON'T BELIEVE what happens next!" or "The #1 Mistake People Make When..."]
     Your ultimate objective is to provide me with ready-to-trim goldmines from my transcript that have the highest probability of becoming highly watchable, shareable, and viral short-form content.
-    Now, please analyze the following YouTube video transcript:
+    Now, please analyze the following YouTube video transcript:{transcript_note_placeholder}
 
     \"\"\"
     {transcript_text}
@@ -78,6 +79,14 @@ def get_viral_clip_identifier_prompt_text(transcript_text, number_of_sections, n
     )
 
 
+    # Compact transcripts (transcript_compaction.py) prefix each line with its start offset.
+    transcript_note_text = (
+        "\n    Each line starts with its offset in seconds in square brackets, e.g. [754]. "
+        "These markers are not spoken text, so never include them in cues or transcripts."
+        if anchored
+        else ""
+    )
+
     niche_section_text = ""
     if niche_prompt and niche_prompt.strip():
         niche_section_text = f"Additionally, consider the following niche focus for identifying clips: {niche_prompt}\n"
@@ -86,57 +95,150 @@ def get_viral_clip_identifier_prompt_text(transcript_text, number_of_sections, n
         number_of_sections_placeholder=number_of_sections_placeholder_text,
         transcript_text=transcript_text,
         niche_prompt_section_placeholder=niche_section_text,
+        transcript_note_placeholder=transcript_note_text,
     )
 
 
 
 
+def _response_text(response):
+    """Extracts the text of a Gemini response, tolerating responses without `.text`."""
+    text = ""
+    try:
+        if hasattr(response, "text") and response.text:
+            return response.text
+    except ValueError:
+        pass  # `.text` raises when the response has no simple text part
+    if hasattr(response, "parts") and response.parts:
+        for part in response.parts:
+            if hasattr(part, "text") and part.text:
+                text += part.text + "\n"
+        text = text.strip()
+    if not text.strip() and hasattr(response, "candidates") and response.candidates:
+        try:
+            if (
+                response.candidates[0].content
+                and len(response.candidates[0].content.parts) > 0
+                and hasattr(response.candidates[0].content.parts[0], "text")
+                and response.candidates[0].content.parts[0].text
+            ):
+                text = response.candidates[0].content.parts[0].text
+        except Exception as e_parse:
+            print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Parsing Gemini response candidates: {e_parse}")
+    return text
+
+
+def _generate(prompt, model_name, cache_dir=None, cache_max_bytes=None, generation_config=None, on_segment=None):
+    """
+    Returns the response text for `prompt`. With `cache_dir`, responses are cached on
+    disk by (model, prompt hash, generation config), so repeated prompts cost nothing.
+    Requests go through the shared rate-limited client (gemini_client.py). Raises on
+    API errors that survive its retries; returns None if GOOGLE_API_KEY is missing on
+    a cache miss.
+
+    With `on_segment`, the response is streamed and every "**Segment N**" block is
+    passed to it as soon as its cues are complete (a cached response is replayed).
+    """
+    parser = None
+    if on_segment:
+        from analysis_windows import SegmentStreamParser
+
+        parser = SegmentStreamParser()
+
+    cache = key = None
+    if cache_dir:
+        from llm_cache import LLMResponseCache, llm_cache_key
+
+        cache = LLMResponseCache(cache_dir, cache_max_bytes)
+        key = llm_cache_key(model_name, prompt, generation_config)
+        cached = cache.get(key)
+        if cached is not None:
+            print(f"{Colors.CACHE}[CACHE]{Colors.RESET} Using cached {model_name} response.")
+            if parser:
+                for block in parser.feed(cached) + parser.close():
+                    on_segment(block)
+            return cached
+
+    from gemini_client import get_gemini_client, gemini_credentials_available
+
+    if not gemini_credentials_available():
+        print(f"{Colors.ERROR}[ERROR]{Colors.RESET} GOOGLE_API_KEY not set.")
+        return None
+
+    if parser:
+        def on_chunk(chunk):
+            for block in parser.feed(_response_text(chunk)):
+                on_segment(block)
+
+        get_gemini_client().generate_stream(model_name, prompt, on_chunk, generation_config)
+        for block in parser.close():
+            on_segment(block)
+        text = parser.text
+    else:
+        response = get_gemini_client().generate(model_name, prompt, generation_config)
+        text = _response_text(response)
+    if cache and text.strip():
+        cache.put(key, model_name, text)
+    return text
+
+
+def _generate_many(prompts, model_name, cache_dir=None, cache_max_bytes=None, generation_config=None):
+    """
+    _generate for many prompts at once: cached responses are reused and the rest are
+    submitted together through GeminiClient.generate_many. Returns the response texts
+    in order, with None for a failed request (or for every miss without credentials).
+    """
+    texts = [None] * len(prompts)
+    cache = None
+    keys = [None] * len(prompts)
+    if cache_dir:
+        from llm_cache import LLMResponseCache, llm_cache_key
+
+        cache = LLMResponseCache(cache_dir, cache_max_bytes)
+        for i, prompt in enumerate(prompts):
+            keys[i] = llm_cache_key(model_name, prompt, generation_config)
+            texts[i] = cache.get(keys[i])
+        hits = sum(text is not None for text in texts)
+        if hits:
+            print(f"{Colors.CACHE}[CACHE]{Colors.RESET} Using {hits} cached {model_name} response(s).")
+
+    missing = [i for i, text in enumerate(texts) if text is None]
+    if not missing:
+        return texts
+
+    from gemini_client import get_gemini_client, gemini_credentials_available
+
+    if not gemini_credentials_available():
+        print(f"{Colors.ERROR}[ERROR]{Colors.RESET} GOOGLE_API_KEY not set.")
+        return texts
+
+    responses = get_gemini_client().generate_many(model_name, [prompts[i] for i in missing], generation_config)
+    for i, response in zip(missing, responses):
+        if isinstance(response, Exception):
+            print(f"{Colors.WARNING}[WARNING]{Colors.RESET} {model_name} request failed: {response}")
+            continue
+        texts[i] = _response_text(response)
+        if cache and texts[i].strip():
+            cache.put(keys[i], model_name, texts[i])
+    return texts
+
+
 def identify_viral_clips_gemini(
-    transcript_text, number_of_sections, model_name, analysis_output_dir, base_filename, niche_prompt=None
+    transcript_text, number_of_sections, model_name, analysis_output_dir, base_filename, niche_prompt=None,
+    cache_dir=None, cache_max_bytes=None, anchored=False, on_segment=None,
 ):
     if not transcript_text or not transcript_text.strip():
         print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Transcript text is empty for viral clip ID.")
         return None
 
     print(f"{Colors.INFO}[INFO]{Colors.RESET} Identifying viral clips with {model_name}...")
-    api_key = os.environ.get("GOOGLE_API_KEY")
-    if not api_key:
-        print(f"{Colors.ERROR}[ERROR]{Colors.RESET} GOOGLE_API_KEY not set.")
-        return None
 
     analysis_file_path = None
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel(model_name=model_name)
-        prompt = get_viral_clip_identifier_prompt_text(transcript_text, number_of_sections, niche_prompt)
-        response = model.generate_content([prompt], request_options={"timeout": 900})
-
-        analysis_text = ""
-        if hasattr(response, "text") and response.text:
-            analysis_text = response.text
-        elif hasattr(response, "parts") and response.parts:
-            for part in response.parts:
-                if hasattr(part, "text") and part.text:
-                    analysis_text += part.text + "\n"
-            analysis_text = analysis_text.strip()
-        if (
-            not analysis_text.strip()
-            and hasattr(response, "candidates")
-            and response.candidates
-        ):
-            try:
-                if (
-                    response.candidates[0].content
-                    and len(response.candidates[0].content.parts) > 0
-                    and hasattr(response.candidates[0].content.parts[0], "text")
-                    and response.candidates[0].content.parts[0].text
-                ):
-                    analysis_text = response.candidates[0].content.parts[0].text
-                    # This was a granular log, already commented out.
-            except Exception as e_parse:
-                print(
-                    f"{Colors.ERROR}[ERROR]{Colors.RESET} Parsing Gemini response candidates for analysis: {e_parse}"
-                )
+        prompt = get_viral_clip_identifier_prompt_text(transcript_text, number_of_sections, niche_prompt, anchored)
+        analysis_text = _generate(prompt, model_name, cache_dir, cache_max_bytes, on_segment=on_segment)
+        if analysis_text is None:
+            return None
 
         analysis_text_to_save = analysis_text.strip() if analysis_text else ""
 
@@ -159,6 +261,109 @@ def identify_viral_clips_gemini(
         traceback.print_exc() # Keep traceback for debugging errors with Gemini API
         return None
 
+WINDOW_SCORE_INSTRUCTION = """
+    This transcript is one part ({window_label}) of a longer video; only consider segments that lie entirely inside it.
+    For EACH segment, add one more line directly after the Estimated Duration line:
+    *   **Virality Score:** [1-10, how strongly this segment meets the criteria above]
+    """
+
+
+def get_window_scoring_prompt_text(window_text, number_of_sections, window_label, niche_prompt=None, anchored=False):
+    """Map prompt of the chunked analysis: the usual identifier prompt for one window, plus a score per segment."""
+    prompt = get_viral_clip_identifier_prompt_text(window_text, number_of_sections, niche_prompt, anchored)
+    return prompt + WINDOW_SCORE_INSTRUCTION.format(window_label=window_label)
+
+
+def get_candidate_reduce_prompt_text(candidates_text, number_of_sections, niche_prompt=None):
+    """Reduce prompt of the chunked analysis: picks the strongest of the per-window candidates."""
+    prompt_template = """
+    You are an Expert Short-Form Video Editor and Viral Content Strategist. The candidate segments below were proposed from different parts of one long YouTube video, each with a Virality Score.
+    Select the {number_of_sections} strongest, most shareable segments overall. Drop duplicates and overlapping candidates, keeping the better one.
+    {niche_prompt_section}
+    Output ONLY the selected segments, best first, renumbered from 1, in exactly the same format as the candidates. Copy the Estimated Duration, Start Cue, End Cue, Transcript of Segment, Justification and Potential Viral Angle lines verbatim, and leave out the Virality Score line.
+
+    Candidate segments:
+    \"\"\"
+    {candidates_text}
+    \"\"\"
+    """
+    niche_section = f"Favour segments that fit this niche focus: {niche_prompt}\n" if niche_prompt and niche_prompt.strip() else ""
+    return prompt_template.format(
+        number_of_sections=number_of_sections or "3 to 5",
+        niche_prompt_section=niche_section,
+        candidates_text=candidates_text,
+    )
+
+
+def _format_window_label(start, end):
+    return f"{int(start // 60)}:{int(start % 60):02d} to {int(end // 60)}:{int(end % 60):02d}"
+
+
+def _select_top_candidates(blocks, number_of_sections):
+    """Fallback reduce: the highest-scored candidates, renumbered and without their score lines."""
+    from analysis_windows import segment_score, strip_score, renumber_segment
+
+    ranked = sorted(blocks, key=segment_score, reverse=True)[: number_of_sections or 3]
+    return "\n\n".join(renumber_segment(strip_score(block), number) for number, block in enumerate(ranked, 1))
+
+
+def identify_viral_clips_chunked(
+    transcript, windows, number_of_sections, model_name, analysis_output_dir, base_filename, niche_prompt=None,
+    cache_dir=None, cache_max_bytes=None, token_budget=None, on_segment=None,
+):
+    """
+    Map-reduce variant of identify_viral_clips_gemini for transcripts too long for one
+    prompt. Every window of `transcript` (a transcript.Transcript) is scored by its own
+    request, all submitted at once through the shared client, and a short reduce prompt
+    over the candidates picks the final segments. The analysis file has the same format.
+    Windows are rendered with transcript_compaction, each within `token_budget`.
+    With `on_segment`, the reduce response is streamed as in `_generate`.
+    """
+    from analysis_windows import split_segment_blocks
+    from transcript_compaction import compact_transcript
+
+    print(
+        f"{Colors.INFO}[INFO]{Colors.RESET} Identifying viral clips with {model_name} "
+        f"across {len(windows)} transcript windows..."
+    )
+
+    prompts = []
+    for start, end in windows:
+        window_text = compact_transcript(transcript, start, end, token_budget).text
+        if window_text.strip():
+            prompts.append(
+                get_window_scoring_prompt_text(
+                    window_text, number_of_sections, _format_window_label(start, end), niche_prompt, anchored=True
+                )
+            )
+
+    window_texts = _generate_many(prompts, model_name, cache_dir, cache_max_bytes)
+
+    blocks = [block for text in window_texts if text for block in split_segment_blocks(text)]
+    if not blocks:
+        print(f"{Colors.ERROR}[ERROR]{Colors.RESET} No candidate segments were found in any transcript window.")
+        return None
+    print(
+        f"{Colors.INFO}[INFO]{Colors.RESET} {len(blocks)} candidate segments from "
+        f"{sum(1 for t in window_texts if t)}/{len(prompts)} windows, selecting the best..."
+    )
+
+    analysis_text = None
+    try:
+        reduce_prompt = get_candidate_reduce_prompt_text("\n\n".join(blocks), number_of_sections, niche_prompt)
+        analysis_text = _generate(reduce_prompt, model_name, cache_dir, cache_max_bytes, on_segment=on_segment)
+    except Exception as e:
+        print(f"{Colors.WARNING}[WARNING]{Colors.RESET} Reduce prompt failed ({e}), selecting candidates by score.")
+    if not analysis_text or not split_segment_blocks(analysis_text):
+        analysis_text = _select_top_candidates(blocks, number_of_sections)
+
+    os.makedirs(analysis_output_dir, exist_ok=True)
+    analysis_file_path = os.path.join(analysis_output_dir, f"{base_filename}_viral_clips_analysis.txt")
+    with open(analysis_file_path, "w", encoding="utf-8") as f:
+        f.write(analysis_text.strip())
+    print(f"{Colors.SUCCESS}[SUCCESS]{Colors.RESET} Viral clip analysis saved to: {analysis_file_path}")
+    return analysis_file_path
+
 def get_viral_timestamps_prompt_text(srt_content, analysis_content):
     """
     Generates the prompt for extracting viral timestamps from SRT and analysis text.
@@ -202,7 +407,22 @@ def get_viral_timestamps_prompt_text(srt_content, analysis_content):
         analysis_content=analysis_content,
     )
 
-def get_viral_timestamps_gemini(srt_content, analysis_content, model_name):
+def _parse_json_response(response_text):
+    # Clean the response to extract only the JSON part
+    json_match = re.search(r'```json\n(.*)\n```', response_text, re.DOTALL)
+    if json_match:
+        json_string = json_match.group(1)
+        return json.loads(json_string)
+    else:
+        # Fallback for cases where the model doesn't use markdown
+        try:
+            return json.loads(response_text)
+        except json.JSONDecodeError:
+            print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Failed to decode JSON from Gemini response.")
+            print("Raw response:", response_text)
+            return None
+
+def get_viral_timestamps_gemini(srt_content, analysis_content, model_name, cache_dir=None, cache_max_bytes=None):
     """
     Calls the Gemini model to get viral timestamps.
     """
@@ -214,39 +434,95 @@ def get_viral_timestamps_gemini(srt_content, analysis_content, model_name):
         return None
 
     print(f"{Colors.INFO}[INFO]{Colors.RESET} Getting viral timestamps with {model_name}...")
-    api_key = os.environ.get("GOOGLE_API_KEY")
-    if not api_key:
-        print(f"{Colors.ERROR}[ERROR]{Colors.RESET} GOOGLE_API_KEY not set.")
-        return None
 
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel(model_name=model_name)
         prompt = get_viral_timestamps_prompt_text(srt_content, analysis_content)
-        response = model.generate_content([prompt], request_options={"timeout": 900})
+        response_text = _generate(prompt, model_name, cache_dir, cache_max_bytes)
+        if response_text is None:
+            return None
         print("[DEBUG] Gemini response received for viral timestamps extraction.")
-        response_text = ""
-        if hasattr(response, "text") and response.text:
-            response_text = response.text
-        elif hasattr(response, "parts") and response.parts:
-            for part in response.parts:
-                if hasattr(part, "text") and part.text:
-                    response_text += part.text + "\n"
-            response_text = response.text.strip()
-
-        # Clean the response to extract only the JSON part
-        json_match = re.search(r'```json\n(.*)\n```', response_text, re.DOTALL)
-        if json_match:
-            json_string = json_match.group(1)
-            return json.loads(json_string)
-        else:
-            # Fallback for cases where the model doesn't use markdown
-            try:
-                return json.loads(response_text)
-            except json.JSONDecodeError:
-                print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Failed to decode JSON from Gemini response.")
-                print("Raw response:", response_text)
-                return None
+        return _parse_json_response(response_text)
+
+    except Exception as e:
+        print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Gemini viral timestamps extraction failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+def get_anchored_timestamps_prompt_text(compact_text, analysis_content):
+    """
+    Timestamp prompt over a compact transcript: the model answers with line anchors
+    (whole seconds), which are mapped back to exact word times locally.
+    """
+    prompt_template = """
+    You are a precise Video Editor AI. Your task is to analyze the provided transcript and a viral clip analysis text.
+    Each transcript line starts with its start offset in seconds in square brackets, e.g. [754].
+    For each viral segment identified in the analysis, find the line where the segment starts and the line where it ends.
+
+    The output MUST be a JSON object containing a list of segments. Each segment object must have "start" and "end" keys holding the bracketed offsets of its first and last line, as integers.
+
+    Example Output:
+    ```json
+    {{
+      "segments": [
+        {{
+          "start": 83,
+          "end": 118
+        }},
+        {{
+          "start": 190,
+          "end": 225
+        }}
+      ]
+    }}
+    ```
+
+    Here is the transcript:
+    \"\"\"
+    {compact_text}
+    \"\"\"
+
+    Here is the viral clip analysis:
+    \"\"\"
+    {analysis_content}
+    \"\"\"
+
+    Now, provide the JSON output with the line offsets.
+    """
+    return prompt_template.format(compact_text=compact_text, analysis_content=analysis_content)
+
+def get_viral_timestamps_compact(compact, analysis_content, model_name, cache_dir=None, cache_max_bytes=None):
+    """
+    Like get_viral_timestamps_gemini, but sends a transcript_compaction.CompactTranscript
+    instead of the SRT and maps the returned line anchors to exact times. Returns the
+    same {"segments": [{"start_time", "end_time"}]} structure.
+    """
+    from timestamp_alignment import seconds_to_srt_time
+
+    if not compact.lines:
+        print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Transcript is empty.")
+        return None
+    if not analysis_content or not analysis_content.strip():
+        print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Analysis content is empty.")
+        return None
+
+    print(f"{Colors.INFO}[INFO]{Colors.RESET} Getting viral timestamps with {model_name} (~{compact.tokens()} transcript tokens)...")
+
+    try:
+        prompt = get_anchored_timestamps_prompt_text(compact.text, analysis_content)
+        response_text = _generate(prompt, model_name, cache_dir, cache_max_bytes)
+        if response_text is None:
+            return None
+        anchors = _parse_json_response(response_text)
+        if not anchors:
+            return None
+        segments = []
+        for segment in anchors.get("segments", []):
+            start = compact.start_time(float(segment["start"]))
+            end = compact.end_time(float(segment["end"]))
+            if end > start:
+                segments.append({"start_time": seconds_to_srt_time(start), "end_time": seconds_to_srt_time(end)})
+        return {"segments": segments}
 
     except Exception as e:
         print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Gemini viral timestamps extraction failed: {e}")
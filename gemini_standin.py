@@ -0,0 +1,191 @@
+"""
+Local stand-in for the Gemini generateContent and streamGenerateContent REST
+endpoints, for running the pipeline offline and exercising the client's rate
+limiting, retries and streaming.
+
+It answers the pipeline's own prompts with deterministic, well-formed responses:
+the viral clip analysis prompt gets "**Segment N**" blocks whose cues are sentences
+from the transcript (with a score when a window of the chunked analysis asks for one),
+the chunked analysis' reduce prompt gets its best-scored candidates, and the
+timestamps prompts get JSON built from the SRT cues or compact line anchors.
+Any other prompt is answered with a short acknowledgement.
+
+Usage:
+    python gemini_standin.py --port 8765 [--latency 0.5] [--error-rate 0.2]
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8765 python main.py process <url>
+"""
+import re
+import json
+import time
+import random
+import argparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+_QUOTED_RE = re.compile(r'"""\s*(.*?)\s*"""', re.DOTALL)
+_SECTIONS_RE = re.compile(r"please identify (\d+)")
+_SELECT_RE = re.compile(r"Select the (\d+) strongest")
+_ANCHOR_RE = re.compile(r"^\[(\d+)\] ?", re.MULTILINE)
+_SRT_TIME_RE = re.compile(r"(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})")
+
+
+def _sentences(text):
+    text = _ANCHOR_RE.sub("", text)
+    return [s.strip() for s in re.split(r"(?<=[.!?])\s+|\n+", text) if len(s.split()) >= 4]
+
+
+def analysis_response(prompt):
+    quoted = _QUOTED_RE.findall(prompt)
+    transcript = quoted[-1] if quoted else ""
+    sentences = _sentences(transcript)
+    count_match = _SECTIONS_RE.search(prompt)
+    count = int(count_match.group(1)) if count_match else 3
+    if not sentences:
+        return "No suitable segments were found in this transcript."
+
+    span = max(1, min(len(sentences) // max(count, 1), 6))
+    scored = "Virality Score" in prompt
+    blocks = []
+    for number in range(1, count + 1):
+        first = (number - 1) * len(sentences) // count
+        if first >= len(sentences):
+            break
+        last = min(first + span - 1, len(sentences) - 1)
+        blocks.append(
+            f"**Segment {number}**\n"
+            f"*   **Estimated Duration:** ~40 seconds\n"
+            + (f"*   **Virality Score:** {len(sentences[first]) % 10 + 1}\n" if scored else "")
+            + f"*   **Start Cue (Phrase/Sentence):** \"{sentences[first]}\"\n"
+            f"*   **End Cue (Phrase/Sentence):** \"{sentences[last]}\"\n"
+            f"*   **Transcript of Segment:**\n    \"{' '.join(sentences[first:last + 1])}\"\n"
+            f"*   **Justification for Virality & Retention (linking to criteria):**\n"
+            f"    *   **Hook:** Stand-in response.\n"
+        )
+    return "\n".join(blocks)
+
+
+def reduce_response(prompt):
+    from analysis_windows import split_segment_blocks, segment_score, strip_score, renumber_segment
+
+    quoted = _QUOTED_RE.findall(prompt)
+    count_match = _SELECT_RE.search(prompt)
+    count = int(count_match.group(1)) if count_match else 3
+    ranked = sorted(split_segment_blocks(quoted[-1] if quoted else ""), key=segment_score, reverse=True)[:count]
+    return "\n\n".join(renumber_segment(strip_score(block), number) for number, block in enumerate(ranked, 1))
+
+
+def timestamps_response(prompt):
+    cues = _SRT_TIME_RE.findall(prompt)
+    segments = []
+    step = max(1, len(cues) // 3)
+    for i in range(0, len(cues), step):
+        window = cues[i:i + min(step, 8)]
+        if window:
+            segments.append({"start_time": window[0][0], "end_time": window[-1][1]})
+    return "```json\n" + json.dumps({"segments": segments[:3]}, indent=2) + "\n```"
+
+
+def anchored_timestamps_response(prompt):
+    anchors = [int(a) for a in _ANCHOR_RE.findall(prompt)]
+    segments = []
+    step = max(1, len(anchors) // 3)
+    for i in range(0, len(anchors), step):
+        window = anchors[i:i + min(step, 4)]
+        if window:
+            segments.append({"start": window[0], "end": window[-1]})
+    return "```json\n" + json.dumps({"segments": segments[:3]}, indent=2) + "\n```"
+
+
+def respond_to(prompt):
+    if "Candidate segments:" in prompt:
+        return reduce_response(prompt)
+    if "Start Cue" in prompt and "Now, please analyze" in prompt:
+        return analysis_response(prompt)
+    if "bracketed offsets" in prompt:
+        return anchored_timestamps_response(prompt)
+    if "SRT file content" in prompt:
+        return timestamps_response(prompt)
+    return "OK"
+
+
+def _response_body(text):
+    return {
+        "candidates": [
+            {"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP", "index": 0}
+        ],
+        "usageMetadata": {"candidatesTokenCount": max(1, len(text) // 4)},
+    }
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    error_rate = 0.0
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"code": 400, "message": "Invalid JSON", "status": "INVALID_ARGUMENT"}})
+            return
+        streaming = ":streamGenerateContent" in self.path
+        if not streaming and ":generateContent" not in self.path:
+            self._send_json(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+            return
+        if self.latency and not streaming:
+            time.sleep(self.latency)
+        if random.random() < self.error_rate:
+            self._send_json(429, {"error": {"code": 429, "message": "Quota exceeded", "status": "RESOURCE_EXHAUSTED"}})
+            return
+
+        prompt = "\n".join(
+            part.get("text", "") for content in request.get("contents", []) for part in content.get("parts", [])
+        )
+        if streaming:
+            self._send_stream(respond_to(prompt))
+        else:
+            self._send_json(200, _response_body(respond_to(prompt)))
+
+    def _send_stream(self, text, chunk_chars=200):
+        """Server-sent events, one response chunk per `chunk_chars` characters, spread over `latency`."""
+        chunks = [text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)] or [""]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for chunk in chunks:
+            self.wfile.write(b"data: " + json.dumps(_response_body(chunk)).encode("utf-8") + b"\r\n\r\n")
+            self.wfile.flush()
+            if self.latency:
+                time.sleep(self.latency / len(chunks))
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline stand-in for the Gemini API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before each response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 429")
+    args = parser.parse_args()
+
+    StandInHandler.latency = args.latency
+    StandInHandler.error_rate = args.error_rate
+    server = ThreadingHTTPServer((args.host, args.port), StandInHandler)
+    print(f"Gemini stand-in listening on http://{args.host}:{args.port} (set GEMINI_API_ENDPOINT to use it)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import os
+import json
+import bisect
+import subprocess
+
+from processors.base import Colors
+
+# --- Per-Video Keyframe Index ---
+
+KEYFRAMES_SUBDIR = "keyframes"
+# Bumped when the index gains fields; older indexes are rebuilt.
+KEYFRAME_INDEX_VERSION = 2
+
+
+def _probe_stream(video_path):
+    """Returns the first video stream's codec parameters as reported by ffprobe."""
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "stream=codec_name,profile,level,pix_fmt,width,height,r_frame_rate,time_base",
+            "-of", "json", video_path,
+        ],
+        capture_output=True, text=True, check=True,
+    )
+    streams = json.loads(result.stdout).get("streams") or []
+    return streams[0] if streams else {}
+
+
+def _probe_keyframes(video_path):
+    """
+    Lists keyframe timestamps from packet flags. ffprobe demuxes every video packet
+    of the file to read them, so this is a full sequential read of the file (I/O
+    bound, nothing is decoded): roughly as long as copying the video once. It runs
+    once per downloaded video; the result is cached by load_keyframe_index.
+    """
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", video_path,
+        ],
+        capture_output=True, text=True, check=True,
+    )
+    keyframes = []
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(",")
+        if "K" in flags and pts_time not in ("", "N/A"):
+            keyframes.append(float(pts_time))
+    return sorted(set(keyframes))
+
+
+def build_keyframe_index(video_path):
+    stat = os.stat(video_path)
+    return {
+        "version": KEYFRAME_INDEX_VERSION,
+        "video_path": os.path.abspath(video_path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "stream": _probe_stream(video_path),
+        "keyframes": _probe_keyframes(video_path),
+    }
+
+
+def keyframe_index_path_for(cache_dir, base_name):
+    return os.path.join(cache_dir, KEYFRAMES_SUBDIR, f"{base_name}.json")
+
+
+def load_keyframe_index(video_path, index_path):
+    """
+    Returns the keyframe index for `video_path`, reading it from `index_path` when it
+    still matches the file's size, mtime and the index version, and (re)building it
+    with ffprobe otherwise.
+    Returns None if ffprobe fails.
+    """
+    stat = os.stat(video_path)
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if (
+            index.get("version") == KEYFRAME_INDEX_VERSION
+            and index.get("size") == stat.st_size
+            and index.get("mtime_ns") == stat.st_mtime_ns
+        ):
+            return index
+    except (OSError, ValueError):
+        pass
+
+    print(f"{Colors.INFO}[INFO]{Colors.RESET} Building keyframe index for {video_path}")
+    try:
+        index = build_keyframe_index(video_path)
+    except (subprocess.CalledProcessError, OSError, ValueError) as e:
+        print(f"{Colors.WARNING}[WARNING]{Colors.RESET} Could not build keyframe index: {e}")
+        return None
+    try:
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        tmp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, index_path)
+    except OSError as e:
+        print(f"{Colors.WARNING}[WARNING]{Colors.RESET} Could not write keyframe index {index_path}: {e}")
+    return index
+
+
+def gop_interior(keyframes, start, end):
+    """
+    Returns (first keyframe at or after `start`, last keyframe at or before `end`),
+    the part of [start, end] that can be stream-copied, or None if no whole GOP fits.
+    """
+    i = bisect.bisect_left(keyframes, start)
+    j = bisect.bisect_right(keyframes, end) - 1
+    if i >= len(keyframes) or j < 0 or keyframes[i] >= keyframes[j]:
+        return None
+    return keyframes[i], keyframes[j]
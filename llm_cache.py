@@ -0,0 +1,91 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+from processors.base import Colors
+
+# --- On-Disk LLM Response Cache ---
+
+LLM_CACHE_SUBDIR = "llm"
+DEFAULT_LLM_CACHE_MB = 256
+
+
+def llm_cache_settings(args):
+    """Returns (cache_dir, max_bytes) for the Gemini calls of a run; cache_dir is None when disabled."""
+    if getattr(args, "no_llm_cache", False):
+        return None, None
+    max_mb = getattr(args, "llm_cache_mb", None) or DEFAULT_LLM_CACHE_MB
+    return getattr(args, "effective_cache_dir", None), max_mb * 1024 * 1024
+
+
+def llm_cache_key(model_name, prompt, generation_config=None):
+    """Hashes (model, sha256(prompt), generation config) into the cache key."""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    material = json.dumps(
+        {"model": model_name, "prompt": prompt_hash, "config": generation_config or {}},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Stores response texts under <cache_dir>/llm/<key>.json. A hit refreshes the
+    file's mtime, and once the directory exceeds `max_bytes` the least recently
+    used responses are evicted.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, cache_dir, max_bytes=None):
+        self.cache_dir = os.path.join(cache_dir, LLM_CACHE_SUBDIR)
+        self.max_bytes = max_bytes or DEFAULT_LLM_CACHE_MB * 1024 * 1024
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return record.get("text")
+
+    def put(self, key, model_name, text):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"model": model_name, "created_at": time.time(), "text": text}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"{Colors.WARNING}[WARNING]{Colors.RESET} Could not write LLM cache entry: {e}")
+            return
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            try:
+                entries = []
+                for name in os.listdir(self.cache_dir):
+                    if name.endswith(".json"):
+                        stat = os.stat(os.path.join(self.cache_dir, name))
+                        entries.append((stat.st_mtime, stat.st_size, name))
+            except OSError:
+                return
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                    total -= size
+                except OSError:
+                    pass
@@ -1,7 +1,8 @@
 # For local execution, you would first need to install these packages:
-# pip install yt-dlp google-generativeai pandas
+# pip install yt-dlp google-generativeai stable-ts
 
 import os # For os.environ.get in main()
+import sys
 
 # Local application imports
 from orchestrator import (
@@ -28,7 +29,8 @@ def main():
             # sys.exit(1)
 
     if args.command_name == "process":
-        process_youtube_url(args)
+        if not process_youtube_url(args):
+            sys.exit(1)
     elif args.command_name == "manage":
         if args.manage_action == "remove":
             handle_remove_url(args)
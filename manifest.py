@@ -1,255 +1,223 @@
 import os
-import pandas as pd
+import csv
+import sqlite3
+import threading
 from datetime import datetime
 
 from processors.base import Colors
+from url_parsing import extract_video_id
 
 # --- Manifest Constants ---
-MANIFEST_COLUMNS = [
-    "youtube_url",
-    "base_filename",
-    "video_path",
-    "mp3_path",
-    "transcript_path",
-    "analysis_path",
-    "caption_srt_path",
-    "caption_vtt_path",
-    "caption_txt_path",
-    "status_video_downloaded",
-    "status_mp3_converted",
-    "status_transcript_generated",
-    "status_analysis_generated",
-    "status_captions_generated",
-    "last_updated",
+# (column, SQLite type). New columns are added to existing databases on open.
+MANIFEST_SCHEMA = [
+    ("video_id", "TEXT PRIMARY KEY"),
+    ("youtube_url", "TEXT"),
+    ("base_filename", "TEXT"),
+    ("video_path", "TEXT"),
+    ("video_sections", "TEXT"),  # JSON: [{"start", "end", "path"}] with --download-sections
+    ("download_progress", "TEXT"),  # JSON: unfinished downloads, see downloads.DownloadProgress
+    ("wav_path", "TEXT"),
+    ("mp3_path", "TEXT"),
+    ("transcript_path", "TEXT"),
+    ("words_path", "TEXT"),  # Word-level transcript artifact (transcript.py)
+    ("analysis_path", "TEXT"),
+    ("caption_srt_path", "TEXT"),
+    ("caption_vtt_path", "TEXT"),
+    ("caption_txt_path", "TEXT"),
+    ("keyframe_index_path", "TEXT"),
+    ("status_video_downloaded", "INTEGER"),
+    ("status_audio_extracted", "INTEGER"),
+    ("status_mp3_converted", "INTEGER"),
+    ("status_transcript_generated", "INTEGER"),
+    ("status_analysis_generated", "INTEGER"),
+    ("status_captions_generated", "INTEGER"),
+    ("cache_keys", "TEXT"),  # JSON: step name -> content-addressed cache key
+    ("last_updated", "TEXT"),
 ]
-DEFAULT_MANIFEST_FILE = "processing_manifest.csv"
-
-
-# --- Manifest Helper Functions ---
-def load_manifest(manifest_path):
-    """Loads the manifest CSV into a pandas DataFrame."""
-    if os.path.exists(manifest_path):
-        try:
-            df = pd.read_csv(
-                manifest_path,
-                keep_default_na=True,  # Important for pd.NA
-                na_values=[  # Comprehensive list of NA values
-                    "",
-                    "#N/A",
-                    "#N/A N/A",
-                    "#NA",
-                    "-1.#IND",
-                    "-1.#QNAN",
-                    "-NaN",
-                    "-nan",
-                    "1.#IND",
-                    "1.#QNAN",
-                    "<NA>",  # pandas uses <NA> for its NA object sometimes
-                    "N/A",
-                    "NA",
-                    "NULL",
-                    "NaN",
-                    "nan",  # lowercase nan
-                    "null",  # lowercase null
-                ],
-                dtype_backend="numpy_nullable",  # Use pandas nullable dtypes where possible
-            )
-
-            # Ensure all manifest columns exist, add if missing
-            for col in MANIFEST_COLUMNS:
-                if col not in df.columns:
-                    df[col] = (
-                        pd.NA
-                    )  # Initialize new columns with pd.NA, compatible with BooleanDtype
-
-            bool_status_cols = [
-                "status_video_downloaded",
-                "status_mp3_converted",
-                "status_transcript_generated",
-                "status_analysis_generated",
-                "status_captions_generated",
-            ]
-            for col_name in bool_status_cols:
-                if col_name in df.columns:
-                    try:
-                        df[col_name] = df[col_name].astype(pd.BooleanDtype())
-                    except Exception as e_astype:
-                        print(
-                            f"{Colors.ERROR}[ERROR]{Colors.RESET} load_manifest: Failed to convert column '{col_name}' to BooleanDtype. Error: {e_astype}"
-                        )
-                        print(
-                            f"         Unique values in column '{col_name}' before error: {df[col_name].unique()[:10]}"
-                        )
-                else:  # If column was just added
-                    df[col_name] = pd.Series([pd.NA] * len(df), dtype=pd.BooleanDtype())
-
-            path_cols = ["video_path", "mp3_path", "transcript_path", "analysis_path", "caption_srt_path", "caption_vtt_path", "caption_txt_path"]
-            for col_name in path_cols:
-                if col_name in df.columns:
-                    df[col_name] = df[col_name].astype(pd.StringDtype())
-                else:
-                    df[col_name] = pd.Series([pd.NA] * len(df), dtype=pd.StringDtype())
-
-            if "youtube_url" in df.columns:
-                df["youtube_url"] = df["youtube_url"].astype(pd.StringDtype())
-            else:
-                df["youtube_url"] = pd.Series([pd.NA] * len(df), dtype=pd.StringDtype())
-
-            if "base_filename" in df.columns:
-                df["base_filename"] = df["base_filename"].astype(pd.StringDtype())
-            else:
-                df["base_filename"] = pd.Series(
-                    [pd.NA] * len(df), dtype=pd.StringDtype()
-                )
+MANIFEST_COLUMNS = [name for name, _ in MANIFEST_SCHEMA]
+BOOL_COLUMNS = {name for name in MANIFEST_COLUMNS if name.startswith("status_")}
+DEFAULT_MANIFEST_FILE = "processing_manifest.db"
+LEGACY_MANIFEST_FILE = "processing_manifest.csv"
 
-            if "last_updated" in df.columns:
-                df["last_updated"] = df["last_updated"].astype(pd.StringDtype())
-            else:
-                df["last_updated"] = pd.Series(
-                    [pd.NA] * len(df), dtype=pd.StringDtype()
-                )
 
-            return df
-        except pd.errors.EmptyDataError:
-            print(f"{Colors.WARNING}[WARNING]{Colors.RESET} Manifest file {manifest_path} is empty. Starting fresh.")
-        except Exception as e:
-            print(
-                f"{Colors.ERROR}[ERROR]{Colors.RESET} Could not load manifest {manifest_path}: {e}. Starting fresh."
-            )
-            import traceback
-
-            traceback.print_exc()
-
-    print(
-        f"{Colors.INFO}[INFO]{Colors.RESET} Creating a new manifest structure as {manifest_path} does not exist or failed to load."
-    )
-    df = pd.DataFrame(columns=MANIFEST_COLUMNS)
-    dtype_map = {
-        "youtube_url": pd.StringDtype(),
-        "base_filename": pd.StringDtype(),
-        "video_path": pd.StringDtype(),
-        "mp3_path": pd.StringDtype(),
-        "transcript_path": pd.StringDtype(),
-        "analysis_path": pd.StringDtype(),
-        "status_video_downloaded": pd.BooleanDtype(),
-        "status_mp3_converted": pd.BooleanDtype(),
-        "status_transcript_generated": pd.BooleanDtype(),
-        "status_analysis_generated": pd.BooleanDtype(),
-        "last_updated": pd.StringDtype(),
-    }
-    for col, col_dtype in dtype_map.items():
-        df[col] = pd.Series(dtype=col_dtype)
-    return df
-
-
-def save_manifest(df, manifest_path):
-    """Saves the DataFrame to the manifest CSV."""
-    try:
-        df.to_csv(manifest_path, index=False)
-    except Exception as e:
-        print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Could not save manifest to {manifest_path}: {e}")
-
-
-def get_manifest_entry(df, url_to_find):
-    """Gets the manifest entry for a given URL. Returns a pandas Series or None."""
-    if "youtube_url" not in df.columns or df.empty:
+def _to_db_value(column, value):
+    if value is None:
         return None
-    entry_df = df[df["youtube_url"] == url_to_find]
-    if not entry_df.empty:
-        return entry_df.iloc[0].copy()
-    else:
+    if isinstance(value, float) and value != value:  # NaN from older pandas-built entries
         return None
-
-
-def update_manifest_entry(df, url_key, data_dict):
-    """Updates or adds an entry in the manifest DataFrame, using url_key."""
-    existing_entry_index = df[df["youtube_url"] == url_key].index
-
-    current_time = datetime.now().isoformat()
-    data_dict["last_updated"] = current_time
-
-    bool_status_cols = [
-        "status_video_downloaded",
-        "status_mp3_converted",
-        "status_transcript_generated",
-        "status_analysis_generated",
-    ]
-    for col_name in bool_status_cols:
-        if col_name in data_dict:
-            val = data_dict[col_name]
-            if pd.isna(val):
-                data_dict[col_name] = pd.NA
-            elif isinstance(val, str):
-                if val.lower() == "true":
-                    data_dict[col_name] = True
-                elif val.lower() == "false":
-                    data_dict[col_name] = False
-                else:
-                    data_dict[col_name] = pd.NA
-            elif isinstance(val, bool):  # Already a Python bool
-                data_dict[col_name] = val
-            # else it might be numpy.bool_ or pd.BooleanDtype bool, leave as is
-
-    if not existing_entry_index.empty:
-        idx = existing_entry_index[0]
-        for key, value in data_dict.items():
+    if column in BOOL_COLUMNS:
+        if isinstance(value, str):
+            lowered = value.strip().lower()
+            if lowered in ("true", "1"):
+                return 1
+            if lowered in ("false", "0"):
+                return 0
+            return None
+        return 1 if value else 0
+    return str(value)
+
+
+def _from_row(row):
+    entry = dict(row)
+    for column in BOOL_COLUMNS:
+        if entry.get(column) is not None:
+            entry[column] = bool(entry[column])
+    return entry
+
+
+class Manifest:
+    """
+    SQLite-backed processing manifest, one row per video keyed by video ID.
+    The database runs in WAL mode so readers never block the writer, and every
+    update is a single-row upsert rather than a rewrite of the whole file. It is
+    opened on first use, and only a write creates it: listing or removing in a
+    directory without a manifest leaves no database behind.
+    """
+
+    def __init__(self, manifest_path):
+        if manifest_path.endswith(".csv"):
+            legacy_csv_path = manifest_path
+            manifest_path = manifest_path[: -len(".csv")] + ".db"
+        else:
+            legacy_csv_path = os.path.join(os.path.dirname(manifest_path), LEGACY_MANIFEST_FILE)
+
+        self.path = manifest_path
+        self._legacy_csv_path = legacy_csv_path
+        self._lock = threading.RLock()
+        self._conn = None
+
+    def _open(self, create=True):
+        """
+        Returns the connection, opening the database on first use. Without `create`, a
+        database that does not exist yet (and has no legacy CSV to import) is not
+        created and None is returned.
+        """
+        with self._lock:
+            if self._conn is not None:
+                return self._conn
+            legacy_exists = bool(self._legacy_csv_path) and os.path.exists(self._legacy_csv_path)
+            if not create and not os.path.exists(self.path) and not legacy_exists:
+                return None
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._ensure_schema()
+            self._migrate_legacy_csv(self._legacy_csv_path)
+            return self._conn
+
+    def _ensure_schema(self):
+        columns_sql = ", ".join(f"{name} {sql_type}" for name, sql_type in MANIFEST_SCHEMA)
+        with self._lock:
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS manifest ({columns_sql})")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS manifest_meta (key TEXT PRIMARY KEY, value TEXT)")
+            existing = {row["name"] for row in self._conn.execute("PRAGMA table_info(manifest)")}
+            for name, sql_type in MANIFEST_SCHEMA:
+                if name not in existing:
+                    self._conn.execute(f"ALTER TABLE manifest ADD COLUMN {name} {sql_type}")
+
+    def _migrate_legacy_csv(self, csv_path):
+        """One-shot import of a pre-SQLite processing_manifest.csv. The CSV is left untouched."""
+        if not csv_path or not os.path.exists(csv_path):
+            return
+        with self._lock:
+            migrated = self._conn.execute(
+                "SELECT value FROM manifest_meta WHERE key = 'migrated_from_csv'"
+            ).fetchone()
+            if migrated:
+                return
             try:
-                # Ensure the column exists before trying to assign with .loc
-                if key not in df.columns:
-                    # This case should ideally not happen if MANIFEST_COLUMNS is complete
-                    # and load_manifest ensures all columns exist.
-                    # If it does, initialize the column with appropriate NA and dtype.
-                    if key in bool_status_cols:
-                        df[key] = pd.Series(
-                            pd.NA, index=df.index, dtype=pd.BooleanDtype()
-                        )
-                    elif key.endswith("_path") or key in [
-                        "youtube_url",
-                        "base_filename",
-                        "last_updated",
-                    ]:
-                        df[key] = pd.Series(
-                            pd.NA, index=df.index, dtype=pd.StringDtype()
-                        )
-                    else:  # Default to object or infer, though ideally all are typed
-                        df[key] = pd.NA
-
-                df.loc[idx, key] = value
-            except Exception as e:
-                print(
-                    f"{Colors.ERROR}[ERROR]{Colors.RESET} update_manifest_entry (update): Failed to set {key}={value} (type: {type(value)}) for URL {url_key}. Error: {e}"
-                )
-                print(
-                    f"       Column '{key}' dtype: {df[key].dtype if key in df else 'Not in df'}"
+                with open(csv_path, "r", encoding="utf-8", newline="") as f:
+                    rows = list(csv.DictReader(f))
+            except (OSError, csv.Error) as e:
+                print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Could not read legacy manifest {csv_path}: {e}")
+                return
+
+            imported = 0
+            self._conn.execute("BEGIN")
+            try:
+                for row in rows:
+                    row = {k: (v if v not in ("", "<NA>", "nan", "NaN") else None) for k, v in row.items()}
+                    video_id = row.get("video_id") or extract_video_id(row.get("youtube_url")) or row.get("youtube_url")
+                    if not video_id:
+                        continue
+                    self._upsert_locked(video_id, row, touch=False)
+                    imported += 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO manifest_meta (key, value) VALUES ('migrated_from_csv', ?)",
+                    (os.path.abspath(csv_path),),
                 )
-    else:
-        new_entry_data = {col: pd.NA for col in MANIFEST_COLUMNS}
-        new_entry_data["youtube_url"] = url_key
-        new_entry_data.update(data_dict)
-
-        try:
-            new_row_df = pd.DataFrame([new_entry_data])
-            # Ensure dtypes of the new row match the main DataFrame before concat
-            for col in df.columns:
-                if col in new_row_df.columns:
-                    try:
-                        new_row_df[col] = new_row_df[col].astype(df[col].dtype)
-                    except Exception as e_astype_concat:
-                        print(
-                            f"{Colors.WARNING}[WARNING]{Colors.RESET} update_manifest_entry (add): Could not astype column '{col}' for new entry. Error: {e_astype_concat}. Value: {new_row_df[col].iloc[0]}, Target Dtype: {df[col].dtype}"
-                        )
-                        # Fallback: if astype fails, try to proceed; concat might still work or give a more specific error
-                # If a column from df is not in new_row_df (shouldn't happen if new_entry_data has all MANIFEST_COLUMNS)
-                # it will be pd.NA in the new row when concatenated, which is fine.
-
-            df = pd.concat([df, new_row_df], ignore_index=True)
-        except Exception as e:
-            print(
-                f"{Colors.ERROR}[ERROR]{Colors.RESET} update_manifest_entry (add): Failed to concat new entry for URL {url_key}. Error: {e}"
-            )
-            print(f"       New entry data: {new_entry_data}")
-            print(f"       Main df dtypes: \n{df.dtypes}")
-            import traceback
-
-            traceback.print_exc()
-    return df
\ No newline at end of file
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+        print(f"{Colors.SUCCESS}[SUCCESS]{Colors.RESET} Migrated {imported} entries from {csv_path} to {self.path}")
+
+    def get(self, video_id):
+        """Returns the entry for `video_id` as a dict, or None."""
+        with self._lock:
+            if self._open(create=False) is None:
+                return None
+            row = self._conn.execute(
+                "SELECT * FROM manifest WHERE video_id = ?", (video_id,)
+            ).fetchone()
+        return _from_row(row) if row else None
+
+    def _upsert_locked(self, video_id, data_dict, touch=True):
+        values = {
+            column: _to_db_value(column, value)
+            for column, value in data_dict.items()
+            if column in MANIFEST_COLUMNS and column != "video_id"
+        }
+        if touch:
+            values["last_updated"] = datetime.now().isoformat()
+        columns = ["video_id"] + list(values)
+        placeholders = ", ".join("?" for _ in columns)
+        if values:
+            updates = ", ".join(f"{column} = excluded.{column}" for column in values)
+            conflict = f"DO UPDATE SET {updates}"
+        else:
+            conflict = "DO NOTHING"
+        self._conn.execute(
+            f"INSERT INTO manifest ({', '.join(columns)}) VALUES ({placeholders}) "
+            f"ON CONFLICT(video_id) {conflict}",
+            [video_id] + list(values.values()),
+        )
+
+    def upsert(self, video_id, data_dict):
+        """Creates or updates the entry for `video_id` with the known columns in `data_dict`."""
+        with self._lock:
+            self._open()
+            self._upsert_locked(video_id, data_dict)
+
+    def remove(self, video_id):
+        with self._lock:
+            if self._open(create=False) is None:
+                return
+            self._conn.execute("DELETE FROM manifest WHERE video_id = ?", (video_id,))
+
+    def entries(self, limit=None):
+        """Returns up to `limit` entries in insertion order."""
+        query = "SELECT * FROM manifest ORDER BY rowid"
+        params = ()
+        if limit is not None:
+            query += " LIMIT ?"
+            params = (limit,)
+        with self._lock:
+            if self._open(create=False) is None:
+                return []
+            return [_from_row(row) for row in self._conn.execute(query, params)]
+
+    def __len__(self):
+        with self._lock:
+            if self._open(create=False) is None:
+                return 0
+            return self._conn.execute("SELECT COUNT(*) FROM manifest").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,78 @@
+import os
+import json
+import time
+import threading
+
+from processors.base import Colors
+
+# How long a record is trusted before the next extraction refreshes it (titles and
+# chapters can still be edited after upload). Downloads always extract their own,
+# fresh format URLs, so none are cached.
+DEFAULT_METADATA_TTL = 6 * 3600
+METADATA_SUBDIR = "metadata"
+
+
+def compact_video_info(info):
+    """
+    Reduces a full yt-dlp info dict (often hundreds of KB) to the handful of fields
+    the pipeline actually uses.
+    """
+    return {
+        "id": info.get("id"),
+        "title": info.get("title"),
+        "duration": info.get("duration"),
+        "webpage_url": info.get("webpage_url"),
+        "chapters": [
+            {
+                "start_time": c.get("start_time"),
+                "end_time": c.get("end_time"),
+                "title": c.get("title"),
+            }
+            for c in info.get("chapters") or []
+        ],
+        "fetched_at": time.time(),
+    }
+
+
+class MetadataCache:
+    """On-disk cache of compact video metadata records, one JSON file per video ID."""
+
+    def __init__(self, cache_dir, ttl=DEFAULT_METADATA_TTL):
+        self.cache_dir = os.path.join(cache_dir, METADATA_SUBDIR)
+        self.ttl = ttl
+
+    def _path(self, video_id):
+        return os.path.join(self.cache_dir, f"{video_id}.json")
+
+    def get(self, video_id):
+        """Returns the cached record for `video_id`, or None if missing or expired."""
+        if not video_id:
+            return None
+        try:
+            with open(self._path(video_id), "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self.ttl is not None and time.time() - record.get("fetched_at", 0) > self.ttl:
+            return None
+        return record
+
+    def put(self, record):
+        video_id = record.get("id")
+        if not video_id:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(video_id)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(record, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"{Colors.WARNING}[WARNING]{Colors.RESET} Could not write metadata cache for {video_id}: {e}")
+
+    def remove(self, video_id):
+        try:
+            os.remove(self._path(video_id))
+        except OSError:
+            pass
@@ -1,18 +1,13 @@
 import os
-import pandas as pd
-
-from manifest import (
-    load_manifest,
-    save_manifest,
-    get_manifest_entry,
-    update_manifest_entry,
-    DEFAULT_MANIFEST_FILE,
-)
+import threading
+from functools import partial
+
+from manifest import Manifest, MANIFEST_COLUMNS, DEFAULT_MANIFEST_FILE
 from youtube_utils import (
     get_sanitized_base_name,
-    get_yt_object_and_canonical_url,
     get_video_info,
 )
+from url_parsing import extract_video_id, canonical_watch_url
 from processors import (
     VideoDownloadStep,
     AudioExtractionStep,
@@ -21,21 +16,51 @@ from processors import (
     ViralTimestampsStep,
     ClipVideoStep,
     BurnClipsStep,
+    StreamingClipsStep,
+    StreamedClipRenderStep,
 )
 from processors.base import Colors
+from processors.streaming_clips import SegmentChannel
+from scheduler import DagScheduler
+from video_sections import load_sections
+from downloads import partial_download_files
 
 # --- Dependency Graph Definition ---
 
 STEP_DEPENDENCIES = {
-    BurnClipsStep: [ClipVideoStep, CaptionGenerationStep],
+    # Captioned clips are rendered straight from the source video in one encode; they
+    # no longer go through the uncaptioned clips of ClipVideoStep.
+    BurnClipsStep: [ViralTimestampsStep, VideoDownloadStep, CaptionGenerationStep],
     ClipVideoStep: [ViralTimestampsStep, VideoDownloadStep],
     ViralTimestampsStep: [ViralAnalysisStep],
     ViralAnalysisStep: [CaptionGenerationStep],
     CaptionGenerationStep: [AudioExtractionStep],
-    AudioExtractionStep: [VideoDownloadStep],
+    # Audio comes from the downloaded video when it already exists, otherwise from a
+    # dedicated audio stream, so transcription does not have to wait for the video.
+    AudioExtractionStep: [],
     VideoDownloadStep: [],
 }
 
+# With --stream-clips, the analysis is streamed by StreamingClipsStep (LLM pool) right
+# after transcription, and StreamedClipRenderStep (ffmpeg pool) renders each aligned
+# segment it hands over once the video is downloaded (see _run_job_step). The regular
+# analysis, timestamp and clip steps then find their outputs in place, or fill in
+# what streaming could not do.
+STREAMING_DEPENDENCIES = {
+    StreamingClipsStep: [CaptionGenerationStep],
+    StreamedClipRenderStep: [VideoDownloadStep, CaptionGenerationStep],
+    ViralAnalysisStep: [StreamingClipsStep],
+    BurnClipsStep: STEP_DEPENDENCIES[BurnClipsStep] + [StreamedClipRenderStep],
+    ClipVideoStep: STEP_DEPENDENCIES[ClipVideoStep] + [StreamedClipRenderStep],
+}
+
+# With --audio-first or --download-sections, the video is fetched only once the clip
+# timestamps are known (with --download-sections, only the ranges the clips need).
+# Until then the pipeline runs on the audio-only stream.
+DEFERRED_VIDEO_DEPENDENCIES = {
+    VideoDownloadStep: [ViralTimestampsStep],
+}
+
 # The full pipeline in a reasonable execution order for a full run.
 FULL_PIPELINE = [
     VideoDownloadStep,
@@ -43,7 +68,6 @@ FULL_PIPELINE = [
     CaptionGenerationStep, # Removed TranscriptionStep
     ViralAnalysisStep,
     ViralTimestampsStep,
-    BurnClipsStep,
     ClipVideoStep,
     BurnClipsStep,
 ]
@@ -52,30 +76,64 @@ FULL_PIPELINE = [
 class Orchestrator:
     def __init__(self, args):
         self.args = args
-        self.manifest_path = os.path.join(args.output, DEFAULT_MANIFEST_FILE)
-        self.manifest_df = load_manifest(self.manifest_path)
-        self.completed_steps = set()
+        # `manage` commands have no --output; they operate relative to the current directory.
+        self.output_dir = getattr(args, "output", ".")
+        self.manifest_path = os.path.join(
+            self.output_dir, getattr(args, "manifest_file", DEFAULT_MANIFEST_FILE)
+        )
+        self.manifest = Manifest(self.manifest_path)
+        # Steps already run in this session, keyed by video ID.
+        self.completed_steps = {}
+        self._claim_lock = threading.Lock()
 
-    def _execute_step(self, step_class, entry_dict):
+    def _defers_video(self, target_steps):
         """
-        Executes a single step, ensuring its dependencies are met first.
-        Uses a set `self.completed_steps` to avoid re-running steps in the same session.
+        --audio-first / --download-sections defer the video download only when the video
+        is fetched for clips; a plain --download-video stays independent of the analysis.
         """
-        if step_class in self.completed_steps:
-            return entry_dict
+        deferred = getattr(self.args, "audio_first", False) or getattr(self.args, "download_sections", False)
+        return bool(deferred) and any(step in target_steps for step in (BurnClipsStep, ClipVideoStep))
 
-        # --- 1. Resolve Dependencies First ---
-        dependencies = STEP_DEPENDENCIES.get(step_class, [])
-        for dep_class in dependencies:
-            entry_dict = self._execute_step(dep_class, entry_dict)
+    def _clip_steps(self, steps):
+        return [step for step in (BurnClipsStep, ClipVideoStep) if step in steps]
 
-        # --- 2. Execute the Current Step ---
-        step = step_class(entry_dict, self.args)
-        entry_dict = step.run()
+    def _streams_clips(self, steps):
+        """--stream-clips applies with clips to render, local timestamps and no deferred video."""
+        streaming = getattr(self.args, "stream_clips", False) and not getattr(self.args, "llm_timestamps", False)
+        return bool(streaming and self._clip_steps(steps)) and not self._defers_video(steps)
 
-        # --- 3. Mark as Complete ---
-        self.completed_steps.add(step_class)
-        return entry_dict
+    def _plan_run(self, steps):
+        """Records the choices for this run's (expanded) steps that the steps read from args."""
+        self.args.deferred_video = self._defers_video(steps)
+        self.args.streamed_clip_steps = self._clip_steps(steps) if self._streams_clips(steps) else []
+
+    def _step_dependencies(self, target_steps):
+        """
+        STEP_DEPENDENCIES, adjusted for a deferred video download or with the streaming
+        step in front of the analysis. Streaming renders from the video during the
+        analysis, so deferring the video takes precedence.
+        """
+        if self._defers_video(target_steps):
+            return {**STEP_DEPENDENCIES, **DEFERRED_VIDEO_DEPENDENCIES}
+        if self._streams_clips(target_steps):
+            return {**STEP_DEPENDENCIES, **STREAMING_DEPENDENCIES}
+        return STEP_DEPENDENCIES
+
+    def _expand_steps(self, target_steps):
+        """Returns the target steps plus all their dependencies, in topological order."""
+        dependencies = self._step_dependencies(target_steps)
+        ordered = []
+
+        def visit(step_class):
+            if step_class in ordered:
+                return
+            for dep_class in dependencies.get(step_class, []):
+                visit(dep_class)
+            ordered.append(step_class)
+
+        for step_class in target_steps:
+            visit(step_class)
+        return ordered
 
     def _get_target_steps(self):
         """
@@ -99,116 +157,291 @@ class Orchestrator:
 
         # If no specific flags are given, run the entire pipeline.
         if not targets:
-            return FULL_PIPELINE
+            targets = list(FULL_PIPELINE)
+        # Uncaptioned clips are a separate encode, produced only when asked for.
+        keep_uncaptioned = getattr(self.args, 'keep_uncaptioned_clips', False)
+        if keep_uncaptioned and ClipVideoStep not in targets:
+            targets.append(ClipVideoStep)
+        elif not keep_uncaptioned and not getattr(self.args, 'clip_video', False) and BurnClipsStep in targets:
+            targets = [step for step in targets if step is not ClipVideoStep]
         return targets
 
-    def process_url(self, url):
+    def _resolve_video(self, url):
         """
-        Processes a YouTube URL by executing the requested steps and their dependencies.
+        Maps a URL to (video ID, metadata or None), locally when possible. Only URLs the
+        offline parser does not recognize cost a metadata lookup, whose record is
+        returned so the caller does not extract it again.
         """
-        _, canonical_url = get_yt_object_and_canonical_url(url)
-        if not canonical_url:
-            return
+        video_id = extract_video_id(url)
+        if video_id:
+            return video_id, None
+        video_info = get_video_info(url, *self._metadata_cache_args())
+        return (video_info.get("id"), video_info) if video_info else (None, None)
+
+    def _resolve_video_id(self, url):
+        return self._resolve_video(url)[0]
+
+    def _prepare_entry(self, url):
+        """
+        Returns the video ID and its manifest entry as a dict, creating the entry if
+        needed. Videos already in the manifest are resolved without any network access.
+        Returns (None, None) if the video is unavailable.
+        """
+        video_id, video_info = self._resolve_video(url)
+        if not video_id:
+            return None, None
+
+        entry = self.manifest.get(video_id)
+        if entry is not None:
+            if self.args.filename:
+                entry["base_filename"] = get_sanitized_base_name("", self.args.filename)
+            return video_id, entry
 
-        video_info = get_video_info(canonical_url)
+        video_info = video_info or get_video_info(url, *self._metadata_cache_args(), video_id=video_id)
         if not video_info:
-            return
+            return None, None
 
-        # --- 1. Get or Create Manifest Entry ---
-        entry = get_manifest_entry(self.manifest_df, canonical_url)
         base_name = get_sanitized_base_name(
             video_info.get("title", "default_title"), self.args.filename
         )
+        canonical_url = video_info.get("webpage_url") or canonical_watch_url(video_id)
 
-        if entry is None:
-            print(f"{Colors.INFO}[INFO]{Colors.RESET} Creating new manifest entry for {canonical_url}")
-            entry_data = {"youtube_url": canonical_url, "base_filename": base_name}
-            self.manifest_df = update_manifest_entry(
-                self.manifest_df, canonical_url, entry_data
-            )
-            entry = get_manifest_entry(self.manifest_df, canonical_url)
-        else:
-            entry["base_filename"] = base_name
+        print(f"{Colors.INFO}[INFO]{Colors.RESET} Creating new manifest entry for {canonical_url}")
+        self.manifest.upsert(video_id, {"youtube_url": canonical_url, "base_filename": base_name})
+        return video_id, self.manifest.get(video_id)
+
+    def _metadata_cache_args(self):
+        """Returns (cache_dir, ttl_seconds) for get_video_info; no cache for manage commands."""
+        return (
+            getattr(self.args, "effective_cache_dir", None),
+            getattr(self.args, "metadata_ttl_seconds", None),
+        )
 
-        entry_dict = entry.to_dict()
+    def _save_entry(self, video_id, entry_dict):
+        self.manifest.upsert(video_id, entry_dict)
 
-        # --- 2. Determine and Execute Target Steps ---
+    def process_url(self, url):
+        """
+        Processes a YouTube URL by executing the requested steps and their dependencies.
+        Each step starts as soon as its own dependencies are done, so independent
+        branches of the DAG (e.g. the video download and the audio -> captions ->
+        analysis chain) run concurrently. Returns False if any step failed or was skipped.
+        """
         target_steps = self._get_target_steps()
         if not target_steps:
             print(f"{Colors.INFO}[INFO]{Colors.RESET} No processing steps were selected. Exiting.")
-            return
+            return True
 
         print(f"{Colors.INFO}[INFO]{Colors.RESET} Target steps: {[s.__name__ for s in target_steps]}")
 
-        for step_class in target_steps:
-            entry_dict = self._execute_step(step_class, entry_dict)
+        steps = self._expand_steps(target_steps)
+        self._plan_run(steps)
+        job = self._new_job(url)
+        scheduler = DagScheduler(self._pool_sizes())
+        self._schedule_job(scheduler, job, steps, set())
+        unfinished = self._unfinished_steps(scheduler.run(), job, steps)
+        if unfinished:
+            print(
+                f"\n{Colors.ERROR}[ERROR]{Colors.RESET} Orchestration failed for {url}; "
+                f"not completed: {', '.join(unfinished)}."
+            )
+            return False
+        print(f"\n{Colors.SUCCESS}[SUCCESS]{Colors.RESET} Orchestration complete for {job['entry'].get('youtube_url')}.")
+        return True
+
+    # --- DAG Execution ---
+
+    def _resolve_job(self, job, claimed_ids):
+        video_id, entry_dict = self._prepare_entry(job["url"])
+        if not video_id:
+            raise RuntimeError(f"Could not resolve video for {job['url']}")
+        with self._claim_lock:
+            if video_id in claimed_ids:
+                raise RuntimeError(f"Duplicate of an earlier URL in the batch: {video_id}")
+            claimed_ids.add(video_id)
+        job["video_id"] = video_id
+        job["entry"] = entry_dict
+
+    def _run_job_step(self, job, step_class):
+        try:
+            completed = self.completed_steps.setdefault(job["video_id"], set())
+            if step_class in completed:
+                return
+            step = step_class(job["entry"], self.args)
+            step.persist = partial(self._save_entry, job["video_id"])
+            if step_class in (StreamingClipsStep, StreamedClipRenderStep):
+                step.channel = job["segment_channel"]
+            job["entry"] = step.run()
+            completed.add(step_class)
+            # Persist after every step so an interrupted run resumes from here.
+            self._save_entry(job["video_id"], job["entry"])
+        finally:
+            # The render step reads until the stream ends, whether the analysis ran or not.
+            if step_class is StreamingClipsStep:
+                job["segment_channel"].close()
+
+    def _save_job(self, job):
+        if job["entry"] is None:
+            return
+        self._save_entry(job["video_id"], job["entry"])
+
+    @staticmethod
+    def _unfinished_steps(results, job, steps):
+        """Names of the job's nodes (resolve and steps) that failed or were skipped."""
+        names = ["resolve"] + [s.__name__ for s in steps]
+        return [name for name in names if results[f"{job['url']} :: {name}"] != DagScheduler.DONE]
+
+    def _step_resource(self, job, step_class):
+        return step_class.resource_for(job["entry"], self.args)
+
+    @staticmethod
+    def _new_job(url):
+        return {"url": url, "video_id": None, "entry": None, "segment_channel": SegmentChannel()}
 
-        # --- 3. Save Final Manifest ---
-        self.manifest_df = update_manifest_entry(
-            self.manifest_df, canonical_url, entry_dict
+    def _schedule_job(self, scheduler, job, steps, claimed_ids):
+        """Adds the resolve, step and save nodes of one video to the scheduler."""
+        url = job["url"]
+        resolve_key = scheduler.add(
+            f"{url} :: resolve", partial(self._resolve_job, job, claimed_ids), resource="network"
         )
-        save_manifest(self.manifest_df, self.manifest_path)
-        print(f"\n{Colors.SUCCESS}[SUCCESS]{Colors.RESET} Orchestration complete for {canonical_url}.")
+        dependencies = self._step_dependencies(steps)
+        step_keys = {}
+        for step_class in steps:
+            deps = [step_keys[d] for d in dependencies.get(step_class, [])]
+            step_keys[step_class] = scheduler.add(
+                f"{url} :: {step_class.__name__}",
+                partial(self._run_job_step, job, step_class),
+                deps or [resolve_key],
+                resource=partial(self._step_resource, job, step_class),
+            )
+        scheduler.add(
+            f"{url} :: save",
+            partial(self._save_job, job),
+            [resolve_key] + list(step_keys.values()),
+            run_on_failure=True,
+        )
+
+    def _pool_sizes(self):
+        return {
+            "network": getattr(self.args, "network_jobs", None),
+            "transcription": getattr(self.args, "transcription_jobs", None),
+            "llm": getattr(self.args, "llm_jobs", None),
+            "ffmpeg": getattr(self.args, "ffmpeg_jobs", None),
+        }
+
+    def process_urls(self, urls):
+        """
+        Processes many URLs at once. Every (video, step) pair becomes a node in a single
+        DAG, and nodes run on the pool of the resource they use, so downloads, Whisper,
+        Gemini calls and ffmpeg encodes of different videos overlap. Returns False if
+        any video was not fully processed.
+        """
+        target_steps = self._get_target_steps()
+        if not target_steps:
+            print(f"{Colors.INFO}[INFO]{Colors.RESET} No processing steps were selected. Exiting.")
+            return True
+        steps = self._expand_steps(target_steps)
+        self._plan_run(steps)
+        urls = list(dict.fromkeys(urls))  # Drop exact duplicates, keep order.
+
+        print(f"{Colors.INFO}[INFO]{Colors.RESET} Batch of {len(urls)} URL(s), steps: {[s.__name__ for s in steps]}")
+
+        scheduler = DagScheduler(self._pool_sizes())
+        claimed_ids = set()
+        jobs = []
+        for url in urls:
+            job = self._new_job(url)
+            jobs.append(job)
+            self._schedule_job(scheduler, job, steps, claimed_ids)
 
-    def list_manifest(self):
-        if self.manifest_df.empty:
+        results = scheduler.run()
+        unfinished = {job["url"]: self._unfinished_steps(results, job, steps) for job in jobs}
+        failed = [url for url, names in unfinished.items() if names]
+        status = f"{Colors.ERROR}[ERROR]{Colors.RESET}" if failed else f"{Colors.SUCCESS}[SUCCESS]{Colors.RESET}"
+        print(f"\n{status} Batch complete: {len(jobs) - len(failed)}/{len(jobs)} video(s) fully processed.")
+        for url in failed:
+            print(f"{Colors.WARNING}[WARNING]{Colors.RESET} Incomplete: {url} (not completed: {', '.join(unfinished[url])})")
+        return not failed
+
+    def list_manifest(self, limit=20, max_colwidth=50):
+        total = len(self.manifest)
+        if total == 0:
             print(f"{Colors.INFO}[INFO]{Colors.RESET} Manifest is empty.")
             return
         print("\n--- Manifest Contents ---")
-        with pd.option_context(
-            "display.max_colwidth", 50, "display.width", 1000, "display.max_rows", 25
-        ):
-            display_cols = [col for col in self.manifest_df.columns]
-            print(self.manifest_df[display_cols].head(20).to_string())
-        print(f"--- Total entries: {len(self.manifest_df)} ---")
+        rows = [
+            ["" if entry.get(col) is None else str(entry.get(col))[:max_colwidth] for col in MANIFEST_COLUMNS]
+            for entry in self.manifest.entries(limit=limit)
+        ]
+        widths = [max(len(col), *(len(row[i]) for row in rows)) for i, col in enumerate(MANIFEST_COLUMNS)]
+        print("  ".join(col.ljust(width) for col, width in zip(MANIFEST_COLUMNS, widths)))
+        for row in rows:
+            print("  ".join(value.ljust(width) for value, width in zip(row, widths)))
+        print(f"--- Total entries: {total} ---")
 
     def remove_url(self, url_to_remove):
-        _, canonical_url = get_yt_object_and_canonical_url(url_to_remove)
-        if not canonical_url:
-            canonical_url = url_to_remove
+        video_id = self._resolve_video_id(url_to_remove) or url_to_remove
 
-        entry = get_manifest_entry(self.manifest_df, canonical_url)
+        entry = self.manifest.get(video_id)
         if entry is None:
-            print(f"{Colors.INFO}[INFO]{Colors.RESET} URL not found in manifest: {canonical_url}")
+            print(f"{Colors.INFO}[INFO]{Colors.RESET} URL not found in manifest: {url_to_remove}")
             return
 
+        canonical_url = entry.get("youtube_url")
         print(f"{Colors.INFO}[INFO]{Colors.RESET} Removing URL '{canonical_url}' and associated files.")
         base_name = entry.get('base_filename')
         potential_paths = [
             entry.get("video_path"),
+            entry.get("wav_path"),
             entry.get("mp3_path"),
             entry.get("transcript_path"),
+            entry.get("words_path"),
             entry.get("analysis_path"),
             entry.get("caption_srt_path"),
-            os.path.join(self.args.output, "captioned_videos", f"{base_name}_captioned.mp4"),
-            os.path.join(self.args.output, "viral_clip_timestamps", f"{base_name}_timestamps.json"),
+            entry.get("keyframe_index_path"),
+            os.path.join(self.output_dir, "captioned_videos", f"{base_name}_captioned.mp4"),
+            os.path.join(self.output_dir, "viral_clip_timestamps", f"{base_name}_timestamps.json"),
         ]
+        potential_paths += [section["path"] for section in load_sections(entry)]
+        potential_paths += partial_download_files(entry)
         # Also remove generated clips
-        clips_dir = os.path.join(self.args.output, "viral_clips")
+        clips_dir = os.path.join(self.output_dir, "viral_clips")
         if os.path.exists(clips_dir):
             for f in os.listdir(clips_dir):
                 if f.startswith(base_name):
                     potential_paths.append(os.path.join(clips_dir, f))
 
         for path in potential_paths:
-            if pd.notna(path) and os.path.exists(path):
+            if path and os.path.exists(path):
                 try:
                     os.remove(path)
                     print(f"{Colors.SUCCESS}[SUCCESS]{Colors.RESET} Deleted file: {path}")
                 except OSError as e:
                     print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Could not delete file {path}: {e}")
 
-        self.manifest_df = self.manifest_df[
-            self.manifest_df["youtube_url"] != canonical_url
-        ].reset_index(drop=True)
-        save_manifest(self.manifest_df, self.manifest_path)
+        self.manifest.remove(video_id)
         print(f"{Colors.SUCCESS}[SUCCESS]{Colors.RESET} Removed entry for {canonical_url} from manifest.")
 
 
 # --- CLI Entry Points ---
 def process_youtube_url(args):
+    from gemini_client import configure_gemini_client
+    from downloads import configure_downloads
+
+    configure_gemini_client(
+        rpm=args.llm_rpm,
+        tpm=args.llm_tpm,
+        concurrency=args.llm_concurrency,
+        max_retries=args.llm_retries,
+    )
+    configure_downloads(
+        concurrent_fragments=args.concurrent_fragments,
+        retries=args.download_retries,
+    )
     orchestrator = Orchestrator(args)
-    orchestrator.process_url(args.url)
+    if args.urls is not None:
+        return orchestrator.process_urls(args.urls)
+    return orchestrator.process_url(args.url)
 
 def handle_list_manifest(args):
     orchestrator = Orchestrator(args)
@@ -8,6 +8,8 @@ from .viral_analysis import ViralAnalysisStep
 from .viral_timestamps import ViralTimestampsStep
 from .burn_clips import BurnClipsStep
 from .clip_video import ClipVideoStep
+from .streaming_clips import StreamingClipsStep
+from .streamed_clip_render import StreamedClipRenderStep
 
 __all__ = [
     "ProcessingStep",
@@ -18,4 +20,6 @@ __all__ = [
     "ViralTimestampsStep",
     "BurnVideoStep",
     "ClipVideoStep",
+    "StreamingClipsStep",
+    "StreamedClipRenderStep",
 ]
@@ -1,56 +1,116 @@
 import os
-import pandas as pd
 
 from .base import ProcessingStep, Colors
-from youtube_utils import get_video_info, download_audio_stream
-from audio_processing import convert_to_mp3
+from youtube_utils import get_video_info, download_audio_stream, DEFAULT_AUDIO_QUALITY, SMALLEST_AUDIO_FORMAT
+from audio_processing import convert_to_mp3, convert_to_whisper_wav, remove_temp_audio
+from downloads import DownloadProgress
 
 
 class AudioExtractionStep(ProcessingStep):
+    resource = "network"
+    output_fields = ("wav_path", "mp3_path")
+    status_fields = ("status_audio_extracted", "status_mp3_converted")
+
+    @classmethod
+    def resource_for(cls, entry, args):
+        """Mostly a yt-dlp download of the audio stream, unless the video is already on disk."""
+        video_path = (entry or {}).get("video_path")
+        return "ffmpeg" if video_path and os.path.exists(video_path) else "network"
+
+    @property
+    def wants_mp3(self):
+        """An MP3 is only produced when explicitly requested; transcription uses the WAV."""
+        return getattr(self.args, "mp3", False) or getattr(self.args, "audio", False)
+
+    @property
+    def audio_format(self):
+        """
+        With --audio-first the audio only feeds Whisper, so the smallest audio-only
+        stream is fetched unless a format or an MP3 was asked for.
+        """
+        if (
+            getattr(self.args, "audio_first", False)
+            and not self.wants_mp3
+            and self.args.audio_quality == DEFAULT_AUDIO_QUALITY
+        ):
+            return SMALLEST_AUDIO_FORMAT
+        return self.args.audio_quality
+
+    def cache_params(self):
+        return {"url": self.url, "audio_quality": self.audio_format, "mp3": self.wants_mp3}
+
     @property
     def is_complete(self):
-        return (
-            self.entry.get("status_mp3_converted") is True
-            and pd.notna(self.entry.get("mp3_path"))
-            and os.path.exists(self.entry.get("mp3_path"))
+        """
+        The WAV only feeds transcription, so the step is also complete once captions
+        exist, or when an MP3 from an older run (e.g. a migrated CSV manifest) is on
+        disk: CaptionGenerationStep decodes that locally instead of downloading again.
+        """
+        wav_ready = (
+            self.entry.get("status_audio_extracted") is True
+            and self.entry.get("wav_path")
+            and os.path.exists(self.entry.get("wav_path"))
         )
+        mp3_ready = bool(self.entry.get("mp3_path") and os.path.exists(self.entry.get("mp3_path")))
+        if self.wants_mp3:
+            return bool(mp3_ready and self.entry.get("status_mp3_converted") is True)
+        captions_ready = (
+            self.entry.get("status_captions_generated") is True
+            and self.entry.get("caption_srt_path")
+            and os.path.exists(self.entry.get("caption_srt_path"))
+        )
+        return bool(wav_ready or mp3_ready or captions_ready)
 
     def process(self):
         source_for_ffmpeg = None
         video_path = self.entry.get("video_path")
 
-        if pd.notna(video_path) and os.path.exists(video_path):
-            print(f"{Colors.INFO}[INFO]{Colors.RESET} Using downloaded video as source for MP3: {video_path}")
+        if video_path and os.path.exists(video_path):
+            print(f"{Colors.INFO}[INFO]{Colors.RESET} Using downloaded video as audio source: {video_path}")
             source_for_ffmpeg = video_path
         else:
             print(f"{Colors.INFO}[INFO]{Colors.RESET} Video not found, downloading dedicated audio stream...")
-            video_info = get_video_info(self.url)
+            video_info = get_video_info(
+                self.url, self.args.effective_cache_dir, self.args.metadata_ttl_seconds,
+                video_id=self.entry.get("video_id"),
+            )
             if not video_info:
-                self.entry["status_mp3_converted"] = False
+                self.entry["status_audio_extracted"] = False
                 return self.entry
+            progress = DownloadProgress(
+                self.entry, "audio", self.audio_format, self.args.effective_audio_dir, self.save_progress
+            )
+            progress.resume()
             source_for_ffmpeg = download_audio_stream(
                 video_info,
                 self.base_name,
                 self.args.effective_audio_dir,
-                self.args.audio_quality,
+                self.audio_format,
+                progress,
             )
+            progress.finish(bool(source_for_ffmpeg))
 
         if not source_for_ffmpeg:
             print(f"{Colors.ERROR}[ERROR]{Colors.RESET} No valid source for audio extraction.")
-            self.entry["mp3_path"] = pd.NA
-            self.entry["status_mp3_converted"] = False
+            self.entry["wav_path"] = None
+            self.entry["status_audio_extracted"] = False
             return self.entry
 
         os.makedirs(self.args.effective_audio_dir, exist_ok=True)
-        final_mp3_path = os.path.join(
-            self.args.effective_audio_dir, self.base_name + ".mp3"
+        final_wav_path = os.path.join(
+            self.args.effective_audio_dir, self.base_name + ".wav"
         )
-        converted_path = convert_to_mp3(source_for_ffmpeg, final_mp3_path)
+        converted_path = convert_to_whisper_wav(source_for_ffmpeg, final_wav_path)
+        self.entry["wav_path"] = converted_path
+        self.entry["status_audio_extracted"] = bool(converted_path)
 
-        if converted_path:
-            self.entry["mp3_path"] = converted_path
-            self.entry["status_mp3_converted"] = True
-        else:
-            self.entry["mp3_path"] = pd.NA
-            self.entry["status_mp3_converted"] = False
-        return self.entry
\ No newline at end of file
+        if self.wants_mp3:
+            final_mp3_path = os.path.join(
+                self.args.effective_audio_dir, self.base_name + ".mp3"
+            )
+            mp3_path = convert_to_mp3(source_for_ffmpeg, final_mp3_path)
+            self.entry["mp3_path"] = mp3_path
+            self.entry["status_mp3_converted"] = bool(mp3_path)
+
+        remove_temp_audio(source_for_ffmpeg)
+        return self.entry
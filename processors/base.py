@@ -1,5 +1,6 @@
 import os
-import pandas as pd
+import json
+import threading
 from abc import ABC, abstractmethod
 
 # ANSI escape codes for colors
@@ -14,12 +15,36 @@ class Colors:
 class ProcessingStep(ABC):
     """Abstract base class for a step in the video processing pipeline."""
 
+    # Which scheduler pool the step runs on: network, transcription, llm, ffmpeg or local.
+    resource = "local"
+    # Manifest fields holding paths this step produces (see cache_outputs) and its status flags.
+    output_fields = ()
+    status_fields = ()
+    # Other manifest fields the step sets, stored and restored along with its outputs.
+    entry_fields = ()
+
+    # Steps of one video may finish concurrently and all record into entry["cache_keys"].
+    _cache_keys_lock = threading.Lock()
+    @classmethod
+    def resource_for(cls, entry, args):
+        """The pool to run on for `entry`, decided once the step is ready to run."""
+        return cls.resource
+
+    # Set by the orchestrator to a callable persisting entry fields to the manifest.
+    persist = None
+
     def __init__(self, entry, args):
         self.entry = entry
         self.args = args
         self.url = entry.get("youtube_url")
         self.base_name = entry.get("base_filename")
 
+    def save_progress(self, fields):
+        """Records in-progress state (e.g. download_progress) before the step returns."""
+        self.entry.update(fields)
+        if self.persist:
+            self.persist(fields)
+
     @abstractmethod
     def process(self):
         """Executes the processing step. Returns the updated manifest entry."""
@@ -31,11 +56,90 @@ class ProcessingStep(ABC):
         """Checks if this step has already been completed successfully."""
         pass
 
+    # --- Content-addressed caching ---
+
+    def cache_params(self):
+        """Arguments that influence this step's outputs. Part of the cache key."""
+        return {}
+
+    def cache_inputs(self):
+        """Paths of the input artifacts this step reads. Their content is part of the cache key."""
+        return []
+
+    def cache_outputs(self):
+        """Paths of the files this step has produced for the current video."""
+        paths = [self.entry.get(field) for field in self.output_fields]
+        return [path for path in paths if path and os.path.exists(path)]
+
+    def cache_key(self):
+        from artifact_cache import compute_cache_key
+
+        return compute_cache_key(self.__class__.__name__, self.cache_params(), self.cache_inputs())
+
+    def _recorded_cache_key(self):
+        try:
+            return json.loads(self.entry.get("cache_keys") or "{}").get(self.__class__.__name__)
+        except ValueError:
+            return None
+
+    def _record_cache_key(self, key):
+        if key is None:
+            return
+        with self._cache_keys_lock:
+            try:
+                keys = json.loads(self.entry.get("cache_keys") or "{}")
+            except ValueError:
+                keys = {}
+            keys[self.__class__.__name__] = key
+            self.entry["cache_keys"] = json.dumps(keys, sort_keys=True)
+
+    def _artifact_store(self):
+        cache_dir = getattr(self.args, "effective_cache_dir", None)
+        if not cache_dir:
+            return None
+        from artifact_cache import ArtifactStore
+
+        return ArtifactStore(cache_dir)
+
     def run(self):
-        """Runs the step if it's not already complete or if forced."""
-        if not self.args.force and self.is_complete:
-            print(f"{Colors.CACHE}[CACHE]{Colors.RESET} Skipping {self.__class__.__name__} for '{self.base_name}'")
+        """
+        Runs the step unless its outputs are current. Outputs are current when the step
+        is complete and was produced with the same cache key (inputs + relevant args).
+        On a key change, outputs previously produced for the new key are restored from
+        the artifact store instead of being recomputed.
+        """
+        step_name = self.__class__.__name__
+        store = self._artifact_store()
+        key = self.cache_key() if store else None
+        recorded_key = self._recorded_cache_key()
+
+        # Entries from before cache keys existed are trusted as long as they are complete.
+        if not self.args.force and self.is_complete and recorded_key in (None, key):
+            self._record_cache_key(key)
+            print(f"{Colors.CACHE}[CACHE]{Colors.RESET} Skipping {step_name} for '{self.base_name}'")
             return self.entry
 
-        print(f"{Colors.INFO}[INFO]{Colors.RESET} Running {self.__class__.__name__} for '{self.base_name}'...")
-        return self.process()
\ No newline at end of file
+        if store and not self.args.force:
+            restored = store.restore(step_name, key, self.cache_outputs())
+            if restored is not None:
+                self.entry.update(restored)
+                self._record_cache_key(key)
+                print(f"{Colors.CACHE}[CACHE]{Colors.RESET} Restored {step_name} outputs for '{self.base_name}' from artifact cache")
+                return self.entry
+
+        print(f"{Colors.INFO}[INFO]{Colors.RESET} Running {step_name} for '{self.base_name}'...")
+        if store:
+            from artifact_cache import remove_files
+
+            remove_files(self.cache_outputs())
+        entry = self.process()
+
+        if store and self.is_complete:
+            # Only this step's own fields: sibling steps of the same video share the entry.
+            updates = {
+                field: entry.get(field)
+                for field in self.output_fields + self.status_fields + self.entry_fields
+            }
+            store.store(step_name, key, self.cache_outputs(), updates)
+            self._record_cache_key(key)
+        return entry
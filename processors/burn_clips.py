@@ -1,145 +1,148 @@
 import os
 import json
-import subprocess
-import re
+from contextlib import contextmanager
+
 from .base import ProcessingStep, Colors
+from video_processing import (
+    extract_clips,
+    clip_worker_budget,
+    clip_window,
+    REEL_VIDEO_FILTER,
+    HORIZONTAL_VIDEO_FILTER,
+)
+from subtitles import AssDocument
+from video_sections import clip_sources, has_clip_source, load_sections
+from transcript import Transcript
+
+# Caption style for clips, by ASS style field name.
+CLIP_CAPTION_STYLE = {
+    "Fontsize": 12,  # Small enough for the 9:16 frame
+    "Alignment": 2,  # Bottom-center
+    "MarginV": 69,  # Vertical margin from the bottom
+}
 
 class BurnClipsStep(ProcessingStep):
+    """
+    Renders captioned clips straight from the source video: trimming, the reel
+    scale/pad and the time-shifted ASS subtitles run in one filter graph, so each
+    clip is encoded once. Uncaptioned clips come from ClipVideoStep, only on request.
+    """
+    resource = "ffmpeg"
+
     def __init__(self, entry, args):
         super().__init__(entry, args)
-        self.clips_dir = os.path.join(self.args.output, "viral_clips")
+        self.video_path = self.entry.get("video_path")
         self.captioned_clips_dir = os.path.join(self.args.output, "captioned_clips")
         self.timestamp_file_path = os.path.join(
             self.args.output, "viral_clip_timestamps", f"{self.base_name}_timestamps.json"
         )
+        self.ass_path = os.path.join(self.args.effective_caption_dir, self.base_name + ".ass")
+        self.words_path = self.entry.get("words_path")
+
+    def cache_params(self):
+        return {"no_reel": getattr(self.args, "no_reel", False)}
+
+    def cache_inputs(self):
+        captions = self.words_path if self._has_transcript() else self.ass_path
+        sections = [section["path"] for section in load_sections(self.entry)]
+        return [self.video_path, self.timestamp_file_path, captions] + sections
+
+    def cache_outputs(self):
+        if not os.path.exists(self.captioned_clips_dir):
+            return []
+        prefix = f"{self.base_name}_clip_"
+        return sorted(
+            os.path.join(self.captioned_clips_dir, f)
+            for f in os.listdir(self.captioned_clips_dir)
+            if f.startswith(prefix) and f.endswith(".mp4")
+        )
 
     @property
     def is_complete(self):
         if not os.path.exists(self.captioned_clips_dir):
             return False
-        
+
         try:
             with open(self.timestamp_file_path, "r") as f:
                 timestamps_data = json.load(f)
             num_clips = len(timestamps_data.get("segments", []))
-            
+
             captioned_clips = [f for f in os.listdir(self.captioned_clips_dir) if f.startswith(self.base_name) and f.endswith(".mp4")]
             return len(captioned_clips) >= num_clips
         except FileNotFoundError:
             return False
 
-    @staticmethod
-    def _time_to_seconds(time_str):
-        if isinstance(time_str, (int, float)):
-            return float(time_str)
-        
-        time_str = str(time_str).replace(",", ".")
-        
-        if ":" not in time_str:
-            return float(time_str)
-        
-        parts = time_str.split(":")
-        h, m, s = map(float, parts)
-        return h * 3600 + m * 60 + s
-
-    @staticmethod
-    def _seconds_to_ass_time(seconds):
-        h = int(seconds / 3600)
-        m = int((seconds % 3600) / 60)
-        s = seconds % 60
-        return f"{h}:{m:02d}:{s:05.2f}"
+    def _has_transcript(self):
+        return bool(self.words_path) and os.path.exists(self.words_path)
 
-    def process(self):
-        ass_path = os.path.join(
-            self.args.effective_caption_dir, self.base_name + ".ass"
-        )
+    @contextmanager
+    def _subtitle_source(self):
+        """
+        Yields a `(start, end) -> ASS text` function for clip tracks. Tracks are derived
+        from the word-level transcript, which is closed on exit; entries from before it
+        existed slice the .ass file.
+        """
+        if not self._has_transcript():
+            yield AssDocument.from_file(self.ass_path).restyle(**CLIP_CAPTION_STYLE).slice
+            return
+        transcript = Transcript(self.words_path)
+        try:
+            yield lambda start, end: transcript.to_ass(start, end, style=CLIP_CAPTION_STYLE)
+        finally:
+            transcript.close()
+
+    def clip_for(self, number, segment):
+        """Clip dict for timestamps segment `number` (1-based), or None if it has no times."""
+        if not segment.get("start_time") or not segment.get("end_time"):
+            print(f"{Colors.WARNING}[WARNING]{Colors.RESET} Skipping segment {number} due to missing timestamps.")
+            return None
+        start_time_sec, end_time_sec = clip_window(segment["start_time"], segment["end_time"])
+        return {
+            "start": start_time_sec,
+            "end": end_time_sec,
+            "output": os.path.join(self.captioned_clips_dir, f"{self.base_name}_clip_{number}.mp4"),
+        }
 
-        if not os.path.exists(ass_path):
-            print(f"{Colors.ERROR}[ERROR]{Colors.RESET} ASS caption file not found: {ass_path}")
+    def render_clips(self, clips, subtitles=None):
+        """Renders captioned `clips`; `subtitles` is an open source from _subtitle_source() to reuse."""
+        if subtitles is None:
+            with self._subtitle_source() as subtitles:
+                return self.render_clips(clips, subtitles)
+        os.makedirs(self.captioned_clips_dir, exist_ok=True)
+        base_filter = HORIZONTAL_VIDEO_FILTER if getattr(self.args, 'no_reel', False) else REEL_VIDEO_FILTER
+        captioned_clip_paths = []
+        # Clips are cut from the full video, or from downloaded sections with shifted times.
+        for source_path, offset, source_clips in clip_sources(self.entry, clips):
+            captioned_clip_paths += extract_clips(
+                source_path, source_clips, base_filter, *clip_worker_budget(self.args),
+                subtitles=lambda start, end, offset=offset: subtitles(start + offset, end + offset),
+            )
+        for captioned_clip_path in captioned_clip_paths:
+            print(f"{Colors.SUCCESS}[SUCCESS]{Colors.RESET} Created captioned clip: {captioned_clip_path}")
+        return captioned_clip_paths
+
+    def process(self):
+        if not self._has_transcript() and not os.path.exists(self.ass_path):
+            print(f"{Colors.ERROR}[ERROR]{Colors.RESET} ASS caption file not found: {self.ass_path}")
             return self.entry
 
         if not os.path.exists(self.timestamp_file_path):
             print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Timestamps JSON not found: {self.timestamp_file_path}")
             return self.entry
 
+        if not has_clip_source(self.entry):
+            print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Video not found at: {self.video_path}")
+            return self.entry
+
         with open(self.timestamp_file_path, "r") as f:
             timestamps_data = json.load(f)
-        
-        with open(ass_path, 'r', encoding='utf-8') as f:
-            ass_content_lines = f.readlines()
-
-        os.makedirs(self.captioned_clips_dir, exist_ok=True)
 
+        clips = []
         for i, segment in enumerate(timestamps_data.get("segments", [])):
-            start_time_sec = self._time_to_seconds(segment["start_time"]) - 1
-            if start_time_sec < 0:
-                start_time_sec = 0
-            end_time_sec = self._time_to_seconds(segment["end_time"]) + 1
-            
-            clip_base_name = f"{self.base_name}_clip_{i+1}"
-            clip_path = os.path.join(self.clips_dir, f"{clip_base_name}.mp4")
-            
-            if not os.path.exists(clip_path):
-                print(f"{Colors.WARNING}[WARNING]{Colors.RESET} Clip not found, skipping: {clip_path}")
-                continue
-
-            temp_ass_path = os.path.join(self.captioned_clips_dir, f"temp_{clip_base_name}.ass")
-            
-            adjusted_ass_lines = []
-            for line in ass_content_lines:
-                if line.startswith("Style:"):
-                    parts = line.strip().split(",")
-                    if len(parts) > 21: # Ensure enough parts for Fontsize, Alignment, and MarginV
-                        parts[2] = "12" # Fontsize
-                        parts[18] = "2" # Alignment (2 for bottom-center)
-                        parts[21] = "69" # MarginV (vertical margin from bottom)
-                        adjusted_ass_lines.append(",".join(parts) + "\n")
-                    else:
-                        adjusted_ass_lines.append(line) # Fallback if format is unexpected
-                elif line.startswith("Dialogue:"):
-                    parts = line.strip().split(",", 9)
-                    try:
-                        start = self._time_to_seconds(parts[1])
-                        end = self._time_to_seconds(parts[2])
-
-                        # If the subtitle is within the clip's time range
-                        if start >= start_time_sec and end <= end_time_sec:
-                            new_start = start - start_time_sec
-                            new_end = end - start_time_sec
-                            
-                            parts[1] = self._seconds_to_ass_time(new_start)
-                            parts[2] = self._seconds_to_ass_time(new_end)
-                            adjusted_ass_lines.append(",".join(parts) + "\n")
-
-                    except (ValueError, IndexError):
-                        adjusted_ass_lines.append(line) # Keep malformed lines as is
-                else:
-                    adjusted_ass_lines.append(line)
-
-            with open(temp_ass_path, 'w', encoding='utf-8') as f:
-                f.writelines(adjusted_ass_lines)
-
-            captioned_clip_path = os.path.join(self.captioned_clips_dir, f"{clip_base_name}.mp4")
-            
-            command = [
-                "ffmpeg", "-y",
-                "-i", clip_path,
-                "-vf", f"ass={temp_ass_path}",
-                "-c:v", "libx264", "-preset", "veryfast", "-crf", "23",
-                "-c:a", "aac", "-b:a", "128k",
-                captioned_clip_path
-            ]
-            
-            try:
-                print(f"{Colors.INFO}[INFO]{Colors.RESET} Burning subtitles for {clip_base_name}...")
-                subprocess.run(command, check=True, capture_output=True, text=True)
-                print(f"{Colors.SUCCESS}[SUCCESS]{Colors.RESET} Created captioned clip: {captioned_clip_path}")
-            except subprocess.CalledProcessError as e:
-                print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Failed to burn subtitles for {clip_base_name}.")
-                print(f"FFmpeg stdout: {e.stdout}")
-                print(f"FFmpeg stderr: {e.stderr}")
-            finally:
-                if os.path.exists(temp_ass_path):
-                    os.remove(temp_ass_path)
-                    
+            clip = self.clip_for(i + 1, segment)
+            if clip:
+                clips.append(clip)
+
+        print(f"{Colors.INFO}[INFO]{Colors.RESET} Rendering {len(clips)} captioned clip(s) from {self.video_path}...")
+        self.render_clips(clips)
         return self.entry
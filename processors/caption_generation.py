@@ -1,25 +1,67 @@
 import os
-import pandas as pd
 
 from .base import ProcessingStep, Colors
-from audio_processing import generate_caption_files
+from audio_processing import generate_caption_files, convert_to_whisper_wav, remove_temp_audio
 
 
 class CaptionGenerationStep(ProcessingStep):
+    resource = "transcription"
+    output_fields = ("words_path", "caption_srt_path", "transcript_path")
+    status_fields = ("status_captions_generated", "status_transcript_generated")
+
+    def _audio_source(self):
+        """Prefers the Whisper-native WAV; falls back to an MP3 from older runs."""
+        return next(
+            (
+                path
+                for path in (self.entry.get("wav_path"), self.entry.get("mp3_path"))
+                if path and os.path.exists(path)
+            ),
+            None,
+        )
+
+    def cache_params(self):
+        parallel = self.args.transcribe_workers > 1
+        return {
+            "whisper_model": self.args.whisper_model,
+            "chunk_seconds": self.args.transcribe_chunk_seconds if parallel else None,
+        }
+
+    def cache_inputs(self):
+        return [self._audio_source()]
+
+    def cache_outputs(self):
+        ass_path = os.path.join(self.args.effective_caption_dir, f"{self.base_name}.ass")
+        outputs = super().cache_outputs()
+        return outputs + [ass_path] if os.path.exists(ass_path) else outputs
+
     @property
     def is_complete(self):
         return (
             self.entry.get("status_captions_generated") is True
-            and pd.notna(self.entry.get("caption_srt_path"))
+            and self.entry.get("caption_srt_path")
             and os.path.exists(self.entry.get("caption_srt_path"))
-            and pd.notna(self.entry.get("transcript_path"))
+            and self.entry.get("transcript_path")
             and os.path.exists(self.entry.get("transcript_path"))
         )
 
+    def _whisper_wav(self, audio_path):
+        """
+        Decodes an MP3 from an older run to a temporary 16 kHz WAV, so transcription
+        takes the PCM fast path without downloading the audio again. The WAV is removed
+        after transcription; the MP3 stays the cache input.
+        """
+        if audio_path == self.entry.get("wav_path"):
+            return audio_path
+        print(f"{Colors.INFO}[INFO]{Colors.RESET} Decoding {audio_path} for transcription...")
+        os.makedirs(self.args.effective_audio_dir, exist_ok=True)
+        temp_wav_path = os.path.join(self.args.effective_audio_dir, f"{self.base_name}_audiotemp.wav")
+        return convert_to_whisper_wav(audio_path, temp_wav_path) or audio_path
+
     def process(self):
-        mp3_path = self.entry.get("mp3_path")
-        if pd.isna(mp3_path) or not os.path.exists(mp3_path):
-            print(f"{Colors.ERROR}[ERROR]{Colors.RESET} MP3 file not available for caption generation.")
+        audio_path = self._audio_source()
+        if not audio_path:
+            print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Audio file not available for caption generation.")
             self.entry["status_captions_generated"] = False
             self.entry["status_transcript_generated"] = False
             return self.entry
@@ -27,26 +69,35 @@ class CaptionGenerationStep(ProcessingStep):
         os.makedirs(self.args.effective_caption_dir, exist_ok=True)
         os.makedirs(self.args.effective_transcript_dir, exist_ok=True)
 
-        caption_paths = generate_caption_files(
-            mp3_path,
-            self.args.effective_caption_dir,
-            self.base_name,
-            self.args.whisper_model,
-            self.args.effective_transcript_dir, # Pass transcript dir
-        )
+        transcription_path = self._whisper_wav(audio_path)
+        try:
+            caption_paths = generate_caption_files(
+                transcription_path,
+                self.args.effective_caption_dir,
+                self.base_name,
+                self.args.whisper_model,
+                self.args.effective_transcript_dir, # Pass transcript dir
+                device=self.args.whisper_device,
+                cache_budget_mb=self.args.whisper_cache_mb,
+                workers=self.args.transcribe_workers,
+                chunk_seconds=self.args.transcribe_chunk_seconds,
+            )
+        finally:
+            remove_temp_audio(transcription_path)
 
+        self.entry["words_path"] = caption_paths.get("words") if caption_paths else None
         if caption_paths and "srt" in caption_paths:
             self.entry["caption_srt_path"] = caption_paths.get("srt")
             self.entry["status_captions_generated"] = True
         else:
-            self.entry["caption_srt_path"] = pd.NA
+            self.entry["caption_srt_path"] = None
             self.entry["status_captions_generated"] = False
 
         if caption_paths and "txt" in caption_paths:
             self.entry["transcript_path"] = caption_paths.get("txt")
             self.entry["status_transcript_generated"] = True
         else:
-            self.entry["transcript_path"] = pd.NA
+            self.entry["transcript_path"] = None
             self.entry["status_transcript_generated"] = False
 
         return self.entry
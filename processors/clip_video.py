@@ -1,17 +1,24 @@
 import os
 import json
-import subprocess
-import pandas as pd
 
 from .base import ProcessingStep, Colors
+from video_processing import (
+    extract_clips,
+    clip_worker_budget,
+    clip_window,
+    smart_render_clips,
+    can_smart_render,
+    REEL_VIDEO_FILTER,
+    HORIZONTAL_VIDEO_FILTER,
+)
+from keyframe_index import load_keyframe_index, keyframe_index_path_for
+from video_sections import clip_sources, has_clip_source, load_sections
 
 
 class ClipVideoStep(ProcessingStep):
-    @staticmethod
-    def _time_to_seconds(time_str):
-        time_str = time_str.split(",")[0] if "," in time_str else time_str
-        h, m, s = map(float, time_str.split(":"))
-        return h * 3600 + m * 60 + s
+    resource = "ffmpeg"
+    entry_fields = ("keyframe_index_path",)
+
     def __init__(self, entry, args):
         super().__init__(entry, args)
         self.clips_output_dir = os.path.join(self.args.output, "viral_clips")
@@ -20,6 +27,24 @@ class ClipVideoStep(ProcessingStep):
             self.args.output, "viral_clip_timestamps", f"{self.base_name}_timestamps.json"
         )
 
+    def cache_params(self):
+        no_reel = getattr(self.args, "no_reel", False)
+        return {"no_reel": no_reel, "render": "smart" if no_reel else "encode"}
+
+    def cache_inputs(self):
+        sections = [section["path"] for section in load_sections(self.entry)]
+        return [self.video_path, self.timestamp_file_path] + sections
+
+    def cache_outputs(self):
+        if not os.path.exists(self.clips_output_dir):
+            return []
+        prefix = f"{self.base_name}_clip_"
+        return sorted(
+            os.path.join(self.clips_output_dir, f)
+            for f in os.listdir(self.clips_output_dir)
+            if f.startswith(prefix) and f.endswith(".mp4")
+        )
+
     @property
     def is_complete(self):
         if not os.path.exists(self.clips_output_dir):
@@ -29,8 +54,63 @@ class ClipVideoStep(ProcessingStep):
                 return True
         return False
 
+    def _smart_render(self, clips):
+        """
+        Stream-copies the GOP-aligned interior of each clip and re-encodes only the edges.
+        Returns False if the source does not support it, so the caller re-encodes instead.
+        """
+        index_path = self.entry.get("keyframe_index_path") or keyframe_index_path_for(
+            self.args.effective_cache_dir, self.base_name
+        )
+        keyframe_index = load_keyframe_index(self.video_path, index_path)
+        if keyframe_index is None:
+            return False
+        self.entry["keyframe_index_path"] = index_path
+        if not can_smart_render(keyframe_index):
+            codec = (keyframe_index.get("stream") or {}).get("codec_name")
+            print(f"{Colors.INFO}[INFO]{Colors.RESET} Smart render not supported for {codec} sources.")
+            return False
+
+        print(f"{Colors.INFO}[INFO]{Colors.RESET} Smart-rendering {len(clips)} clip(s) at source resolution.")
+        for clip_output_path in smart_render_clips(self.video_path, clips, keyframe_index, *clip_worker_budget(self.args)):
+            print(f"{Colors.SUCCESS}[SUCCESS]{Colors.RESET} Saved clip to {clip_output_path}")
+        return True
+
+    def clip_for(self, number, segment):
+        """Clip dict for timestamps segment `number` (1-based), or None if it has no times."""
+        start_time = segment.get("start_time")
+        end_time = segment.get("end_time")
+        if not start_time or not end_time:
+            print(f"{Colors.WARNING}[WARNING]{Colors.RESET} Skipping segment {number} due to missing timestamps.")
+            return None
+
+        start_time_sec, end_time_sec = clip_window(start_time, end_time)
+        print(f"{Colors.INFO}[INFO]{Colors.RESET} Clipping segment {number}: {start_time_sec} -> {end_time_sec}")
+        clip_output_path = os.path.join(self.clips_output_dir, f"{self.base_name}_clip_{number}.mp4")
+        return {"start": start_time_sec, "end": end_time_sec, "output": clip_output_path}
+
+    def render_clips(self, clips):
+        os.makedirs(self.clips_output_dir, exist_ok=True)
+        full_video = bool(self.video_path) and os.path.exists(self.video_path)
+        if getattr(self.args, 'no_reel', False):
+            # Smart rendering needs the keyframe index of the full video; sections are re-encoded.
+            if full_video and self._smart_render(clips):
+                return
+            print(f"{Colors.INFO}[INFO]{Colors.RESET} Re-encoding to 16:9 horizontal aspect ratio.")
+            video_filter = HORIZONTAL_VIDEO_FILTER
+        else:
+            print(f"{Colors.INFO}[INFO]{Colors.RESET} Re-encoding to 9:16 vertical aspect ratio for Reels/Shorts.")
+            video_filter = REEL_VIDEO_FILTER
+
+        try:
+            for source_path, _, source_clips in clip_sources(self.entry, clips):
+                for clip_output_path in extract_clips(source_path, source_clips, video_filter, *clip_worker_budget(self.args)):
+                    print(f"{Colors.SUCCESS}[SUCCESS]{Colors.RESET} Saved clip to {clip_output_path}")
+        except Exception as e:
+            print(f"{Colors.ERROR}[ERROR]{Colors.RESET} An unexpected error occurred during clipping: {e}")
+
     def process(self):
-        if not os.path.exists(self.video_path):
+        if not has_clip_source(self.entry):
             print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Video not found at: {self.video_path}")
             return self.entry
         if not os.path.exists(self.timestamp_file_path):
@@ -40,71 +120,10 @@ class ClipVideoStep(ProcessingStep):
         with open(self.timestamp_file_path, "r") as f:
             timestamps_data = json.load(f)
 
-        os.makedirs(self.clips_output_dir, exist_ok=True)
-
+        clips = []
         for i, segment in enumerate(timestamps_data.get("segments", [])):
-            start_time = segment.get("start_time")
-            end_time = segment.get("end_time")
-            clip_output_path = os.path.join(
-                self.clips_output_dir, f"{self.base_name}_clip_{i+1}.mp4"
-            )
-
-            if not start_time or not end_time:
-                print(f"{Colors.WARNING}[WARNING]{Colors.RESET} Skipping segment {i+1} due to missing timestamps.")
-                continue
-
-            # Convert to seconds, round to nearest second, and convert back to string
-            start_time_sec = str(int(round(self._time_to_seconds(start_time))))
-            end_time_sec = str(int(round(self._time_to_seconds(end_time))))
-
-            # add -1 to start time and +1 to end time
-            start_time_sec = str(int(start_time_sec) - 1)
-            end_time_sec = str(int(end_time_sec) + 1)
-            # Ensure the start time is not negative
-            if int(start_time_sec) < 0:
-                start_time_sec = "0"
-
-            print(f"{Colors.INFO}[INFO]{Colors.RESET} Clipping segment {i+1}: {start_time_sec} -> {end_time_sec}")
-            try:
-                if getattr(self.args, 'no_reel', False):
-                    print(f"{Colors.INFO}[INFO]{Colors.RESET} Re-encoding to 16:9 horizontal aspect ratio.")
-                    command = [
-                        "ffmpeg", "-y",
-                        "-i", self.video_path,
-                        "-ss", start_time_sec,
-                        "-to", end_time_sec,
-                        "-vf", "scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2",
-                        "-c:v", "libx264",
-                        "-preset", "veryfast",
-                        "-crf", "23",
-                        "-c:a", "aac",
-                        "-b:a", "128k",
-                        "-avoid_negative_ts", "make_zero",
-                        clip_output_path,
-                    ]
-                else:
-                    print(f"{Colors.INFO}[INFO]{Colors.RESET} Re-encoding to 9:16 vertical aspect ratio for Reels/Shorts.")
-                    command = [
-                        "ffmpeg", "-y",
-                        "-i", self.video_path,
-                        "-ss", start_time_sec,
-                        "-to", end_time_sec,
-                        "-vf", "scale=1080:1920:force_original_aspect_ratio=decrease,pad=1080:1920:(ow-iw)/2:(oh-ih)/2",
-                        "-c:v", "libx264",
-                        "-preset", "veryfast",
-                        "-crf", "23",
-                        "-c:a", "aac",
-                        "-b:a", "128k",
-                        "-avoid_negative_ts", "make_zero",
-                        clip_output_path,
-                    ]
-                subprocess.run(
-                    command, check=True
-                )
-                print(f"{Colors.SUCCESS}[SUCCESS]{Colors.RESET} Saved clip to {clip_output_path}")
-            except subprocess.CalledProcessError as e:
-                print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Failed to clip video for segment {i+1}.")
-                print(f"ffmpeg stderr: {e.stderr.decode()}")
-            except Exception as e:
-                print(f"{Colors.ERROR}[ERROR]{Colors.RESET} An unexpected error occurred during clipping: {e}")
-        return self.entry
\ No newline at end of file
+            clip = self.clip_for(i + 1, segment)
+            if clip:
+                clips.append(clip)
+        self.render_clips(clips)
+        return self.entry
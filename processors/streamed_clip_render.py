@@ -0,0 +1,73 @@
+import threading
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor
+
+from .base import ProcessingStep, Colors
+from artifact_cache import remove_files
+from video_processing import clip_worker_budget
+from video_sections import has_clip_source
+
+
+class StreamedClipRenderStep(ProcessingStep):
+    """
+    Renders the clips of segments streamed by StreamingClipsStep as they arrive. It runs
+    on the ffmpeg pool once the video is downloaded, reading the job's SegmentChannel
+    while the analysis continues on the LLM pool. Clips of a stream that was not
+    accepted (a segment failed to align, or the final selection differs) are removed,
+    so the regular clip steps render them instead.
+    """
+    resource = "ffmpeg"
+    # Set by the orchestrator: the SegmentChannel written by this video's StreamingClipsStep.
+    channel = None
+
+    def __init__(self, entry, args):
+        super().__init__(entry, args)
+        # The clip steps of the run (BurnClipsStep / ClipVideoStep), from Orchestrator._plan_run.
+        self.clip_steps = [step_class(entry, args) for step_class in getattr(args, "streamed_clip_steps", ())]
+
+    @property
+    def is_complete(self):
+        return bool(self.clip_steps) and all(step.is_complete for step in self.clip_steps)
+
+    def process(self):
+        if self.channel is None or not self.clip_steps:
+            return self.entry
+        if not has_clip_source(self.entry):
+            print(f"{Colors.INFO}[INFO]{Colors.RESET} No video to cut streamed clips from; they will be rendered after the analysis.")
+            return self.entry
+
+        jobs, _ = clip_worker_budget(self.args)
+        rendered = []  # clip files written while streaming
+        lock = threading.Lock()
+
+        with ExitStack() as stack:
+            # Captioned clips share one subtitle source instead of opening the transcript per clip.
+            subtitle_sources = {
+                step: stack.enter_context(step._subtitle_source())
+                for step in self.clip_steps
+                if hasattr(step, "_subtitle_source")
+            }
+
+            def render(number, segment):
+                for step in self.clip_steps:
+                    clip = step.clip_for(number, segment)
+                    if not clip:
+                        continue
+                    with lock:
+                        rendered.append(clip["output"])
+                    try:
+                        if step in subtitle_sources:
+                            step.render_clips([clip], subtitles=subtitle_sources[step])
+                        else:
+                            step.render_clips([clip])
+                    except Exception as e:
+                        print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Rendering streamed clip {number} failed: {e}")
+
+            with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="stream-render") as pool:
+                for number, segment in self.channel:
+                    pool.submit(render, number, segment)
+
+        if not self.channel.accepted:
+            # Clips of a partial or superseded selection must not count towards the clip steps.
+            remove_files(rendered)
+        return self.entry
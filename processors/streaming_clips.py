@@ -0,0 +1,142 @@
+import os
+import json
+import queue
+import threading
+
+from .base import ProcessingStep, Colors
+from .viral_analysis import ViralAnalysisStep
+from .viral_timestamps import ViralTimestampsStep
+from llm_cache import llm_cache_settings
+from transcript import Transcript
+from timestamp_alignment import align_viral_timestamps, parse_analysis_segments
+
+
+class SegmentChannel:
+    """
+    Hands aligned segments from StreamingClipsStep to StreamedClipRenderStep while the
+    analysis is still streaming. Iterating yields (number, segment) until `close`;
+    `accepted` is True only if the streamed segments became the final timestamps.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.accepted = None
+
+    def put(self, number, segment):
+        self._queue.put((number, segment))
+
+    def close(self, accepted=False):
+        """Ends the stream. Only the first close sets `accepted`; later ones are no-ops."""
+        with self._lock:
+            if self.accepted is not None:
+                return
+            self.accepted = accepted
+        self._queue.put(None)
+
+    def __iter__(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            yield item
+
+
+class StreamingClipsStep(ProcessingStep):
+    """
+    Streams the viral analysis and aligns every "**Segment N**" block to the word-level
+    transcript as soon as it has been generated, while the rest of the response is
+    still arriving. Aligned segments go to StreamedClipRenderStep (on the ffmpeg pool)
+    through the job's SegmentChannel, so clips are rendered during the analysis. On
+    success the analysis and timestamps of ViralAnalysisStep and ViralTimestampsStep
+    are in place and those steps are skipped; if any segment cannot be aligned the
+    streamed clips are discarded and the regular steps run as usual afterwards.
+    """
+    resource = "llm"
+    # Set by the orchestrator: the SegmentChannel read by this video's render step.
+    channel = None
+
+    def __init__(self, entry, args):
+        super().__init__(entry, args)
+        self.analysis_step = ViralAnalysisStep(entry, args)
+        self.timestamps_step = ViralTimestampsStep(entry, args)
+
+    def cache_params(self):
+        return self.analysis_step.cache_params()
+
+    def cache_inputs(self):
+        return self.analysis_step.cache_inputs()
+
+    @property
+    def is_complete(self):
+        return self.analysis_step.is_complete and self.timestamps_step.is_complete
+
+    def process(self):
+        channel = self.channel or SegmentChannel()
+        try:
+            self._stream_analysis(channel)
+        finally:
+            # Ends the render step's stream; a no-op once the segments were accepted.
+            channel.close(False)
+        return self.entry
+
+    def _stream_analysis(self, channel):
+        """Streams and aligns the analysis; closes `channel` as accepted if every segment aligned."""
+        words_path = self.analysis_step._words_path()
+        if not words_path:
+            print(f"{Colors.INFO}[INFO]{Colors.RESET} No word-level transcript; clips will be rendered after the analysis.")
+            return
+
+        os.makedirs(self.args.effective_analysis_dir, exist_ok=True)
+        niche_prompt = self.args.niche if hasattr(self.args, 'niche') else None
+        cache_dir, cache_max_bytes = llm_cache_settings(self.args)
+
+        transcript = Transcript(words_path)
+        words = transcript.words()
+        streamed = []  # (cues, timestamps segment or None), in segment order
+        lock = threading.Lock()
+
+        def on_segment(block):
+            aligned = align_viral_timestamps(block, words)
+            segment = aligned["segments"][0] if aligned else None
+            with lock:
+                streamed.append((parse_analysis_segments(block)[:1], segment))
+                number = len(streamed)
+            if segment:
+                print(
+                    f"{Colors.INFO}[INFO]{Colors.RESET} Segment {number} ready "
+                    f"({segment['start_time']} -> {segment['end_time']}), rendering while the analysis continues."
+                )
+                channel.put(number, segment)
+
+        try:
+            analysis_path = self.analysis_step._analyze_transcript(
+                transcript, niche_prompt, cache_dir, cache_max_bytes, on_segment=on_segment
+            )
+        finally:
+            transcript.close()
+
+        if not analysis_path or not os.path.exists(analysis_path) or os.path.getsize(analysis_path) == 0:
+            self.entry["status_analysis_generated"] = False
+            return
+        self.entry["analysis_path"] = analysis_path
+        self.entry["status_analysis_generated"] = True
+
+        # The analysis file is authoritative: the streamed segments must be exactly its
+        # segments (a failed reduce falls back to another selection), all aligned.
+        with open(analysis_path, "r", encoding="utf-8") as f:
+            final_cues = parse_analysis_segments(f.read())
+        streamed_cues = [cue for cues, _ in streamed for cue in cues]
+        segments = [segment for _, segment in streamed]
+        if streamed_cues != final_cues or not segments or not all(segments):
+            print(
+                f"{Colors.WARNING}[WARNING]{Colors.RESET} Not every streamed segment could be aligned; "
+                f"timestamps and clips will be produced by the regular steps."
+            )
+            return
+
+        os.makedirs(self.timestamps_step.timestamps_dir, exist_ok=True)
+        with open(self.timestamps_step.timestamp_file_path, "w", encoding="utf-8") as f:
+            json.dump({"segments": segments}, f, indent=4)
+        print(f"{Colors.SUCCESS}[SUCCESS]{Colors.RESET} Viral timestamps saved to: {self.timestamps_step.timestamp_file_path}")
+        channel.close(True)
@@ -1,37 +1,139 @@
 import os
-import pandas as pd
+import json
 
 from .base import ProcessingStep, Colors
-from youtube_utils import get_video_info, download_video
+from youtube_utils import (
+    get_video_info,
+    download_video,
+    download_video_section,
+    capped_video_format,
+    DEFAULT_VIDEO_QUALITY,
+    REEL_SOURCE_HEIGHT,
+    HORIZONTAL_SOURCE_HEIGHT,
+)
+from video_sections import plan_sections, load_sections, sections_cover
+from downloads import DownloadProgress
+from artifact_cache import remove_files
 
 
 class VideoDownloadStep(ProcessingStep):
+    resource = "network"
+    output_fields = ("video_path",)
+    status_fields = ("status_video_downloaded",)
+    entry_fields = ("video_sections",)
+
+    def __init__(self, entry, args):
+        super().__init__(entry, args)
+        self.timestamp_file_path = os.path.join(
+            self.args.output, "viral_clip_timestamps", f"{self.base_name}_timestamps.json"
+        )
+
+    @property
+    def sections_mode(self):
+        return getattr(self.args, "download_sections", False)
+
+    @property
+    def video_format(self):
+        """
+        A deferred download (--audio-first or --download-sections with clips to render)
+        only feeds the clips, so unless a format was asked for, it is capped at the height
+        the clips need.
+        """
+        deferred = getattr(self.args, "deferred_video", False)
+        if deferred and self.args.video_quality == DEFAULT_VIDEO_QUALITY:
+            no_reel = getattr(self.args, "no_reel", False)
+            return capped_video_format(HORIZONTAL_SOURCE_HEIGHT if no_reel else REEL_SOURCE_HEIGHT)
+        return self.args.video_quality
+
+    def cache_params(self):
+        return {"url": self.url, "video_quality": self.video_format, "sections": self.sections_mode}
+
+    def cache_inputs(self):
+        return [self.timestamp_file_path] if self.sections_mode else []
+
+    def cache_outputs(self):
+        return super().cache_outputs() + [section["path"] for section in load_sections(self.entry)]
+
+    def _section_ranges(self):
+        """Download ranges for the current timestamps, or None if there are none yet."""
+        try:
+            with open(self.timestamp_file_path, "r") as f:
+                segments = json.load(f).get("segments", [])
+        except (OSError, ValueError):
+            return None
+        return plan_sections(segments) or None
+
     @property
     def is_complete(self):
-        return (
-            self.entry.get("status_video_downloaded") is True
-            and pd.notna(self.entry.get("video_path"))
-            and os.path.exists(self.entry.get("video_path"))
-        )
+        if self.entry.get("status_video_downloaded") is not True:
+            return False
+        video_path = self.entry.get("video_path")
+        if video_path and os.path.exists(video_path):
+            return True
+        # Sections are complete only while they still cover the current clips.
+        ranges = self._section_ranges() if self.sections_mode else None
+        return bool(ranges) and sections_cover(load_sections(self.entry), ranges)
 
     def process(self):
-        video_info = get_video_info(self.url)
+        video_info = get_video_info(
+            self.url, self.args.effective_cache_dir, self.args.metadata_ttl_seconds,
+            video_id=self.entry.get("video_id"),
+        )
         if not video_info:
             print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Could not retrieve video info for {self.url}")
             self.entry["status_video_downloaded"] = False
             return self.entry
 
+        ranges = self._section_ranges() if self.sections_mode else None
+        if ranges:
+            return self._download_sections(video_info, ranges)
+        if self.sections_mode:
+            print(f"{Colors.INFO}[INFO]{Colors.RESET} No clip timestamps yet, downloading the full video.")
+
+        # An interrupted earlier run left .part files behind; yt-dlp continues them.
+        progress = DownloadProgress(
+            self.entry, "video", self.video_format, self.args.effective_video_dir, self.save_progress
+        )
+        progress.resume()
         downloaded_path = download_video(
             video_info,
             self.base_name,
             self.args.effective_video_dir,
-            self.args.video_quality,
+            self.video_format,
+            progress,
         )
+        progress.finish(bool(downloaded_path))
 
         if downloaded_path:
             self.entry["video_path"] = downloaded_path
             self.entry["status_video_downloaded"] = True
         else:
-            self.entry["video_path"] = pd.NA
+            self.entry["video_path"] = None
             self.entry["status_video_downloaded"] = False
-        return self.entry
\ No newline at end of file
+        return self.entry
+
+    def _download_sections(self, video_info, ranges):
+        """Downloads only the padded clip ranges and records them as the entry's `video_sections`."""
+        duration = video_info.get("duration")
+        total = sum(end - start for start, end in ranges)
+        share = f" ({total / duration:.1%} of {duration}s)" if duration else ""
+        print(f"{Colors.INFO}[INFO]{Colors.RESET} Downloading {len(ranges)} section(s), {total}s of video{share}...")
+
+        os.makedirs(self.args.effective_video_dir, exist_ok=True)
+        # Sections of earlier timestamps are not reused; the clips changed with them.
+        remove_files(section["path"] for section in load_sections(self.entry))
+        self.entry["video_sections"] = None
+        sections = []
+        for start, end in ranges:
+            path = download_video_section(
+                video_info, self.base_name, self.args.effective_video_dir, self.video_format, start, end
+            )
+            if not path:
+                self.entry["status_video_downloaded"] = False
+                return self.entry
+            sections.append({"start": start, "end": end, "path": path})
+
+        self.entry["video_sections"] = json.dumps(sections)
+        self.entry["video_path"] = None
+        self.entry["status_video_downloaded"] = True
+        return self.entry
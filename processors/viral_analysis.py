@@ -1,47 +1,133 @@
 import os
-import pandas as pd
 
 from .base import ProcessingStep, Colors
-from gemini_interaction import identify_viral_clips_gemini
+from gemini_interaction import identify_viral_clips_gemini, identify_viral_clips_chunked
+from llm_cache import llm_cache_settings
+from transcript import Transcript
 
 
 class ViralAnalysisStep(ProcessingStep):
+    resource = "llm"
+    output_fields = ("analysis_path",)
+    status_fields = ("status_analysis_generated",)
+
+    def cache_params(self):
+        return {
+            "number_of_sections": self.args.number_of_sections,
+            "niche": getattr(self.args, "niche", None),
+            "model": self.args.clip_identifier_model,
+            "window_minutes": getattr(self.args, "analysis_window_minutes", None),
+            "token_budget": getattr(self.args, "prompt_token_budget", None),
+        }
+
+    def cache_inputs(self):
+        return [self._words_path() or self.entry.get("transcript_path")]
+
     @property
     def is_complete(self):
         analysis_path = self.entry.get("analysis_path")
         return (
             self.entry.get("status_analysis_generated") is True
-            and pd.notna(analysis_path)
+            and analysis_path
             and os.path.exists(analysis_path)
             and os.path.getsize(analysis_path) > 0
         )
 
-    def process(self):
-        transcript_path = self.entry.get("transcript_path")
-        if pd.isna(transcript_path) or not os.path.exists(transcript_path):
-            print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Transcript not available for viral analysis.")
-            self.entry["status_analysis_generated"] = False
-            return self.entry
+    def _words_path(self):
+        words_path = self.entry.get("words_path")
+        return words_path if words_path and os.path.exists(words_path) else None
 
-        with open(transcript_path, "r", encoding="utf-8") as f:
-            transcript_text = f.read()
+    def _analyze_transcript(self, transcript, niche_prompt, cache_dir, cache_max_bytes, on_segment=None):
+        """
+        Analyses a word-level transcript rendered compactly (transcript_compaction.py):
+        map-reduce over windows when it is longer than one analysis window, otherwise
+        in a single prompt. `on_segment` streams the final response (StreamingClipsStep).
+        """
+        from analysis_windows import chunked_analysis_windows
+        from transcript_compaction import compact_transcript
 
-        if not transcript_text.strip():
-            print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Transcript file is empty, cannot perform analysis.")
-            self.entry["status_analysis_generated"] = False
-            return self.entry
+        token_budget = getattr(self.args, "prompt_token_budget", None)
+        windows = chunked_analysis_windows(
+            transcript.duration, self._chapters(), getattr(self.args, "analysis_window_minutes", None)
+        )
+        if windows:
+            return identify_viral_clips_chunked(
+                transcript,
+                windows,
+                self.args.number_of_sections,
+                self.args.clip_identifier_model,
+                self.args.effective_analysis_dir,
+                self.base_name,
+                niche_prompt=niche_prompt,
+                cache_dir=cache_dir,
+                cache_max_bytes=cache_max_bytes,
+                token_budget=token_budget,
+                on_segment=on_segment,
+            )
 
-        os.makedirs(self.args.effective_analysis_dir, exist_ok=True)
-        niche_prompt = self.args.niche if hasattr(self.args, 'niche') else None
-        analysis_path = identify_viral_clips_gemini(
-            transcript_text,
+        compact = compact_transcript(transcript, token_budget=token_budget)
+        return identify_viral_clips_gemini(
+            compact.text,
             self.args.number_of_sections,
             self.args.clip_identifier_model,
             self.args.effective_analysis_dir,
             self.base_name,
             niche_prompt=niche_prompt,
+            cache_dir=cache_dir,
+            cache_max_bytes=cache_max_bytes,
+            anchored=True,
+            on_segment=on_segment,
         )
 
+    def _chapters(self):
+        """YouTube chapters from the metadata cache; chapters do not change, so any cached record will do."""
+        cache_dir = getattr(self.args, "effective_cache_dir", None)
+        if not cache_dir:
+            return None
+        from metadata_cache import MetadataCache
+        from url_parsing import extract_video_id
+
+        record = MetadataCache(cache_dir, ttl=None).get(extract_video_id(self.url))
+        return record.get("chapters") if record else None
+
+    def process(self):
+        words_path = self._words_path()
+        transcript_path = self.entry.get("transcript_path")
+        if not words_path and (not transcript_path or not os.path.exists(transcript_path)):
+            print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Transcript not available for viral analysis.")
+            self.entry["status_analysis_generated"] = False
+            return self.entry
+
+        os.makedirs(self.args.effective_analysis_dir, exist_ok=True)
+        niche_prompt = self.args.niche if hasattr(self.args, 'niche') else None
+        cache_dir, cache_max_bytes = llm_cache_settings(self.args)
+
+        if words_path:
+            transcript = Transcript(words_path)
+            try:
+                analysis_path = self._analyze_transcript(transcript, niche_prompt, cache_dir, cache_max_bytes)
+            finally:
+                transcript.close()
+        else:
+            with open(transcript_path, "r", encoding="utf-8") as f:
+                transcript_text = f.read()
+
+            if not transcript_text.strip():
+                print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Transcript file is empty, cannot perform analysis.")
+                self.entry["status_analysis_generated"] = False
+                return self.entry
+
+            analysis_path = identify_viral_clips_gemini(
+                transcript_text,
+                self.args.number_of_sections,
+                self.args.clip_identifier_model,
+                self.args.effective_analysis_dir,
+                self.base_name,
+                niche_prompt=niche_prompt,
+                cache_dir=cache_dir,
+                cache_max_bytes=cache_max_bytes,
+            )
+
         if (
             analysis_path
             and os.path.exists(analysis_path)
@@ -50,6 +136,6 @@ class ViralAnalysisStep(ProcessingStep):
             self.entry["analysis_path"] = analysis_path
             self.entry["status_analysis_generated"] = True
         else:
-            self.entry["analysis_path"] = analysis_path if analysis_path else pd.NA
+            self.entry["analysis_path"] = analysis_path if analysis_path else None
             self.entry["status_analysis_generated"] = False
-        return self.entry
\ No newline at end of file
+        return self.entry
@@ -1,12 +1,17 @@
 import os
 import json
-import pandas as pd
 
 from .base import ProcessingStep, Colors
-from gemini_interaction import get_viral_timestamps_gemini
+from gemini_interaction import get_viral_timestamps_gemini, get_viral_timestamps_compact
+from transcript import Transcript
+from transcript_compaction import compact_transcript
+from timestamp_alignment import align_viral_timestamps
+from llm_cache import llm_cache_settings
 
 
 class ViralTimestampsStep(ProcessingStep):
+    resource = "llm"
+
     def __init__(self, entry, args):
         super().__init__(entry, args)
         self.timestamps_dir = os.path.join(self.args.output, "viral_clip_timestamps")
@@ -14,29 +19,69 @@ class ViralTimestampsStep(ProcessingStep):
             self.timestamps_dir, f"{self.base_name}_timestamps.json"
         )
 
+    def cache_params(self):
+        return {
+            "model": self.args.clip_identifier_model,
+            "aligner": "llm" if getattr(self.args, "llm_timestamps", False) else "local",
+            "token_budget": getattr(self.args, "prompt_token_budget", None),
+        }
+
+    def _words_path(self):
+        words_path = self.entry.get("words_path")
+        return words_path if words_path and os.path.exists(words_path) else None
+
+    def cache_inputs(self):
+        return [self._words_path() or self.entry.get("caption_srt_path"), self.entry.get("analysis_path")]
+
+    def cache_outputs(self):
+        return [self.timestamp_file_path] if os.path.exists(self.timestamp_file_path) else []
+
     @property
     def is_complete(self):
         return os.path.exists(self.timestamp_file_path)
 
     def process(self):
+        words_path = self._words_path()
         srt_path = self.entry.get("caption_srt_path")
         analysis_path = self.entry.get("analysis_path")
 
-        if pd.isna(srt_path) or not os.path.exists(srt_path):
+        if not words_path and (not srt_path or not os.path.exists(srt_path)):
             print(f"{Colors.ERROR}[ERROR]{Colors.RESET} SRT file not found for timestamp extraction.")
             return self.entry
-        if pd.isna(analysis_path) or not os.path.exists(analysis_path):
+        if not analysis_path or not os.path.exists(analysis_path):
             print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Analysis file not found for timestamp extraction.")
             return self.entry
 
-        with open(srt_path, "r", encoding="utf-8") as f:
-            srt_content = f.read()
         with open(analysis_path, "r", encoding="utf-8") as f:
             analysis_content = f.read()
 
-        timestamps_json = get_viral_timestamps_gemini(
-            srt_content, analysis_content, self.args.clip_identifier_model
-        )
+        timestamps_json = None
+        transcript = Transcript(words_path) if words_path else None
+        try:
+            if transcript and not getattr(self.args, "llm_timestamps", False):
+                timestamps_json = align_viral_timestamps(analysis_content, transcript.words())
+                if timestamps_json:
+                    print(f"{Colors.SUCCESS}[SUCCESS]{Colors.RESET} Aligned {len(timestamps_json['segments'])} segment(s) to the transcript locally.")
+                else:
+                    print(f"{Colors.INFO}[INFO]{Colors.RESET} Falling back to {self.args.clip_identifier_model} for timestamps.")
+
+            if not timestamps_json:
+                if transcript:
+                    timestamps_json = get_viral_timestamps_compact(
+                        compact_transcript(transcript, token_budget=getattr(self.args, "prompt_token_budget", None)),
+                        analysis_content, self.args.clip_identifier_model,
+                        *llm_cache_settings(self.args),
+                    )
+                else:
+                    with open(srt_path, "r", encoding="utf-8") as f:
+                        srt_content = f.read()
+                    timestamps_json = get_viral_timestamps_gemini(
+                        srt_content, analysis_content, self.args.clip_identifier_model,
+                        *llm_cache_settings(self.args),
+                    )
+        finally:
+            if transcript:
+                transcript.close()
 
         if timestamps_json:
             os.makedirs(self.timestamps_dir, exist_ok=True)
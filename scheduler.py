@@ -0,0 +1,139 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from processors.base import Colors
+
+# --- Resource Pools ---
+
+# Every node declares which kind of resource it mostly consumes. Nodes in
+# different pools run side by side, so a yt-dlp download can keep the NIC busy
+# while Whisper holds the CPU and an ffmpeg encode runs next to a Gemini call.
+DEFAULT_POOL_SIZES = {
+    "network": 4,
+    "transcription": 1,
+    "llm": 4,
+    "ffmpeg": max(1, (os.cpu_count() or 2) // 4),
+    "local": 1,
+}
+
+
+class DagScheduler:
+    """
+    Runs a DAG of nodes as soon as their dependencies are satisfied.
+
+    Each node is executed on the thread pool of the resource it declares; a callable
+    resource is asked for the pool name when the node becomes ready, for nodes whose
+    kind of work depends on what their dependencies produced. A node whose
+    dependency failed is skipped, unless it was added with `run_on_failure=True`
+    (useful for bookkeeping such as saving the manifest).
+    """
+
+    PENDING, RUNNING, DONE, FAILED, SKIPPED = "pending", "running", "done", "failed", "skipped"
+
+    def __init__(self, pool_sizes=None):
+        self.pool_sizes = dict(DEFAULT_POOL_SIZES)
+        if pool_sizes:
+            self.pool_sizes.update({k: v for k, v in pool_sizes.items() if v})
+        self._nodes = {}
+        self._dependents = {}
+        self._status = {}
+
+    def add(self, key, func, deps=(), resource="local", run_on_failure=False):
+        """Registers a node. Dependencies must be added before the node itself."""
+        if key in self._nodes:
+            return key
+        for dep in deps:
+            if dep not in self._nodes:
+                raise KeyError(f"Unknown dependency {dep!r} for node {key!r}")
+        self._nodes[key] = {
+            "func": func,
+            "deps": list(deps),
+            "resource": resource,
+            "run_on_failure": run_on_failure,
+        }
+        self._dependents[key] = []
+        for dep in deps:
+            self._dependents[dep].append(key)
+        self._status[key] = self.PENDING
+        return key
+
+    def __contains__(self, key):
+        return key in self._nodes
+
+    def status(self, key):
+        return self._status.get(key)
+
+    def _pool_name(self, key):
+        resource = self._nodes[key]["resource"]
+        if callable(resource):
+            resource = resource()
+        return resource if resource in self.pool_sizes else "local"
+
+    def _is_ready(self, key):
+        node = self._nodes[key]
+        for dep in node["deps"]:
+            dep_status = self._status[dep]
+            if dep_status in (self.PENDING, self.RUNNING):
+                return False
+            if dep_status != self.DONE and not node["run_on_failure"]:
+                return False
+        return True
+
+    def _is_blocked(self, key):
+        node = self._nodes[key]
+        if node["run_on_failure"]:
+            return False
+        return any(self._status[dep] in (self.FAILED, self.SKIPPED) for dep in node["deps"])
+
+    def _skip_blocked(self, key):
+        """Marks pending dependents of a failed/skipped node as skipped, transitively."""
+        stack = list(self._dependents[key])
+        while stack:
+            dependent = stack.pop()
+            if self._status[dependent] == self.PENDING and self._is_blocked(dependent):
+                self._status[dependent] = self.SKIPPED
+                stack.extend(self._dependents[dependent])
+
+    def run(self):
+        """Executes every node. Returns a dict mapping node key -> final status."""
+        if not self._nodes:
+            return {}
+
+        pools = {
+            name: ThreadPoolExecutor(max_workers=size, thread_name_prefix=f"{name}-pool")
+            for name, size in self.pool_sizes.items()
+        }
+        in_flight = {}
+
+        def submit_ready(candidates):
+            for key in candidates:
+                if self._status[key] == self.PENDING and self._is_ready(key):
+                    node = self._nodes[key]
+                    self._status[key] = self.RUNNING
+                    in_flight[pools[self._pool_name(key)].submit(node["func"])] = key
+
+        try:
+            submit_ready(list(self._nodes))
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    key = in_flight.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        self._status[key] = self.DONE
+                    else:
+                        print(f"{Colors.ERROR}[ERROR]{Colors.RESET} {key}: {error}")
+                        self._status[key] = self.FAILED
+                        self._skip_blocked(key)
+                    # A failure may have settled nodes anywhere downstream, so
+                    # rescan everything; on success only direct dependents change.
+                    submit_ready(self._dependents[key] if error is None else list(self._nodes))
+
+            # Anything left pending is unreachable (its dependencies never settled).
+            for key, state in self._status.items():
+                if state == self.PENDING:
+                    self._status[key] = self.SKIPPED
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True)
+        return dict(self._status)
@@ -0,0 +1,129 @@
+import bisect
+from collections import namedtuple
+
+# --- Interval-Indexed ASS Subtitles ---
+
+# `fields` holds the event's values in [Events] Format order, Start/End included.
+AssEvent = namedtuple("AssEvent", ["start", "end", "fields"])
+
+DEFAULT_EVENT_FORMAT = ["Layer", "Start", "End", "Style", "Name", "MarginL", "MarginR", "MarginV", "Effect", "Text"]
+
+
+def parse_ass_time(value):
+    """Parses an ASS timestamp ("H:MM:SS.cc") into seconds."""
+    h, m, s = value.strip().split(":")
+    return int(h) * 3600 + int(m) * 60 + float(s)
+
+
+def seconds_to_srt_time(seconds):
+    """Formats seconds as an SRT timestamp ("HH:MM:SS,mmm")."""
+    milliseconds = int(round(max(seconds, 0) * 1000))
+    h, milliseconds = divmod(milliseconds, 3600000)
+    m, milliseconds = divmod(milliseconds, 60000)
+    s, ms = divmod(milliseconds, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+
+
+def format_ass_time(seconds):
+    """Formats seconds as an ASS timestamp ("H:MM:SS.cc")."""
+    centiseconds = int(round(max(seconds, 0) * 100))
+    h, centiseconds = divmod(centiseconds, 360000)
+    m, centiseconds = divmod(centiseconds, 6000)
+    s, cs = divmod(centiseconds, 100)
+    return f"{h}:{m:02d}:{s:02d}.{cs:02d}"
+
+
+class AssDocument:
+    """
+    An ASS subtitle file parsed once into its header and a start-sorted event array.
+
+    `slice(start, end)` returns the track for one clip with a bisect range query:
+    only events near the window are visited, and events straddling its edges are
+    clipped to it rather than dropped.
+    """
+
+    def __init__(self, header_lines, event_format, events):
+        self.header_lines = header_lines
+        self.event_format = event_format
+        self.events = sorted(events, key=lambda e: e.start)
+        self._starts = [e.start for e in self.events]
+        # Any event overlapping [start, end) begins no earlier than start - longest event.
+        self._max_duration = max((e.end - e.start for e in self.events), default=0.0)
+        self._start_index = event_format.index("Start")
+        self._end_index = event_format.index("End")
+
+    @classmethod
+    def from_text(cls, text):
+        header_lines = []
+        event_format = None
+        events = []
+        section = None
+        for line in text.splitlines():
+            stripped = line.strip()
+            if stripped.startswith("[") and stripped.endswith("]"):
+                section = stripped.lower()
+            if section != "[events]":
+                header_lines.append(line)
+                continue
+            if stripped.lower().startswith("format:"):
+                event_format = [f.strip() for f in stripped.split(":", 1)[1].split(",")]
+                continue
+            if not stripped.startswith("Dialogue:"):
+                if not stripped.startswith("Comment:"):
+                    header_lines.append(line)
+                continue
+
+            event_format = event_format or DEFAULT_EVENT_FORMAT
+            fields = stripped.split(":", 1)[1].lstrip().split(",", len(event_format) - 1)
+            if len(fields) != len(event_format):
+                continue
+            try:
+                start = parse_ass_time(fields[event_format.index("Start")])
+                end = parse_ass_time(fields[event_format.index("End")])
+            except ValueError:
+                continue
+            if end > start:
+                events.append(AssEvent(start, end, fields))
+        return cls(header_lines, event_format or DEFAULT_EVENT_FORMAT, events)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, "r", encoding="utf-8-sig") as f:
+            return cls.from_text(f.read())
+
+    def restyle(self, **overrides):
+        """Sets fields (by their [V4+ Styles] Format name, e.g. Fontsize=12) on every Style line."""
+        style_format = None
+        for i, line in enumerate(self.header_lines):
+            stripped = line.strip()
+            if stripped.lower().startswith("format:") and style_format is None and "Fontname" in stripped:
+                style_format = [f.strip() for f in stripped.split(":", 1)[1].split(",")]
+            elif stripped.startswith("Style:") and style_format:
+                values = [v.strip() for v in stripped.split(":", 1)[1].split(",")]
+                if len(values) != len(style_format):
+                    continue
+                for name, value in overrides.items():
+                    if name in style_format:
+                        values[style_format.index(name)] = str(value)
+                self.header_lines[i] = "Style: " + ",".join(values)
+        return self
+
+    def events_between(self, start, end):
+        """Returns the events that overlap [start, end), in start order."""
+        lo = bisect.bisect_left(self._starts, start - self._max_duration)
+        hi = bisect.bisect_left(self._starts, end)
+        return [e for e in self.events[lo:hi] if e.end > start]
+
+    def slice(self, start, end):
+        """Returns an ASS document for [start, end) on a timeline that starts at zero."""
+        lines = list(self.header_lines)
+        lines.append("Format: " + ", ".join(self.event_format))
+        for event in self.events_between(start, end):
+            fields = list(event.fields)
+            fields[self._start_index] = format_ass_time(max(event.start, start) - start)
+            fields[self._end_index] = format_ass_time(min(event.end, end) - start)
+            lines.append("Dialogue: " + ",".join(fields))
+        return "\n".join(lines) + "\n"
+
+    def __len__(self):
+        return len(self.events)
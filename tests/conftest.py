@@ -0,0 +1,8 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The top-level modules import `Colors` from processors.base, which loads every step
+# through processors/__init__; importing the package first resolves that cycle.
+import processors  # noqa: E402,F401
@@ -0,0 +1,98 @@
+from analysis_windows import (
+    SINGLE_PROMPT_WINDOWS,
+    SegmentStreamParser,
+    chunked_analysis_windows,
+    plan_analysis_windows,
+    renumber_segment,
+    segment_score,
+    split_segment_blocks,
+    strip_score,
+)
+
+ANALYSIS = """Intro text.
+
+**Segment 1**
+Start Cue: one
+End Cue: two
+Virality Score: 7.5
+
+**Segment [2]**
+No cues in this one.
+
+**Segment 3**
+Start Cue: three
+End Cue: four
+"""
+
+
+def chapters(*points):
+    return [{"start_time": a, "end_time": b} for a, b in zip(points, points[1:])]
+
+
+def covers(windows, duration):
+    assert windows[0][0] == 0.0
+    assert windows[-1][1] == duration
+    for (_, end), (start, _) in zip(windows, windows[1:]):
+        assert start < end
+
+
+def test_fixed_windows_overlap_and_cover():
+    windows = plan_analysis_windows(7200, None, window_seconds=1200, overlap_seconds=60)
+    covers(windows, 7200)
+    assert len(windows) == 6
+    assert all(end - start <= 1260 for start, end in windows)
+
+
+def test_remainder_shorter_than_overlap_is_absorbed():
+    assert plan_analysis_windows(1230, None, window_seconds=1200, overlap_seconds=60) == [(0.0, 1230)]
+
+
+def test_short_chapter_before_long_one_gives_even_windows():
+    windows = plan_analysis_windows(3000, chapters(0, 330, 3000), window_seconds=1200, overlap_seconds=60)
+    covers(windows, 3000)
+    lengths = [end - start for start, end in windows]
+    assert len(windows) == 3
+    assert max(lengths) - min(lengths) <= 60
+
+
+def test_short_chapters_are_merged_at_their_boundaries():
+    windows = plan_analysis_windows(
+        2600, chapters(0, 300, 700, 1100, 1500, 2600), window_seconds=1200, overlap_seconds=60
+    )
+    covers(windows, 2600)
+    assert [round(start + 30) for start, _ in windows[1:]] == [700, 1500]
+
+
+def test_invalid_chapters_are_ignored():
+    invalid = [{"start_time": 100, "end_time": 50}, {"start_time": None, "end_time": 10}]
+    assert plan_analysis_windows(2400, invalid, 1200, 60) == plan_analysis_windows(2400, None, 1200, 60)
+
+
+def test_short_transcripts_use_a_single_prompt():
+    assert chunked_analysis_windows(20 * 60 * SINGLE_PROMPT_WINDOWS, None, 20) is None
+    assert chunked_analysis_windows(3600, None, 0) is None
+    assert len(chunked_analysis_windows(3600, None, 20)) == 3
+
+
+def test_segment_blocks_scores_and_numbers():
+    blocks = split_segment_blocks(ANALYSIS)
+    assert len(blocks) == 2
+    assert [segment_score(block) for block in blocks] == [7.5, 0.0]
+    assert "Virality" not in strip_score(blocks[0])
+    assert renumber_segment(blocks[1], 2).startswith("**Segment 2**")
+
+
+def test_stream_parser_emits_blocks_once_their_end_cue_is_complete():
+    parser = SegmentStreamParser()
+    assert parser.feed("Intro.\n**Segment 1**\nStart Cue: one\nEnd Cue: tw") == []
+    assert parser.feed("o words\n") == ["**Segment 1**\nStart Cue: one\nEnd Cue: two words"]
+    assert parser.feed("Justification that is not waited for.\n**Segment 2**\nStart Cue: three\n") == []
+    assert parser.feed("**Segment 3**\nno cues here\n") == ["**Segment 2**\nStart Cue: three"]
+    assert parser.close() == []
+
+
+def test_stream_parser_flushes_the_last_block_on_close():
+    parser = SegmentStreamParser()
+    assert parser.feed("**Segment 1**\nStart Cue: a\nEnd Cue: b") == []
+    assert parser.close() == ["**Segment 1**\nStart Cue: a\nEnd Cue: b"]
+    assert parser.close() == []
@@ -0,0 +1,93 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from artifact_cache import compute_cache_key
+from processors.base import ProcessingStep
+
+
+class FakeStep(ProcessingStep):
+    output_fields = ("out_path",)
+    status_fields = ("status_done",)
+
+    def __init__(self, entry, args, out_path):
+        super().__init__(entry, args)
+        self.out_path = out_path
+        self.calls = []
+
+    def cache_params(self):
+        return {"param": self.args.param}
+
+    def cache_inputs(self):
+        return [self.entry.get("input_path")]
+
+    @property
+    def is_complete(self):
+        return self.entry.get("status_done") is True and os.path.exists(self.entry.get("out_path") or "")
+
+    def process(self):
+        self.calls.append(os.path.exists(self.out_path))
+        # Written in place: must never go through a hard link into the store.
+        with open(self.out_path, "a", encoding="utf-8") as f:
+            f.write(self.args.param)
+        self.entry.update(out_path=self.out_path, status_done=True)
+        return self.entry
+
+
+@pytest.fixture
+def make_step(tmp_path):
+    input_path = tmp_path / "input.txt"
+    input_path.write_text("v1")
+    entry = {"base_filename": "video", "input_path": str(input_path)}
+
+    def make(param):
+        args = SimpleNamespace(param=param, force=False, effective_cache_dir=str(tmp_path / "cache"))
+        return FakeStep(entry, args, str(tmp_path / "out.txt"))
+
+    return make
+
+
+def read(step):
+    with open(step.out_path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_key_changes_with_params_and_inputs(tmp_path):
+    input_path = tmp_path / "input.txt"
+    input_path.write_text("v1")
+    key = compute_cache_key("Step", {"param": "a"}, [str(input_path)])
+    assert key == compute_cache_key("Step", {"param": "a"}, [str(input_path)])
+    assert key != compute_cache_key("Step", {"param": "b"}, [str(input_path)])
+    input_path.write_text("v2 with other content")
+    assert key != compute_cache_key("Step", {"param": "a"}, [str(input_path)])
+
+
+def test_unchanged_key_skips_the_step(make_step):
+    make_step("a").run()
+    step = make_step("a")
+    step.run()
+    assert step.calls == []
+
+
+def test_param_change_reruns_and_restores_on_a_hit(make_step):
+    make_step("a").run()
+    step_b = make_step("b")
+    step_b.run()
+    # The previous output was unlinked first, so the stored "a" artifact is intact.
+    assert step_b.calls == [False]
+    assert read(step_b) == "b"
+
+    step_a = make_step("a")
+    step_a.run()
+    assert step_a.calls == []
+    assert read(step_a) == "a"
+
+
+def test_input_change_misses(make_step):
+    make_step("a").run()
+    with open(make_step("a").entry["input_path"], "w", encoding="utf-8") as f:
+        f.write("v2 with other content")
+    step = make_step("a")
+    step.run()
+    assert step.calls == [False]
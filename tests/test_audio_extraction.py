@@ -0,0 +1,72 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from processors import AudioExtractionStep, CaptionGenerationStep
+from processors import caption_generation
+
+
+@pytest.fixture
+def args(tmp_path):
+    return SimpleNamespace(
+        mp3=False,
+        audio=False,
+        audio_first=False,
+        audio_quality="bestaudio",
+        effective_audio_dir=str(tmp_path / "audio"),
+        effective_caption_dir=str(tmp_path / "captions"),
+        effective_transcript_dir=str(tmp_path / "transcripts"),
+        whisper_model="tiny",
+        whisper_device=None,
+        whisper_cache_mb=None,
+        transcribe_workers=1,
+        transcribe_chunk_seconds=600,
+    )
+
+
+@pytest.fixture
+def legacy_mp3(tmp_path):
+    path = tmp_path / "video.mp3"
+    path.write_bytes(b"mp3")
+    return str(path)
+
+
+def test_legacy_mp3_completes_audio_extraction(args, legacy_mp3):
+    entry = {"base_filename": "video", "mp3_path": legacy_mp3, "status_mp3_converted": True}
+    assert AudioExtractionStep(entry, args).is_complete
+
+
+def test_captions_complete_audio_extraction(args, tmp_path):
+    srt = tmp_path / "video.srt"
+    srt.write_text("")
+    entry = {"base_filename": "video", "status_captions_generated": True, "caption_srt_path": str(srt)}
+    assert AudioExtractionStep(entry, args).is_complete
+    # An explicitly requested MP3 still has to be produced.
+    args.mp3 = True
+    assert not AudioExtractionStep(entry, args).is_complete
+
+
+def test_missing_audio_is_incomplete(args):
+    assert not AudioExtractionStep({"base_filename": "video"}, args).is_complete
+
+
+def test_captions_decode_legacy_mp3_to_temporary_wav(args, legacy_mp3, monkeypatch):
+    transcribed = []
+
+    def fake_convert(input_path, output_path):
+        with open(output_path, "wb") as f:
+            f.write(b"wav")
+        return output_path
+
+    def fake_captions(audio_path, *args, **kwargs):
+        transcribed.append(audio_path)
+        return {"srt": "video.srt", "txt": "video.txt", "words": "video.words.json"}
+
+    monkeypatch.setattr(caption_generation, "convert_to_whisper_wav", fake_convert)
+    monkeypatch.setattr(caption_generation, "generate_caption_files", fake_captions)
+
+    entry = CaptionGenerationStep({"base_filename": "video", "mp3_path": legacy_mp3}, args).process()
+    assert transcribed[0].endswith("video_audiotemp.wav")
+    assert entry["status_captions_generated"] is True
+    assert not os.path.exists(transcribed[0])
@@ -0,0 +1,80 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+import youtube_utils
+from orchestrator import Orchestrator
+from processors import AudioExtractionStep, BurnClipsStep, VideoDownloadStep
+from youtube_utils import SMALLEST_AUDIO_FORMAT, capped_video_format
+
+
+def test_capped_format_prefers_h264_within_the_height():
+    selector = capped_video_format(720)
+    assert selector.startswith("bestvideo[height<=720][vcodec^=avc1]+bestaudio[ext=m4a]")
+    assert selector.endswith("/best")
+
+
+@pytest.fixture
+def make_orchestrator(tmp_path):
+    orchestrators = []
+
+    def make(**flags):
+        orchestrator = Orchestrator(SimpleNamespace(output=str(tmp_path), **flags))
+        orchestrators.append(orchestrator)
+        return orchestrator
+
+    yield make
+    for orchestrator in orchestrators:
+        orchestrator.manifest.close()
+
+
+def test_video_is_deferred_only_for_clips(make_orchestrator):
+    orchestrator = make_orchestrator(audio_first=True)
+    assert orchestrator._defers_video([BurnClipsStep, VideoDownloadStep])
+    assert not orchestrator._defers_video([VideoDownloadStep])
+    assert not make_orchestrator()._defers_video([BurnClipsStep, VideoDownloadStep])
+
+
+def video_step(**flags):
+    args = SimpleNamespace(output="out", video_quality="best", **flags)
+    return VideoDownloadStep({"base_filename": "video"}, args)
+
+
+def test_deferred_video_is_capped_at_the_clip_height():
+    assert video_step(deferred_video=True).video_format == capped_video_format(720)
+    assert video_step(deferred_video=True, no_reel=True).video_format == capped_video_format(1080)
+    assert video_step(deferred_video=False).video_format == "best"
+
+
+def test_audio_first_fetches_the_smallest_audio():
+    args = SimpleNamespace(audio_first=True, mp3=False, audio=False, audio_quality="bestaudio")
+    assert AudioExtractionStep({}, args).audio_format == SMALLEST_AUDIO_FORMAT
+    args.mp3 = True
+    assert AudioExtractionStep({}, args).audio_format == "bestaudio"
+
+
+class FakeYoutubeDL:
+    def __init__(self, opts):
+        self.opts = opts
+        FakeYoutubeDL.opts = opts
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def download(self, urls):
+        if FakeYoutubeDL.writes:
+            with open(self.opts["outtmpl"], "wb") as f:
+                f.write(b"mp4")
+
+
+@pytest.mark.parametrize("writes", [True, False])
+def test_download_merges_to_mp4_and_checks_the_file(tmp_path, monkeypatch, writes):
+    FakeYoutubeDL.writes = writes
+    monkeypatch.setitem(sys.modules, "yt_dlp", SimpleNamespace(YoutubeDL=FakeYoutubeDL))
+    path = youtube_utils.download_video({"webpage_url": "https://youtu.be/x"}, "video", str(tmp_path), "best")
+    assert FakeYoutubeDL.opts["merge_output_format"] == "mp4"
+    assert path == (str(tmp_path / "video.mp4") if writes else None)
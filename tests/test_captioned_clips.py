@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+import pytest
+
+from orchestrator import STEP_DEPENDENCIES, Orchestrator
+from processors import BurnClipsStep, ClipVideoStep
+from video_processing import clip_window, timestamp_to_seconds
+
+
+@pytest.mark.parametrize(
+    "value, seconds",
+    [(12, 12.0), ("12.5", 12.5), ("00:01:02.250", 62.25), ("01:00:00,500", 3600.5)],
+)
+def test_timestamp_to_seconds(value, seconds):
+    assert timestamp_to_seconds(value) == seconds
+
+
+def test_clip_window_rounds_and_pads():
+    assert clip_window("00:00:10,400", "00:00:20,600") == (9, 22)
+    assert clip_window("00:00:00,300", "00:00:05,000") == (0, 6)
+
+
+def test_captioned_clips_render_from_the_source():
+    assert ClipVideoStep not in STEP_DEPENDENCIES[BurnClipsStep]
+
+
+@pytest.mark.parametrize(
+    "flags, expected",
+    [
+        ({}, False),
+        ({"keep_uncaptioned_clips": True}, True),
+        ({"burn_clips": True, "clip_video": True}, True),
+    ],
+)
+def test_uncaptioned_clips_only_on_request(tmp_path, flags, expected):
+    orchestrator = Orchestrator(SimpleNamespace(output=str(tmp_path), **flags))
+    try:
+        targets = orchestrator._get_target_steps()
+    finally:
+        orchestrator.manifest.close()
+    assert BurnClipsStep in targets
+    assert (ClipVideoStep in targets) is expected
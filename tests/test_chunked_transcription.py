@@ -0,0 +1,54 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+import audio_processing
+from audio_processing import _offset_result_dict, plan_chunks
+
+
+def test_short_audio_is_one_chunk():
+    assert plan_chunks(350, [], chunk_seconds=300) == [(0.0, 350)]
+
+
+def test_chunks_are_cut_in_the_nearest_silence():
+    silences = [(240.0, 241.0), (310.0, 312.0), (590.0, 600.0)]
+    assert plan_chunks(900, silences, chunk_seconds=300) == [(0.0, 311.0), (311.0, 595.0), (595.0, 900)]
+
+
+def test_hard_cut_without_nearby_silence():
+    assert plan_chunks(650, [(10.0, 11.0)], chunk_seconds=300) == [(0.0, 300.0), (300.0, 650)]
+
+
+def test_offset_shifts_segments_and_words():
+    result = {"segments": [{"start": 1.0, "end": 2.0, "words": [{"start": 1.0, "end": 1.5, "word": "hi"}]}]}
+    shifted = _offset_result_dict(result, 300.0)
+    assert shifted["segments"][0]["start"] == 301.0
+    assert shifted["segments"][0]["words"][0] == {"start": 301.0, "end": 301.5, "word": "hi"}
+
+
+def test_chunk_results_are_stitched_in_order(monkeypatch):
+    def transcribe_chunk(audio_path, start, end, model_name, device):
+        # Every chunk reports times relative to its own start, like a real transcription.
+        segment = {"start": 0.5, "end": 1.0, "text": f"chunk {start:.0f}", "words": [{"start": 0.5, "end": 1.0}]}
+        return _offset_result_dict({"language": "en", "segments": [segment]}, start)
+
+    monkeypatch.setitem(sys.modules, "stable_whisper", SimpleNamespace(WhisperResult=dict))
+    monkeypatch.setattr(audio_processing, "get_media_duration", lambda path: 650.0)
+    monkeypatch.setattr(audio_processing, "detect_silences", lambda path: [])
+    monkeypatch.setattr(audio_processing, "_transcribe_chunk", transcribe_chunk)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        monkeypatch.setattr(audio_processing, "_get_transcription_pool", lambda workers: pool)
+        result = audio_processing.transcribe_parallel("audio.mp3", "tiny", workers=2, chunk_seconds=300)
+
+    assert result["language"] == "en"
+    assert [s["text"] for s in result["segments"]] == ["chunk 0", "chunk 300"]
+    assert [s["words"][0]["start"] for s in result["segments"]] == [0.5, 300.5]
+
+
+def test_missing_duration_raises(monkeypatch):
+    monkeypatch.setitem(sys.modules, "stable_whisper", SimpleNamespace(WhisperResult=dict))
+    monkeypatch.setattr(audio_processing, "get_media_duration", lambda path: None)
+    with pytest.raises(RuntimeError):
+        audio_processing.transcribe_parallel("audio.mp3", "tiny", workers=2)
@@ -0,0 +1,58 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from video_processing import (
+    EncodeSlots,
+    build_seek_clip_command,
+    build_single_pass_command,
+    clip_worker_budget,
+    encode_slots,
+)
+
+CLIPS = [{"start": 10.0, "end": 20.0, "output": f"clip{i}.mp4"} for i in range(4)]
+
+
+def thread_values(command):
+    return [command[i + 1] for i, arg in enumerate(command) if arg == "-threads"]
+
+
+def test_single_pass_splits_the_thread_budget_between_outputs():
+    command = build_single_pass_command("in.mp4", CLIPS, "null", threads=8)
+    assert thread_values(command) == ["2"] * 4
+    assert thread_values(build_single_pass_command("in.mp4", CLIPS, "null", threads=2)) == ["1"] * 4
+    assert thread_values(build_single_pass_command("in.mp4", CLIPS, "null")) == []
+
+
+def test_seek_command_uses_the_per_process_threads():
+    assert thread_values(build_seek_clip_command("in.mp4", CLIPS[0], "null", threads=3)) == ["3"]
+
+
+def test_budget_resizes_the_process_wide_slots():
+    jobs, threads = clip_worker_budget(SimpleNamespace(clip_jobs=3, ffmpeg_threads=2))
+    assert (jobs, threads) == (3, 2)
+    assert encode_slots.size == 3
+
+
+def test_slots_bound_concurrent_encodes_across_callers():
+    slots = EncodeSlots(2)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def encode(count):
+        count = min(count, slots.size)  # A larger request holds every slot.
+        with slots.reserve(count):
+            with lock:
+                active.append(count)
+                peak.append(sum(active))
+            time.sleep(0.02)
+            with lock:
+                active.remove(count)
+
+    threads = [threading.Thread(target=encode, args=(count,)) for count in (1, 1, 1, 5, 1)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(peak) <= 2
@@ -0,0 +1,55 @@
+from video_processing import (
+    CLIP_ENCODE_ARGS,
+    build_seek_clip_command,
+    build_single_pass_command,
+    plan_clip_extraction,
+)
+
+FILTER = "scale=1080:1920"
+
+
+def clip(start, end, output="out.mp4"):
+    return {"start": start, "end": end, "output": output}
+
+
+def test_single_clip_seeks():
+    assert plan_clip_extraction([clip(10, 40)]) == "seek"
+
+
+def test_clustered_clips_share_one_decode():
+    assert plan_clip_extraction([clip(10, 40), clip(45, 80), clip(82, 120)]) == "single_pass"
+
+
+def test_distant_clips_seek():
+    assert plan_clip_extraction([clip(10, 40), clip(1800, 1830)]) == "seek"
+
+
+def test_seek_command_seeks_on_the_input():
+    command = build_seek_clip_command("video.mp4", clip(12.5, 42.0, "clip_1.mp4"), FILTER)
+    assert command[command.index("-ss") + 1] == "12.500"
+    assert command[command.index("-t") + 1] == "29.500"
+    assert command.index("-ss") < command.index("-i")
+    assert FILTER in command[command.index("-vf") + 1]
+    assert command[-1] == "clip_1.mp4"
+
+
+def test_single_pass_trims_every_clip_from_one_input():
+    clips = [clip(100, 130, "clip_1.mp4"), clip(140, 175, "clip_2.mp4")]
+    command = build_single_pass_command("video.mp4", clips, FILTER)
+    assert command.count("-i") == 1
+    assert command[command.index("-ss") + 1] == "100.000"
+    assert command[command.index("-t") + 1] == "75.000"
+    graph = command[command.index("-filter_complex") + 1]
+    assert "split=2" in graph and "asplit=2" in graph
+    assert "trim=start=0.000:end=30.000" in graph
+    assert "trim=start=40.000:end=75.000" in graph
+    outputs = [i for i, arg in enumerate(command) if arg in ("clip_1.mp4", "clip_2.mp4")]
+    assert [command[i] for i in outputs] == ["clip_1.mp4", "clip_2.mp4"]
+    assert command.count(CLIP_ENCODE_ARGS[0]) == 2
+
+
+def test_single_pass_without_audio_maps_video_only():
+    command = build_single_pass_command("video.mp4", [clip(0, 10, "a.mp4"), clip(12, 20, "b.mp4")], FILTER, with_audio=False)
+    graph = command[command.index("-filter_complex") + 1]
+    assert "asplit" not in graph
+    assert [command[i + 1] for i, arg in enumerate(command) if arg == "-map"] == ["[vo0]", "[vo1]"]
@@ -0,0 +1,44 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from orchestrator import FULL_PIPELINE, Orchestrator
+from processors import AudioExtractionStep, CaptionGenerationStep, VideoDownloadStep
+
+
+@pytest.fixture
+def orchestrator(tmp_path, monkeypatch):
+    args = SimpleNamespace(output=str(tmp_path), filename=None, generate_captions=True, download_video=True)
+    orchestrator = Orchestrator(args)
+    monkeypatch.setattr(
+        orchestrator, "_prepare_entry", lambda url: ("abc", {"youtube_url": url, "base_filename": "abc"})
+    )
+    yield orchestrator
+    orchestrator.manifest.close()
+
+
+def test_full_pipeline_lists_each_step_once():
+    assert len(FULL_PIPELINE) == len(set(FULL_PIPELINE))
+
+
+def test_audio_does_not_wait_for_the_video(orchestrator):
+    steps = orchestrator._expand_steps([CaptionGenerationStep, VideoDownloadStep])
+    assert steps.index(AudioExtractionStep) < steps.index(CaptionGenerationStep)
+    assert VideoDownloadStep in steps
+
+
+def test_video_download_overlaps_the_audio_branch(orchestrator, monkeypatch):
+    # Both steps have to be running at the same time to get through the barrier.
+    barrier = threading.Barrier(2, timeout=5)
+    ran = []
+
+    def run(job, step_class):
+        if step_class in (AudioExtractionStep, VideoDownloadStep):
+            barrier.wait()
+        ran.append(step_class)
+
+    monkeypatch.setattr(orchestrator, "_run_job_step", run)
+    orchestrator.process_url("https://youtu.be/abc")
+    assert set(ran) == {AudioExtractionStep, CaptionGenerationStep, VideoDownloadStep}
+    assert ran.index(CaptionGenerationStep) > ran.index(AudioExtractionStep)
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+import downloads
+from downloads import DownloadProgress, backoff_delay, download_options, partial_download_files
+
+
+@pytest.fixture
+def saved():
+    return []
+
+
+def make_progress(entry, tmp_path, saved, format_selector="best"):
+    return DownloadProgress(entry, "video", format_selector, str(tmp_path), saved.append)
+
+
+def test_options_resume_and_fail_on_missing_fragments(tmp_path):
+    options = download_options("best", str(tmp_path / "v.mp4"), merge_output_format="mp4")
+    assert options["continuedl"] is True and options["nopart"] is False
+    assert options["skip_unavailable_fragments"] is False
+    assert options["merge_output_format"] == "mp4"
+
+
+def test_backoff_is_capped():
+    assert all(0 <= backoff_delay(n) <= downloads.BACKOFF_CAP_SECONDS for n in range(20))
+
+
+def test_failed_download_is_recorded_and_resumed(tmp_path, saved, capsys):
+    entry = {}
+    progress = make_progress(entry, tmp_path, saved)
+    progress.hook({"status": "finished", "filename": str(tmp_path / "v.mp4"), "downloaded_bytes": 2 ** 20})
+    progress.finish(False)
+    recorded = json.loads(entry["download_progress"])["video"]
+    assert recorded["format"] == "best"
+    assert recorded["streams"]["v.mp4"]["bytes"] == 2 ** 20
+    assert saved[-1] == {"download_progress": entry["download_progress"]}
+
+    (tmp_path / "v.mp4.part").write_bytes(b"partial")
+    assert partial_download_files(entry) == [str(tmp_path / "v.mp4.part")]
+    resumed = make_progress(entry, tmp_path, saved)
+    resumed.resume()
+    assert "Resuming the video download at 1.0 MiB" in capsys.readouterr().out
+    assert resumed.streams == recorded["streams"]
+
+    resumed.finish(True)
+    assert entry["download_progress"] is None
+
+
+def test_transfer_of_another_format_is_discarded(tmp_path, saved):
+    entry = {}
+    progress = make_progress(entry, tmp_path, saved)
+    progress.hook({"status": "finished", "filename": str(tmp_path / "v.mp4"), "downloaded_bytes": 10})
+    progress.finish(False)
+    part = tmp_path / "v.mp4.part"
+    part.write_bytes(b"partial")
+
+    make_progress(entry, tmp_path, saved, format_selector="worst").resume()
+    assert not part.exists()
+    assert entry["download_progress"] is None
@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+import pytest
+
+import gemini_client
+from gemini_client import GeminiClient, TokenBucket, is_retryable
+
+
+class ResourceExhausted(Exception):
+    pass
+
+
+class FakeModel:
+    def __init__(self, failures):
+        self.failures = list(failures)
+        self.calls = 0
+
+    def generate_content(self, contents, request_options=None):
+        self.calls += 1
+        if contents[0] == "bad":
+            raise ValueError("bad request")
+        if self.failures:
+            raise self.failures.pop(0)
+        return f"response to {contents[0]}"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(gemini_client, "BACKOFF_BASE_SECONDS", 0.001)
+    return GeminiClient(rpm=6000, tpm=10 ** 9, concurrency=2, max_retries=2)
+
+
+def use_model(client, model):
+    client._model = lambda model_name, generation_config: model
+
+
+def test_token_bucket_waits_for_the_refill():
+    async def acquire_all():
+        bucket = TokenBucket(600)  # 10 per second
+        started = time.monotonic()
+        await bucket.acquire(600)
+        await bucket.acquire(1)
+        return time.monotonic() - started
+
+    assert 0.05 <= asyncio.run(acquire_all()) < 1.0
+
+
+def test_retryable_errors():
+    assert is_retryable(ResourceExhausted())
+    assert is_retryable(type("Error", (Exception,), {"code": 503})())
+    assert not is_retryable(ValueError("bad request"))
+
+
+def test_retries_rate_limit_errors(client):
+    model = FakeModel([ResourceExhausted(), ResourceExhausted()])
+    use_model(client, model)
+    assert client.generate("model", "hello") == "response to hello"
+    assert model.calls == 3
+
+
+def test_gives_up_after_max_retries(client):
+    use_model(client, FakeModel([ResourceExhausted()] * 3))
+    with pytest.raises(ResourceExhausted):
+        client.generate("model", "hello")
+
+
+def test_generate_many_returns_errors_in_place(client):
+    use_model(client, FakeModel([]))
+    first, second, third = client.generate_many("model", ["a", "bad", "c"])
+    assert (first, third) == ("response to a", "response to c")
+    assert isinstance(second, ValueError)
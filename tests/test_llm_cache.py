@@ -0,0 +1,47 @@
+import os
+import time
+from types import SimpleNamespace
+
+from llm_cache import LLMResponseCache, llm_cache_key, llm_cache_settings
+
+
+def age(cache, key, seconds):
+    past = time.time() - seconds
+    os.utime(cache._path(key), (past, past))
+
+
+def test_key_covers_model_prompt_and_config():
+    key = llm_cache_key("gemini-a", "prompt", {"temperature": 0})
+    assert key == llm_cache_key("gemini-a", "prompt", {"temperature": 0})
+    assert key != llm_cache_key("gemini-b", "prompt", {"temperature": 0})
+    assert key != llm_cache_key("gemini-a", "other prompt", {"temperature": 0})
+    assert key != llm_cache_key("gemini-a", "prompt", {"temperature": 1})
+
+
+def test_round_trip(tmp_path):
+    cache = LLMResponseCache(str(tmp_path))
+    cache.put("k", "gemini-a", "response")
+    assert cache.get("k") == "response"
+    assert cache.get("missing") is None
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = LLMResponseCache(str(tmp_path))
+    cache.put("a", "gemini-a", "x" * 100)
+    cache.put("b", "gemini-a", "x" * 100)
+    age(cache, "a", 200)
+    age(cache, "b", 300)
+    assert cache.get("b")  # A hit makes b the most recently used.
+
+    # Room for two entries but not three; sizes differ by a few bytes of created_at.
+    cache.max_bytes = 2 * os.path.getsize(cache._path("a")) + 32
+    cache.put("c", "gemini-a", "x" * 100)
+    assert cache.get("a") is None
+    assert cache.get("b") and cache.get("c")
+
+
+def test_settings_respect_the_flags():
+    args = SimpleNamespace(effective_cache_dir="cache", llm_cache_mb=2, no_llm_cache=False)
+    assert llm_cache_settings(args) == ("cache", 2 * 1024 * 1024)
+    args.no_llm_cache = True
+    assert llm_cache_settings(args) == (None, None)
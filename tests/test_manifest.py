@@ -0,0 +1,53 @@
+import csv
+import os
+
+from manifest import Manifest
+
+
+def test_upsert_get_and_remove(tmp_path):
+    manifest = Manifest(str(tmp_path / "processing_manifest.db"))
+    manifest.upsert("abc", {"youtube_url": "https://youtu.be/abc", "status_mp3_converted": True, "unknown": 1})
+    manifest.upsert("abc", {"status_transcript_generated": False})
+    entry = manifest.get("abc")
+    assert entry["youtube_url"] == "https://youtu.be/abc"
+    assert entry["status_mp3_converted"] is True
+    assert entry["status_transcript_generated"] is False
+    assert len(manifest) == 1
+    manifest.remove("abc")
+    assert manifest.get("abc") is None
+    manifest.close()
+
+
+def test_reads_do_not_create_the_database(tmp_path):
+    manifest = Manifest(str(tmp_path / "processing_manifest.db"))
+    assert manifest.get("abc") is None
+    assert manifest.entries() == []
+    assert len(manifest) == 0
+    manifest.remove("abc")
+    manifest.close()
+    assert os.listdir(tmp_path) == []
+
+
+def test_migrates_the_legacy_csv_once(tmp_path):
+    csv_path = tmp_path / "processing_manifest.csv"
+    with open(csv_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["youtube_url", "status_mp3_converted", "mp3_path"])
+        writer.writeheader()
+        writer.writerow({
+            "youtube_url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+            "status_mp3_converted": "True",
+            "mp3_path": "nan",
+        })
+
+    manifest = Manifest(str(tmp_path / "processing_manifest.db"))
+    entry = manifest.get("dQw4w9WgXcQ")
+    assert entry["status_mp3_converted"] is True
+    assert entry["mp3_path"] is None
+    manifest.remove("dQw4w9WgXcQ")
+    manifest.close()
+
+    # The migration is recorded, so a removed entry does not come back.
+    reopened = Manifest(str(tmp_path / "processing_manifest.db"))
+    assert reopened.get("dQw4w9WgXcQ") is None
+    assert csv_path.exists()
+    reopened.close()
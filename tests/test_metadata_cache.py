@@ -0,0 +1,62 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+import youtube_utils
+from orchestrator import Orchestrator
+
+
+class FakeYoutubeDL:
+    calls = []
+
+    def __init__(self, opts):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, url, download=False):
+        FakeYoutubeDL.calls.append(url)
+        return {"id": "resolved123", "title": "A Title", "webpage_url": "https://www.youtube.com/watch?v=resolved123"}
+
+
+@pytest.fixture
+def fake_yt_dlp(monkeypatch):
+    FakeYoutubeDL.calls = []
+    monkeypatch.setitem(sys.modules, "yt_dlp", SimpleNamespace(YoutubeDL=FakeYoutubeDL))
+    return FakeYoutubeDL
+
+
+UNRECOGNIZED_URL = "https://example.com/embed/some-video"
+
+
+def test_record_is_keyed_by_resolved_id(tmp_path, fake_yt_dlp):
+    info = youtube_utils.get_video_info(UNRECOGNIZED_URL, str(tmp_path))
+    assert info["id"] == "resolved123"
+    cached = youtube_utils.get_video_info(UNRECOGNIZED_URL, str(tmp_path), video_id=info["id"])
+    assert cached["title"] == "A Title"
+    assert fake_yt_dlp.calls == [UNRECOGNIZED_URL]
+
+
+def test_recognized_url_hits_the_cache(tmp_path, fake_yt_dlp):
+    youtube_utils.get_video_info(UNRECOGNIZED_URL, str(tmp_path))
+    youtube_utils.get_video_info("https://youtu.be/resolved123", str(tmp_path))
+    assert len(fake_yt_dlp.calls) == 1
+
+
+def test_new_entry_extracts_once(tmp_path, fake_yt_dlp):
+    args = SimpleNamespace(
+        output=str(tmp_path), filename=None, effective_cache_dir=str(tmp_path), metadata_ttl_seconds=None
+    )
+    orchestrator = Orchestrator(args)
+    try:
+        video_id, entry = orchestrator._prepare_entry(UNRECOGNIZED_URL)
+    finally:
+        orchestrator.manifest.close()
+    assert video_id == "resolved123"
+    assert entry["youtube_url"] == "https://www.youtube.com/watch?v=resolved123"
+    assert fake_yt_dlp.calls == [UNRECOGNIZED_URL]
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+import pytest
+
+from orchestrator import Orchestrator
+from processors import AudioExtractionStep, CaptionGenerationStep
+
+
+@pytest.fixture
+def orchestrator(tmp_path, monkeypatch):
+    args = SimpleNamespace(output=str(tmp_path), filename=None, generate_captions=True)
+    orchestrator = Orchestrator(args)
+    monkeypatch.setattr(
+        orchestrator, "_prepare_entry", lambda url: ("abc", {"youtube_url": url, "base_filename": "abc"})
+    )
+    yield orchestrator
+    orchestrator.manifest.close()
+
+
+def run_steps(failing=()):
+    def run(job, step_class):
+        if step_class in failing:
+            raise RuntimeError(f"{step_class.__name__} failed")
+    return run
+
+
+def test_successful_run_reports_success(orchestrator, monkeypatch, capsys):
+    monkeypatch.setattr(orchestrator, "_run_job_step", run_steps())
+    assert orchestrator.process_url("https://youtu.be/abc") is True
+    assert "Orchestration complete" in capsys.readouterr().out
+
+
+def test_failed_step_fails_the_run(orchestrator, monkeypatch, capsys):
+    monkeypatch.setattr(orchestrator, "_run_job_step", run_steps(failing={AudioExtractionStep}))
+    assert orchestrator.process_url("https://youtu.be/abc") is False
+    out = capsys.readouterr().out
+    assert "Orchestration complete" not in out
+    assert "AudioExtractionStep, CaptionGenerationStep" in out
+
+
+def test_successful_batch_reports_success(orchestrator, monkeypatch, capsys):
+    monkeypatch.setattr(orchestrator, "_run_job_step", run_steps())
+    assert orchestrator.process_urls(["https://youtu.be/abc"]) is True
+    assert "1/1 video(s) fully processed" in capsys.readouterr().out
+
+
+def test_batch_reports_incomplete_videos(orchestrator, monkeypatch, capsys):
+    monkeypatch.setattr(orchestrator, "_prepare_entry", lambda url: (url[-3:], {"youtube_url": url}))
+    monkeypatch.setattr(orchestrator, "_run_job_step", run_steps(failing={CaptionGenerationStep}))
+    assert orchestrator.process_urls(["https://youtu.be/aaa", "https://youtu.be/bbb"]) is False
+    out = capsys.readouterr().out
+    assert "0/2 video(s) fully processed" in out
+    assert "not completed: CaptionGenerationStep" in out
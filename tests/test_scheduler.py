@@ -0,0 +1,65 @@
+import threading
+
+from scheduler import DagScheduler
+
+
+def test_runs_nodes_after_their_dependencies():
+    order = []
+    scheduler = DagScheduler()
+    scheduler.add("a", lambda: order.append("a"))
+    scheduler.add("b", lambda: order.append("b"), deps=["a"])
+    scheduler.add("c", lambda: order.append("c"), deps=["a", "b"])
+    assert scheduler.run() == {"a": "done", "b": "done", "c": "done"}
+    assert order == ["a", "b", "c"]
+
+
+def test_failure_skips_dependents_transitively():
+    def fail():
+        raise RuntimeError("boom")
+
+    scheduler = DagScheduler()
+    scheduler.add("a", fail)
+    scheduler.add("b", lambda: None, deps=["a"])
+    scheduler.add("c", lambda: None, deps=["b"])
+    scheduler.add("other", lambda: None)
+    assert scheduler.run() == {"a": "failed", "b": "skipped", "c": "skipped", "other": "done"}
+
+
+def test_run_on_failure_nodes_still_run():
+    ran = []
+
+    def fail():
+        raise RuntimeError("boom")
+
+    scheduler = DagScheduler()
+    scheduler.add("a", fail)
+    scheduler.add("b", lambda: None, deps=["a"])
+    scheduler.add("save", lambda: ran.append("save"), deps=["a", "b"], run_on_failure=True)
+    statuses = scheduler.run()
+    assert statuses["save"] == "done"
+    assert ran == ["save"]
+
+
+def test_unknown_dependency_is_rejected():
+    scheduler = DagScheduler()
+    try:
+        scheduler.add("b", lambda: None, deps=["a"])
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("expected KeyError")
+
+
+def test_callable_resource_picks_the_pool_when_ready():
+    pools = {}
+    choice = {}
+
+    def record(key):
+        pools[key] = threading.current_thread().name.split("-pool")[0]
+
+    scheduler = DagScheduler()
+    scheduler.add("first", lambda: choice.update(resource="ffmpeg"))
+    scheduler.add("second", lambda: record("second"), deps=["first"], resource=lambda: choice["resource"])
+    scheduler.add("unknown", lambda: record("unknown"), resource="gpu")
+    scheduler.run()
+    assert pools == {"second": "ffmpeg", "unknown": "local"}
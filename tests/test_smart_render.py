@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+import keyframe_index
+import video_processing
+from keyframe_index import gop_interior
+from video_processing import _edge_encode_args, can_smart_render, smart_render_clip, smart_render_plan
+
+KEYFRAMES = [0.0, 2.0, 4.0, 6.0, 8.0]
+STREAM = {
+    "codec_name": "h264", "profile": "High", "level": 41, "pix_fmt": "yuv420p",
+    "width": 1920, "height": 1080, "r_frame_rate": "30/1", "time_base": "1/15360",
+}
+
+
+def test_gop_interior():
+    assert gop_interior(KEYFRAMES, 1.0, 7.0) == (2.0, 6.0)
+    assert gop_interior(KEYFRAMES, 2.0, 6.0) == (2.0, 6.0)
+    assert gop_interior(KEYFRAMES, 2.5, 3.5) is None
+
+
+def test_plan_encodes_partial_gops_and_copies_the_interior():
+    assert smart_render_plan(KEYFRAMES, 1.0, 7.5) == [("encode", 1.0, 2.0), ("copy", 2.0, 6.0), ("encode", 6.0, 7.5)]
+    assert smart_render_plan(KEYFRAMES, 2.0, 6.0) == [("copy", 2.0, 6.0)]
+    assert smart_render_plan(KEYFRAMES, 2.5, 3.5) is None
+
+
+def test_edges_are_encoded_with_the_source_parameters():
+    args = _edge_encode_args(STREAM, threads=2)
+    assert args[args.index("-profile:v") + 1] == "high"
+    assert args[args.index("-level:v") + 1] == "4.1"
+    assert args[args.index("-pix_fmt") + 1] == "yuv420p"
+    assert args[args.index("-threads") + 1] == "2"
+
+
+def test_only_reproducible_h264_profiles_are_smart_rendered():
+    assert can_smart_render({"stream": STREAM, "keyframes": KEYFRAMES})
+    assert not can_smart_render({"stream": dict(STREAM, profile="High 4:4:4 Intra"), "keyframes": KEYFRAMES})
+    assert not can_smart_render({"stream": dict(STREAM, codec_name="vp9"), "keyframes": KEYFRAMES})
+
+
+@pytest.fixture
+def ffmpeg(monkeypatch):
+    """Records ffmpeg commands and writes their outputs; edge parts get `edge_stream`."""
+    state = {"commands": [], "edge_stream": dict(STREAM), "duration": 6.5}
+
+    def run(command, **kwargs):
+        state["commands"].append(command)
+        if command[0] == "ffprobe":
+            return type("Result", (), {"stdout": f"{state['duration']}\n"})()
+        if "-f" in command and command[command.index("-f") + 1] == "concat":
+            with open(command[command.index("-i") + 1], encoding="utf-8") as f:
+                state["concat_list"] = f.read()
+        with open(command[-1], "w") as f:
+            f.write("copy" if "copy" in command[:-1] else "encode")
+
+    def probe_stream(path):
+        with open(path) as f:
+            return dict(STREAM) if f.read() == "copy" else state["edge_stream"]
+
+    monkeypatch.setattr(video_processing.subprocess, "run", run)
+    monkeypatch.setattr(keyframe_index, "_probe_stream", probe_stream)
+    return state
+
+
+def test_parts_are_concatenated_in_plan_order(tmp_path, ffmpeg):
+    clip = {"start": 1.0, "end": 7.5, "output": str(tmp_path / "clip.mp4")}
+    assert smart_render_clip("in.mp4", clip, {"stream": STREAM, "keyframes": KEYFRAMES}, with_audio=False)
+    listed = [line.split("'")[1] for line in ffmpeg["concat_list"].splitlines()]
+    assert [os.path.basename(path) for path in listed] == ["clip.mp4.part0.ts", "clip.mp4.part1.ts", "clip.mp4.part2.ts"]
+    concat = ffmpeg["commands"][-2]
+    assert concat[concat.index("-video_track_timescale") + 1] == "15360"
+    assert sorted(os.listdir(tmp_path)) == ["clip.mp4"]
+
+
+def test_mismatched_edge_falls_back_to_a_full_encode(tmp_path, ffmpeg):
+    ffmpeg["edge_stream"] = dict(STREAM, level=40)
+    clip = {"start": 1.0, "end": 7.5, "output": str(tmp_path / "clip.mp4")}
+    assert not smart_render_clip("in.mp4", clip, {"stream": STREAM, "keyframes": KEYFRAMES}, with_audio=False)
+    assert os.listdir(tmp_path) == []
+
+
+def test_join_of_the_wrong_duration_is_rejected(tmp_path, ffmpeg):
+    ffmpeg["duration"] = 4.0
+    clip = {"start": 1.0, "end": 7.5, "output": str(tmp_path / "clip.mp4")}
+    assert not smart_render_clip("in.mp4", clip, {"stream": STREAM, "keyframes": KEYFRAMES}, with_audio=False)
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,43 @@
+import subprocess
+import sys
+
+import pytest
+
+from bench_startup import COMMANDS, HEAVY_MODULES, REPO_DIR
+
+# Records import attempts, so the check holds whether or not the heavy packages are installed.
+PROBE = """
+import sys
+heavy = {heavy!r}
+attempted = []
+
+class Recorder:
+    def find_spec(self, name, path=None, target=None):
+        if any(name == m or name.startswith(m + ".") for m in heavy):
+            attempted.append(name)
+        return None
+
+sys.meta_path.insert(0, Recorder())
+sys.path.insert(0, {repo!r})
+sys.argv = ["main.py"] + {argv!r}
+import main
+try:
+    main.main()
+except SystemExit:
+    pass
+print("ATTEMPTED:" + ",".join(sorted(set(attempted))))
+"""
+
+
+@pytest.mark.parametrize("argv", list(COMMANDS.values()), ids=list(COMMANDS))
+def test_cli_does_not_import_heavy_modules(argv, tmp_path):
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(heavy=HEAVY_MODULES, repo=REPO_DIR, argv=argv)],
+        cwd=tmp_path,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    lines = [line for line in result.stdout.splitlines() if line.startswith("ATTEMPTED:")]
+    assert lines, result.stderr
+    assert lines[0] == "ATTEMPTED:"
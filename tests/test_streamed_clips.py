@@ -0,0 +1,63 @@
+import os
+import threading
+from types import SimpleNamespace
+
+from processors.streamed_clip_render import StreamedClipRenderStep
+from processors.streaming_clips import SegmentChannel
+
+
+class FakeClipStep:
+    """Writes an empty file per clip, as a clip step's render_clips would."""
+
+    directory = None
+
+    def __init__(self, entry, args):
+        self.entry = entry
+
+    @property
+    def is_complete(self):
+        return False
+
+    def clip_for(self, number, segment):
+        return {"output": os.path.join(self.directory, f"clip_{number}.mp4")}
+
+    def render_clips(self, clips):
+        for clip in clips:
+            open(clip["output"], "w").close()
+
+
+def test_channel_yields_until_closed_and_keeps_the_first_outcome():
+    channel = SegmentChannel()
+    channel.put(1, "a")
+    channel.close(True)
+    channel.close(False)
+    assert list(channel) == [(1, "a")]
+    assert channel.accepted is True
+
+
+def render_stream(tmp_path, accepted):
+    FakeClipStep.directory = str(tmp_path)
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"video")
+    args = SimpleNamespace(streamed_clip_steps=[FakeClipStep], clip_jobs=2, ffmpeg_threads=1)
+    step = StreamedClipRenderStep({"video_path": str(video)}, args)
+    step.channel = SegmentChannel()
+
+    def analysis():
+        for number in (1, 2):
+            step.channel.put(number, {})
+        step.channel.close(accepted)
+
+    streaming = threading.Thread(target=analysis)
+    streaming.start()
+    step.process()
+    streaming.join()
+    return sorted(name for name in os.listdir(tmp_path) if name.startswith("clip_"))
+
+
+def test_renders_every_streamed_segment(tmp_path):
+    assert render_stream(tmp_path, accepted=True) == ["clip_1.mp4", "clip_2.mp4"]
+
+
+def test_clips_of_a_rejected_stream_are_removed(tmp_path):
+    assert render_stream(tmp_path, accepted=False) == []
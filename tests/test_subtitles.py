@@ -0,0 +1,67 @@
+from subtitles import AssDocument, format_ass_time, parse_ass_time, seconds_to_srt_time
+from video_processing import SUBTITLES_FROM_STDIN, build_seek_clip_command, build_single_pass_command
+
+ASS = """[Script Info]
+ScriptType: v4.00+
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, Alignment
+Style: Default,Arial,48,2
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+Dialogue: 0,0:00:01.00,0:00:03.00,Default,,0,0,0,,first, with a comma
+Comment: 0,0:00:02.00,0:00:03.00,Default,,0,0,0,,ignored
+Dialogue: 0,0:00:09.00,0:00:12.50,Default,,0,0,0,,straddles
+Dialogue: 0,0:00:20.00,0:00:21.00,Default,,0,0,0,,after
+Dialogue: 0,0:00:05.00,0:00:04.00,Default,,0,0,0,,empty
+"""
+
+
+def dialogue_lines(text):
+    return [line for line in text.splitlines() if line.startswith("Dialogue:")]
+
+
+def test_times_round_trip():
+    assert parse_ass_time("1:02:03.45") == 3723.45
+    assert format_ass_time(3723.45) == "1:02:03.45"
+    assert format_ass_time(-1) == "0:00:00.00"
+    assert seconds_to_srt_time(3723.4567) == "01:02:03,457"
+
+
+def test_parses_dialogue_events_only():
+    document = AssDocument.from_text(ASS)
+    assert len(document) == 3
+    assert document.events[0].fields[-1] == "first, with a comma"
+
+
+def test_slice_clips_events_to_the_window():
+    document = AssDocument.from_text(ASS)
+    assert [e.fields[-1] for e in document.events_between(10, 15)] == ["straddles"]
+    sliced = document.slice(10, 15)
+    assert dialogue_lines(sliced) == ["Dialogue: 0,0:00:00.00,0:00:02.50,Default,,0,0,0,,straddles"]
+    assert "Style: Default,Arial,48,2" in sliced
+
+
+def test_slice_ends_are_exclusive():
+    document = AssDocument.from_text(ASS)
+    assert dialogue_lines(document.slice(3, 9)) == []
+    assert len(dialogue_lines(AssDocument.from_text(ASS).slice(0, 30))) == 3
+
+
+def test_restyle_overrides_style_fields():
+    document = AssDocument.from_text(ASS).restyle(Fontsize=12)
+    assert "Style: Default,Arial,12,2" in document.slice(0, 1)
+
+
+def test_seek_clip_burns_subtitles_from_stdin_in_the_same_encode():
+    command = build_seek_clip_command("video.mp4", {"start": 1, "end": 5, "output": "a.mp4"}, "scale=1080:1920", subtitles=True)
+    assert command[command.index("-vf") + 1] == f"scale=1080:1920,{SUBTITLES_FROM_STDIN}"
+
+
+def test_single_pass_burns_subtitles_once_before_the_split():
+    clips = [{"start": 1, "end": 5, "output": "a.mp4"}, {"start": 6, "end": 9, "output": "b.mp4"}]
+    command = build_single_pass_command("video.mp4", clips, "scale=1080:1920", subtitles=True)
+    graph = command[command.index("-filter_complex") + 1]
+    assert graph.count(SUBTITLES_FROM_STDIN) == 1
+    assert graph.index(SUBTITLES_FROM_STDIN) < graph.index("split")
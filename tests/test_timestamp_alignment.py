@@ -0,0 +1,63 @@
+from timestamp_alignment import (
+    CueAligner,
+    align_viral_timestamps,
+    normalize_tokens,
+    parse_analysis_segments,
+    seconds_to_srt_time,
+)
+
+
+def words_of(text, start=0.0, step=0.5):
+    return [[start + i * step, start + i * step + 0.4, f" {word}", 0.9] for i, word in enumerate(text.split())]
+
+
+WORDS = words_of(
+    "so today we talk about money. the first rule is never lose money. "
+    "the second rule is never forget the first rule. thanks for watching everyone"
+)
+
+ANALYSIS = """**Segment 1**
+**Start Cue:** "The first rule is never"
+**End Cue:** "[12] forget the first rule."
+
+**Segment 2**
+Start Cue: thanks for watching
+End Cue: watching everyone
+"""
+
+
+def test_normalize_tokens():
+    assert normalize_tokens("Don’t STOP, it's fine!") == ["dont", "stop", "its", "fine"]
+
+
+def test_parses_cues_per_segment():
+    assert parse_analysis_segments(ANALYSIS) == [
+        {"start_cue": "The first rule is never", "end_cue": "forget the first rule."},
+        {"start_cue": "thanks for watching", "end_cue": "watching everyone"},
+    ]
+    assert parse_analysis_segments("**Segment 1**\nStart Cue: only a start") == []
+
+
+def test_find_prefers_matches_after_min_position():
+    aligner = CueAligner(WORDS)
+    first = aligner.find("the first rule")
+    assert first[:2] == (6, 8) and first[2] == 1.0
+    assert aligner.find("the first rule", min_position=first[0] + 1)[:2] == (19, 21)
+    assert aligner.find("completely unrelated words") is None
+
+
+def test_find_tolerates_small_wording_differences():
+    match = CueAligner(WORDS).find("the second rule was never forget")
+    assert match[0] == 13 and match[2] > 0.8
+
+
+def test_aligns_segments_to_word_times():
+    assert align_viral_timestamps(ANALYSIS, WORDS) == {"segments": [
+        {"start_time": seconds_to_srt_time(3.0), "end_time": seconds_to_srt_time(10.9)},
+        {"start_time": seconds_to_srt_time(11.0), "end_time": seconds_to_srt_time(12.9)},
+    ]}
+
+
+def test_unmatched_cue_fails_the_whole_alignment():
+    analysis = ANALYSIS + "\n**Segment 3**\nStart Cue: nothing like this\nEnd Cue: was ever said\n"
+    assert align_viral_timestamps(analysis, WORDS) is None
@@ -0,0 +1,63 @@
+import pytest
+
+from transcript import SRT_HIGHLIGHT, Transcript, write_transcript
+
+RESULT = {
+    "language": "en",
+    "segments": [
+        {"start": 0.0, "end": 2.0, "text": " Hello world", "words": [
+            {"start": 0.0, "end": 0.8, "word": " Hello", "probability": 0.9},
+            {"start": 1.0, "end": 1.8, "word": " world", "probability": 0.8},
+        ]},
+        {"start": 5.0, "end": 7.0, "text": " Second one", "words": [
+            {"start": 5.0, "end": 5.5, "word": " Second", "probability": 0.9},
+            {"start": 6.0, "end": 6.5, "word": " one", "probability": 0.9},
+        ]},
+        {"start": None, "end": 8.0, "text": " dropped"},
+    ],
+}
+
+
+@pytest.fixture
+def transcript(tmp_path):
+    transcript = Transcript(write_transcript(RESULT, str(tmp_path / "video.words.jsonl")))
+    yield transcript
+    transcript.close()
+
+
+def test_reads_back_segments(transcript):
+    assert len(transcript) == 2
+    assert transcript.language == "en"
+    assert transcript.duration == 7.0
+    assert transcript.segment(1)["text"] == " Second one"
+
+
+def test_range_queries(transcript):
+    assert [s["start"] for s in transcript.segments(1.5, 5.2)] == [0.0, 5.0]
+    assert transcript.segments(2.0, 5.0) == []
+    assert [w[2] for w in transcript.words(1.5, 5.2)] == [" world", " Second"]
+
+
+def test_rejects_other_versions(tmp_path):
+    path = tmp_path / "old.words.jsonl"
+    path.write_text('{"version": 0}\n')
+    with pytest.raises(ValueError):
+        Transcript(str(path))
+
+
+def test_srt_is_timed_from_the_window_start(transcript):
+    assert transcript.to_srt(5.0, 6.0) == "1\n00:00:00,000 --> 00:00:01,000\nSecond one\n"
+
+
+def test_word_level_srt_highlights_each_word(transcript):
+    cues = transcript.to_srt(end=2.0, word_level=True).split("\n\n")
+    opening, closing = SRT_HIGHLIGHT
+    assert cues[0] == f"1\n00:00:00,000 --> 00:00:01,000\n{opening}Hello{closing} world"
+    assert cues[1] == f"2\n00:00:01,000 --> 00:00:02,000\nHello {opening}world{closing}\n"
+
+
+def test_ass_highlights_words_and_applies_style(transcript):
+    ass = transcript.to_ass(5.0, 7.0, style={"Fontsize": 12})
+    dialogues = [line for line in ass.splitlines() if line.startswith("Dialogue:")]
+    assert dialogues[0] == "Dialogue: 0,0:00:00.00,0:00:01.00,Default,,0,0,0,,{\\1c&H00ff00&}Second{\\r} one"
+    assert ",12," in next(line for line in ass.splitlines() if line.startswith("Style:"))
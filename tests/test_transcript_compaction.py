@@ -0,0 +1,45 @@
+from transcript import Transcript, write_transcript
+from transcript_compaction import CompactTranscript, compact_lines, compact_transcript
+
+
+def words_of(text, start=0.0, step=1.0):
+    return [[start + i * step, start + i * step + 0.5, f" {word}", 0.9] for i, word in enumerate(text.split())]
+
+
+def test_drops_fillers_and_stutters_but_keeps_punctuation():
+    lines = compact_lines(words_of("I I I um think so uh. Then more"), max_line_seconds=60)
+    assert lines == [(0.0, 8.5, "I think so. Then more")]
+
+
+def test_breaks_after_sentences_and_past_the_maximum():
+    words = words_of("one two three four five. six seven eight nine ten eleven twelve thirteen")
+    lines = compact_lines(words, max_line_seconds=6)
+    assert [text for _, _, text in lines] == ["one two three four five.", "six seven eight nine ten eleven twelve", "thirteen"]
+    assert lines[1][:2] == (5.0, 11.5)
+
+
+def test_repeated_lines_are_kept_once():
+    lines = compact_lines(words_of("Thank you. Thank you. Bye now."), max_line_seconds=3)
+    assert [text for _, _, text in lines] == ["Thank you.", "Bye now."]
+
+
+def test_anchors_map_to_exact_times():
+    compact = CompactTranscript([(0.4, 9.5, "a"), (10.2, 19.8, "b"), (30.7, 35.0, "c")])
+    assert compact.text == "[0] a\n[10] b\n[30] c"
+    assert compact.start_time(10) == 10.2
+    assert compact.start_time(25) == 10.2
+    assert compact.end_time(31) == 35.0
+    assert compact.end_time(5) == 9.5
+
+
+def test_coarser_lines_when_over_budget(tmp_path):
+    words = words_of(" ".join(f"word{i}." for i in range(400)), step=2.0)
+    segment = {"start": 0.0, "end": 800.0, "text": "", "words": [
+        {"start": w[0], "end": w[1], "word": w[2], "probability": w[3]} for w in words
+    ]}
+    transcript = Transcript(write_transcript({"segments": [segment]}, str(tmp_path / "t.words.jsonl")))
+    fine = compact_transcript(transcript, token_budget=10 ** 6)
+    coarse = compact_transcript(transcript, token_budget=fine.tokens() - 200)
+    transcript.close()
+    assert len(coarse.lines) < len(fine.lines)
+    assert coarse.tokens() < fine.tokens()
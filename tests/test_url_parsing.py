@@ -0,0 +1,37 @@
+import pytest
+
+from url_parsing import canonical_watch_url, extract_video_id
+
+VIDEO_ID = "dQw4w9WgXcQ"
+
+
+@pytest.mark.parametrize("url", [
+    VIDEO_ID,
+    f"https://www.youtube.com/watch?v={VIDEO_ID}",
+    f"https://m.youtube.com/watch?v={VIDEO_ID}&t=42s&list=PL123",
+    f"https://music.youtube.com/watch?si=abc&v={VIDEO_ID}",
+    f"youtube.com/watch?v={VIDEO_ID}",
+    f"https://youtu.be/{VIDEO_ID}?si=xyz",
+    f"https://www.youtube.com/shorts/{VIDEO_ID}",
+    f"https://www.youtube-nocookie.com/embed/{VIDEO_ID}",
+    f"https://www.youtube.com/live/{VIDEO_ID}?feature=share",
+    f"  https://www.youtube.com/v/{VIDEO_ID}  ",
+])
+def test_extracts_the_video_id(url):
+    assert extract_video_id(url) == VIDEO_ID
+
+
+@pytest.mark.parametrize("url", [
+    None,
+    "",
+    "https://example.com/watch?v=dQw4w9WgXcQ",
+    "https://www.youtube.com/watch?v=short",
+    "https://www.youtube.com/channel/UC1234567890",
+    "https://notyoutube.com/watch?v=dQw4w9WgXcQ",
+])
+def test_rejects_other_urls(url):
+    assert extract_video_id(url) is None
+
+
+def test_canonical_watch_url_round_trips():
+    assert extract_video_id(canonical_watch_url(VIDEO_ID)) == VIDEO_ID
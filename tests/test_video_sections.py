@@ -0,0 +1,64 @@
+import json
+
+from video_sections import clip_sources, has_clip_source, load_sections, plan_sections, sections_cover
+
+
+def test_plans_padded_merged_ranges():
+    segments = [
+        {"start_time": "00:01:00,000", "end_time": "00:01:30,000"},
+        {"start_time": "00:01:35,000", "end_time": "00:01:50,000"},
+        {"start_time": "00:00:02,000", "end_time": "00:00:10,000"},
+        {"start_time": None, "end_time": "00:00:05,000"},
+    ]
+    # Clip windows gain 1 s, then the section margin of 5 s, on each side.
+    assert plan_sections(segments, duration=112) == [(0, 16), (54, 112)]
+
+
+def test_sections_cover():
+    sections = [{"start": 0, "end": 16}, {"start": 54, "end": 112}]
+    assert sections_cover(sections, [(1, 11), (59, 111)])
+    assert not sections_cover(sections, [(10, 60)])
+
+
+def sections_entry(tmp_path):
+    paths = []
+    for name in ("a.mp4", "b.mp4"):
+        path = tmp_path / name
+        path.write_bytes(b"")
+        paths.append(str(path))
+    sections = [
+        {"start": 0, "end": 16, "path": paths[0]},
+        {"start": 54, "end": 112, "path": paths[1]},
+        {"start": 200, "end": 210, "path": str(tmp_path / "missing.mp4")},
+    ]
+    return {"video_sections": json.dumps(sections)}, paths
+
+
+def test_load_sections_skips_missing_files(tmp_path):
+    entry, paths = sections_entry(tmp_path)
+    assert [s["path"] for s in load_sections(entry)] == paths
+    assert load_sections({"video_sections": "not json"}) == []
+
+
+def test_clips_are_cut_from_their_section(tmp_path):
+    entry, paths = sections_entry(tmp_path)
+    clips = [
+        {"start": 60, "end": 90, "output": "1.mp4"},
+        {"start": 1, "end": 11, "output": "2.mp4"},
+        {"start": 100, "end": 130, "output": "3.mp4"},
+    ]
+    assert clip_sources(entry, clips) == [
+        (paths[1], 54, [{"start": 6, "end": 36, "output": "1.mp4"}]),
+        (paths[0], 0, [{"start": 1, "end": 11, "output": "2.mp4"}]),
+    ]
+    assert has_clip_source(entry)
+
+
+def test_full_video_takes_precedence(tmp_path):
+    entry, _ = sections_entry(tmp_path)
+    video = tmp_path / "full.mp4"
+    video.write_bytes(b"")
+    entry["video_path"] = str(video)
+    clips = [{"start": 100, "end": 130, "output": "3.mp4"}]
+    assert clip_sources(entry, clips) == [(str(video), 0, clips)]
+    assert not has_clip_source({"video_path": str(tmp_path / "gone.mp4")})
@@ -0,0 +1,58 @@
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from audio_processing import WhisperModelRegistry
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    loaded = []
+
+    def load_model(name, device=None, **options):
+        loaded.append(name)
+        time.sleep(0.01)
+        return SimpleNamespace(name=name)  # No parameters(): sized from WHISPER_MODEL_SIZES_MB.
+
+    monkeypatch.setitem(sys.modules, "stable_whisper", SimpleNamespace(load_model=load_model))
+    return loaded
+
+
+def test_model_is_loaded_once(loads):
+    registry = WhisperModelRegistry()
+    assert registry.get("tiny") is registry.get("tiny")
+    assert loads == ["tiny"]
+
+
+def test_concurrent_callers_share_one_load(loads):
+    registry = WhisperModelRegistry()
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(registry.get("base"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loads == ["base"]
+    assert all(model is models[0] for model in models)
+
+
+def test_load_options_are_part_of_the_key(loads):
+    registry = WhisperModelRegistry()
+    registry.get("tiny", device="cpu")
+    registry.get("tiny", device="cuda")
+    assert loads == ["tiny", "tiny"]
+
+
+def test_least_recently_used_model_is_evicted(loads):
+    registry = WhisperModelRegistry(budget_mb=1200)  # small (970) fits next to tiny (150), not base (290).
+    registry.get("tiny")
+    registry.get("base")
+    registry.get("tiny")  # base is now the least recently used.
+    registry.get("small")
+    registry.get("tiny")
+    assert loads == ["tiny", "base", "small"]
+    registry.get("base")
+    assert loads == ["tiny", "base", "small", "base"]
@@ -0,0 +1,147 @@
+import re
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+
+from processors.base import Colors
+from subtitles import seconds_to_srt_time
+
+# --- Local Cue-Phrase Alignment ---
+#
+# The viral analysis quotes a "Start Cue" and "End Cue" phrase for every segment.
+# Instead of asking the LLM to find those phrases in the SRT, they are located in the
+# word-level transcript: candidate positions come from an n-gram index (each cue
+# n-gram votes for where the cue would begin), and the best candidate is scored by
+# fuzzy similarity so Whisper's small wording differences still match.
+
+NGRAM_SIZE = 3
+# Below this similarity between a cue and the transcript words it matched, the
+# whole extraction falls back to the LLM.
+MIN_CONFIDENCE = 0.6
+MAX_CLIP_SECONDS = 180
+
+_SEGMENT_HEADER_RE = re.compile(r"\*\*\s*Segment\s*\[?\d+\]?\s*\*\*", re.IGNORECASE)
+_CUE_RE = {
+    "start": re.compile(r"Start\s+Cue[^:\n]*:\**\s*(.+)", re.IGNORECASE),
+    "end": re.compile(r"End\s+Cue[^:\n]*:\**\s*(.+)", re.IGNORECASE),
+}
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z0-9]+)?")
+
+
+def normalize_tokens(text):
+    """Lowercased word tokens without punctuation (apostrophes inside words are dropped)."""
+    return [token.replace("'", "") for token in _TOKEN_RE.findall(text.lower().replace("’", "'"))]
+
+
+_ANCHOR_RE = re.compile(r"\[\d+\]\s*")
+
+
+def _clean_cue(raw):
+    # Drop any "[754]" line anchors of a compact transcript the model copied into the cue.
+    return _ANCHOR_RE.sub("", raw.strip().strip("*").strip().strip('"“”')).strip()
+
+
+def parse_analysis_segments(analysis_text):
+    """
+    Extracts [{"start_cue", "end_cue"}] from the viral analysis markdown, one per
+    "**Segment N**" block that has both cues.
+    """
+    segments = []
+    blocks = _SEGMENT_HEADER_RE.split(analysis_text)[1:]
+    for block in blocks:
+        cues = {}
+        for name, pattern in _CUE_RE.items():
+            match = pattern.search(block)
+            if match:
+                cues[name] = _clean_cue(match.group(1))
+        if cues.get("start") and cues.get("end"):
+            segments.append({"start_cue": cues["start"], "end_cue": cues["end"]})
+    return segments
+
+
+class CueAligner:
+    """Fuzzy phrase search over transcript words ([start, end, word, probability] entries)."""
+
+    def __init__(self, words, ngram_size=NGRAM_SIZE):
+        self.tokens = []
+        self.starts = []
+        self.ends = []
+        for start, end, word, _ in words:
+            for token in normalize_tokens(word):
+                self.tokens.append(token)
+                self.starts.append(start)
+                self.ends.append(end)
+        self.ngram_size = ngram_size
+        self._indexes = {}
+
+    def _index(self, n):
+        if n not in self._indexes:
+            index = defaultdict(list)
+            for i in range(len(self.tokens) - n + 1):
+                index[tuple(self.tokens[i:i + n])].append(i)
+            self._indexes[n] = index
+        return self._indexes[n]
+
+    def find(self, phrase, min_position=0):
+        """
+        Returns (first token position, last token position, confidence) of the best
+        match for `phrase` at or after `min_position`, or None if nothing matches.
+        """
+        cue = normalize_tokens(phrase)
+        if not cue or not self.tokens:
+            return None
+        n = min(self.ngram_size, len(cue))
+        index = self._index(n)
+
+        votes = Counter()
+        for offset in range(len(cue) - n + 1):
+            for position in index.get(tuple(cue[offset:offset + n]), ()):
+                candidate = position - offset
+                if candidate >= min_position:
+                    votes[max(candidate, 0)] += 1
+        if not votes:
+            return None
+
+        best = None
+        top = max(votes.values())
+        for candidate, count in votes.items():
+            if count < top / 2:
+                continue
+            window = self.tokens[candidate:candidate + len(cue)]
+            confidence = SequenceMatcher(None, cue, window, autojunk=False).ratio()
+            # Prefer the earliest of equally good matches, i.e. the one nearest `min_position`.
+            if best is None or confidence > best[2] or (confidence == best[2] and candidate < best[0]):
+                best = (candidate, min(candidate + len(cue), len(self.tokens)) - 1, confidence)
+        return best
+
+
+def align_viral_timestamps(analysis_text, words, min_confidence=MIN_CONFIDENCE):
+    """
+    Maps the analysis' Start/End Cue phrases onto transcript times. Returns
+    {"segments": [{"start_time", "end_time"}, ...]} in the format the LLM produced,
+    or None if any segment could not be aligned with enough confidence.
+    """
+    segments = parse_analysis_segments(analysis_text)
+    if not segments:
+        print(f"{Colors.WARNING}[WARNING]{Colors.RESET} No Start/End cues found in the analysis.")
+        return None
+
+    aligner = CueAligner(words)
+    aligned = []
+    for number, segment in enumerate(segments, 1):
+        start_match = aligner.find(segment["start_cue"])
+        end_match = aligner.find(segment["end_cue"], start_match[0]) if start_match else None
+        if not start_match or not end_match:
+            print(f"{Colors.WARNING}[WARNING]{Colors.RESET} Could not locate the cues of segment {number} in the transcript.")
+            return None
+
+        start_time = aligner.starts[start_match[0]]
+        end_time = aligner.ends[end_match[1]]
+        confidence = min(start_match[2], end_match[2])
+        if confidence < min_confidence or not 0 < end_time - start_time <= MAX_CLIP_SECONDS:
+            print(
+                f"{Colors.WARNING}[WARNING]{Colors.RESET} Low-confidence alignment for segment {number} "
+                f"(confidence {confidence:.2f}, {end_time - start_time:.1f}s)."
+            )
+            return None
+        aligned.append({"start_time": seconds_to_srt_time(start_time), "end_time": seconds_to_srt_time(end_time)})
+    return {"segments": aligned}
@@ -0,0 +1,242 @@
+import os
+import json
+import mmap
+import bisect
+import threading
+
+from subtitles import seconds_to_srt_time, format_ass_time
+
+# --- Word-Level Transcript Artifact ---
+#
+# A transcript is stored as JSON lines: a header line followed by one line per
+# segment. The header carries an index of [start, end, byte offset] per segment,
+# so a reader can answer time-range queries by bisecting the index and decoding
+# only the segment lines it needs from a memory map. Every caption format (SRT,
+# ASS, TXT, per-clip tracks) is derived from this file; Whisper never reruns and
+# no text format is reparsed.
+
+TRANSCRIPT_FORMAT_VERSION = 1
+TRANSCRIPT_SUFFIX = ".words.jsonl"
+
+# Matches the layout stable-ts writes, so existing clip styling keeps working.
+ASS_SCRIPT_INFO = [
+    "[Script Info]",
+    "ScriptType: v4.00+",
+    "PlayResX: 384",
+    "PlayResY: 288",
+    "ScaledBorderAndShadow: yes",
+]
+ASS_STYLE_FIELDS = [
+    ("Name", "Default"), ("Fontname", "Arial"), ("Fontsize", "48"),
+    ("PrimaryColour", "&Hffffff"), ("SecondaryColour", "&Hffffff"),
+    ("OutlineColour", "&H0"), ("BackColour", "&H0"),
+    ("Bold", "0"), ("Italic", "0"), ("Underline", "0"), ("StrikeOut", "0"),
+    ("ScaleX", "100"), ("ScaleY", "100"), ("Spacing", "0"), ("Angle", "0"),
+    ("BorderStyle", "1"), ("Outline", "1"), ("Shadow", "0"), ("Alignment", "2"),
+    ("MarginL", "10"), ("MarginR", "10"), ("MarginV", "10"), ("Encoding", "0"),
+]
+ASS_HIGHLIGHT = "{\\1c&H00ff00&}"
+ASS_HIGHLIGHT_RESET = "{\\r}"
+# stable-ts' default word highlight in word-level SRT.
+SRT_HIGHLIGHT = ('<font color="#00ff00">', "</font>")
+
+
+def _round(value):
+    return round(float(value), 3)
+
+
+def write_transcript(result_dict, path):
+    """
+    Persists a Whisper result (stable-ts `WhisperResult.to_dict()` layout) as a
+    transcript artifact at `path`. Returns `path`.
+    """
+    lines = []
+    index = []
+    offset = 0
+    for segment in result_dict.get("segments") or []:
+        if segment.get("start") is None or segment.get("end") is None:
+            continue
+        words = [
+            [_round(w["start"]), _round(w["end"]), w.get("word", ""), _round(w.get("probability") or 0)]
+            for w in segment.get("words") or []
+            if w.get("start") is not None and w.get("end") is not None
+        ]
+        record = {
+            "start": _round(segment["start"]),
+            "end": _round(segment["end"]),
+            "text": segment.get("text", ""),
+            "words": words,
+        }
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        index.append([record["start"], record["end"], offset])
+        offset += len(line)
+        lines.append(line)
+
+    header = {
+        "version": TRANSCRIPT_FORMAT_VERSION,
+        "language": result_dict.get("language"),
+        "index": index,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write((json.dumps(header) + "\n").encode("utf-8"))
+        f.writelines(lines)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _ass_escape(text):
+    return text.replace("{", "(").replace("}", ")").replace("\n", "\\N")
+
+
+class Transcript:
+    """
+    Lazy reader for a transcript artifact. Opening one reads only the header; segment
+    lines are decoded from a memory map when a query touches them.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            header_line = f.readline()
+        header = json.loads(header_line)
+        if header.get("version") != TRANSCRIPT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported transcript version in {path}: {header.get('version')}")
+        self.language = header.get("language")
+        self._body_offset = len(header_line)
+        self._index = header.get("index") or []
+        self._starts = [start for start, _, _ in self._index]
+        self._max_duration = max((end - start for start, end, _ in self._index), default=0.0)
+        self._file = None
+        self._map = None
+        self._decoded = {}
+        # Clip renders query one transcript from several threads.
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._index)
+
+    @property
+    def duration(self):
+        return max((end for _, end, _ in self._index), default=0.0)
+
+    def _body(self):
+        if self._map is None:
+            self._file = open(self.path, "rb")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def segment(self, i):
+        """Returns segment `i` as {"start", "end", "text", "words": [[start, end, word, prob], ...]}."""
+        with self._lock:
+            if i not in self._decoded:
+                body = self._body()
+                start = self._body_offset + self._index[i][2]
+                end = body.find(b"\n", start)
+                self._decoded[i] = json.loads(body[start:end if end != -1 else len(body)])
+            return self._decoded[i]
+
+    def segments(self, start=None, end=None):
+        """Returns the segments overlapping [start, end), in time order."""
+        if start is None and end is None:
+            return [self.segment(i) for i in range(len(self._index))]
+        start = 0.0 if start is None else start
+        end = float("inf") if end is None else end
+        lo = bisect.bisect_left(self._starts, start - self._max_duration)
+        hi = bisect.bisect_left(self._starts, end)
+        return [self.segment(i) for i in range(lo, hi) if self._index[i][1] > start]
+
+    def words(self, start=None, end=None):
+        """Returns [start, end, word, probability] entries overlapping [start, end)."""
+        lo = 0.0 if start is None else start
+        hi = float("inf") if end is None else end
+        return [w for seg in self.segments(start, end) for w in seg["words"] if w[1] > lo and w[0] < hi]
+
+    def to_txt(self, start=None, end=None):
+        return "\n".join(seg["text"].strip() for seg in self.segments(start, end)) + "\n"
+
+    def to_srt(self, start=None, end=None, word_level=False):
+        """
+        SRT for [start, end), timed from `start` (or from zero for the whole video).
+        With `word_level`, each segment is repeated once per word with the spoken word
+        highlighted, as stable-ts writes caption files; otherwise one cue per segment.
+        """
+        offset = start or 0.0
+        limit = float("inf") if end is None else end
+        cues = []
+
+        def add(cue_start, cue_end, text):
+            cue_start, cue_end = max(cue_start, offset), min(cue_end, limit)
+            if cue_end > cue_start:
+                cues.append((cue_start - offset, cue_end - offset, text))
+
+        for seg in self.segments(start, end):
+            words = seg["words"]
+            if not word_level or not words:
+                add(seg["start"], seg["end"], seg["text"].strip())
+                continue
+            texts = [w[2] for w in words]
+            texts[0] = texts[0].lstrip()
+            for k, word in enumerate(words):
+                word_end = words[k + 1][0] if k + 1 < len(words) else max(word[1], seg["end"])
+                # Whisper words carry their leading space; keep it outside the tag.
+                text = texts[k].lstrip()
+                space = texts[k][: len(texts[k]) - len(text)]
+                highlighted = (
+                    "".join(texts[:k]) + space + SRT_HIGHLIGHT[0] + text + SRT_HIGHLIGHT[1] + "".join(texts[k + 1:])
+                )
+                add(word[0], word_end, highlighted.strip())
+        return "\n".join(
+            f"{number}\n{seconds_to_srt_time(cue_start)} --> {seconds_to_srt_time(cue_end)}\n{text}\n"
+            for number, (cue_start, cue_end, text) in enumerate(cues, 1)
+        )
+
+    def to_ass(self, start=None, end=None, style=None):
+        """
+        Word-highlighted ASS for [start, end), timed from `start`. Each segment shows its
+        full text with the word being spoken highlighted; events are clipped to the window.
+        `style` overrides fields of the Default style by name (e.g. {"Fontsize": 12}).
+        """
+        offset = start or 0.0
+        limit = float("inf") if end is None else end
+        fields = [(name, str((style or {}).get(name, value))) for name, value in ASS_STYLE_FIELDS]
+        lines = ASS_SCRIPT_INFO + [
+            "",
+            "[V4+ Styles]",
+            "Format: " + ", ".join(name for name, _ in fields),
+            "Style: " + ",".join(value for _, value in fields),
+            "",
+            "[Events]",
+            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+        ]
+
+        def add(event_start, event_end, text):
+            event_start, event_end = max(event_start, offset), min(event_end, limit)
+            if event_end > event_start:
+                lines.append(
+                    f"Dialogue: 0,{format_ass_time(event_start - offset)},{format_ass_time(event_end - offset)},Default,,0,0,0,,{text}"
+                )
+
+        for seg in self.segments(start, end):
+            words = seg["words"]
+            if not words:
+                add(seg["start"], seg["end"], _ass_escape(seg["text"].strip()))
+                continue
+            texts = [_ass_escape(w[2]) for w in words]
+            texts[0] = texts[0].lstrip()
+            if words[0][0] > seg["start"]:
+                add(seg["start"], words[0][0], "".join(texts).strip())
+            for k, word in enumerate(words):
+                word_end = words[k + 1][0] if k + 1 < len(words) else max(word[1], seg["end"])
+                highlighted = "".join(texts[:k]) + ASS_HIGHLIGHT + texts[k] + ASS_HIGHLIGHT_RESET + "".join(texts[k + 1:])
+                add(word[0], word_end, highlighted.strip())
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        with self._lock:
+            if self._map is None:
+                return
+            self._map.close()
+            self._file.close()
+            self._map = self._file = None
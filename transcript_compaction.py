@@ -0,0 +1,115 @@
+import re
+import bisect
+
+from processors.base import Colors
+from gemini_client import estimate_tokens
+
+# --- Compact Transcript Rendering for LLM Prompts ---
+#
+# Raw SRT spends most of its tokens on sequence numbers and "HH:MM:SS,mmm -->
+# HH:MM:SS,mmm" lines. A compact transcript is one line per run of sentences,
+# prefixed only with its start offset in whole seconds ("[754] ..."), with filler
+# words, stutters and repeated lines dropped. The exact word times of every line
+# are kept next to the text, so anchors quoted back by the model map to precise
+# times. Lines are as short as the token budget allows: finer lines mean finer
+# anchors, and they are merged into longer ones only when the prompt would not fit.
+
+DEFAULT_PROMPT_TOKEN_BUDGET = 100_000
+# Maximum seconds per line, tried in order until the rendering fits the budget.
+LINE_SECONDS_STEPS = (10, 20, 45, 90)
+FILLER_WORDS = {"um", "umm", "uh", "uhh", "uhm", "erm", "er", "ah", "hmm", "mm", "mhm"}
+
+_SENTENCE_END_RE = re.compile(r"[.!?…][\"')\]]*$")
+_NORMALIZE_RE = re.compile(r"[^a-z0-9']+")
+
+
+def _normalized(word):
+    return _NORMALIZE_RE.sub("", word.lower())
+
+
+class CompactTranscript:
+    """Compact lines as (start, end, text), with start/end the exact word times of the line."""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self._anchors = [int(start) for start, _, _ in lines]
+
+    @property
+    def text(self):
+        return "\n".join(f"[{int(start)}] {text}" for start, _, text in self.lines)
+
+    def tokens(self):
+        return estimate_tokens(self.text)
+
+    def start_time(self, anchor):
+        """Exact start of the first line anchored at (or, failing that, just before) `anchor` seconds."""
+        i = bisect.bisect_left(self._anchors, int(anchor))
+        if i == len(self.lines) or self._anchors[i] != int(anchor):
+            i = max(i - 1, 0)
+        return self.lines[i][0]
+
+    def end_time(self, anchor):
+        """Exact end of the last line anchored at or before `anchor` seconds."""
+        i = max(bisect.bisect_right(self._anchors, int(anchor)) - 1, 0)
+        return self.lines[i][1]
+
+
+def _clean_words(words):
+    """Drops filler words and immediate repetitions ("I I I think") from [start, end, word, prob] entries."""
+    cleaned = []
+    previous = None
+    for start, end, word, _ in words:
+        token = _normalized(word)
+        if not token or token in FILLER_WORDS or token == previous:
+            # Keep sentence punctuation that was attached to a dropped word.
+            if cleaned and _SENTENCE_END_RE.search(word.strip()) and not _SENTENCE_END_RE.search(cleaned[-1][2]):
+                cleaned[-1][2] += word.strip()[-1]
+            continue
+        cleaned.append([start, end, word.strip()])
+        previous = token
+    return cleaned
+
+
+def compact_lines(words, max_line_seconds):
+    """
+    Merges cleaned words into lines of whole sentences, breaking after a sentence once
+    the line spans a third of `max_line_seconds` and mid-sentence only past the maximum.
+    Consecutive identical lines (e.g. repeated hallucinated phrases) are kept once.
+    """
+    lines = []
+    current = []
+    for word in _clean_words(words):
+        current.append(word)
+        span = word[1] - current[0][0]
+        if span >= max_line_seconds or (_SENTENCE_END_RE.search(word[2]) and span >= max_line_seconds / 3):
+            lines.append(current)
+            current = []
+    if current:
+        lines.append(current)
+
+    compact = []
+    for line in lines:
+        text = " ".join(word for _, _, word in line)
+        if compact and text.lower() == compact[-1][2].lower():
+            continue
+        compact.append((line[0][0], line[-1][1], text))
+    return compact
+
+
+def compact_transcript(transcript, start=None, end=None, token_budget=None):
+    """
+    Renders [start, end) of a transcript.Transcript compactly, using the finest line
+    granularity that fits `token_budget` estimated tokens (the coarsest if none does).
+    """
+    token_budget = token_budget or DEFAULT_PROMPT_TOKEN_BUDGET
+    words = transcript.words(start, end)
+    compact = None
+    for max_line_seconds in LINE_SECONDS_STEPS:
+        compact = CompactTranscript(compact_lines(words, max_line_seconds))
+        if compact.tokens() <= token_budget:
+            return compact
+    print(
+        f"{Colors.WARNING}[WARNING]{Colors.RESET} Compact transcript is ~{compact.tokens()} tokens, "
+        f"over the prompt budget of {token_budget}."
+    )
+    return compact
@@ -0,0 +1,58 @@
+import re
+from urllib.parse import urlparse, parse_qs
+
+# --- Offline YouTube URL Canonicalization ---
+
+_VIDEO_ID_RE = re.compile(r"^[A-Za-z0-9_-]{11}$")
+_YOUTUBE_HOSTS = (
+    "youtube.com",
+    "youtube-nocookie.com",
+)
+# Path prefixes that are followed directly by the video ID.
+_ID_PATH_PREFIXES = ("shorts", "embed", "v", "e", "live")
+
+
+def _is_video_id(candidate):
+    return bool(candidate) and bool(_VIDEO_ID_RE.match(candidate))
+
+
+def extract_video_id(url):
+    """
+    Returns the 11-character YouTube video ID for a URL without any network access,
+    or None if the URL is not a recognizable YouTube video link.
+
+    Handles watch URLs (including m./music. hosts and extra `t`/`list`/`si` params),
+    youtu.be links, /shorts/, /embed/, /v/, /live/ paths and bare video IDs.
+    """
+    if not url:
+        return None
+    url = url.strip()
+    if _is_video_id(url):
+        return url
+    if "://" not in url:
+        url = "https://" + url
+
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    path_parts = [p for p in parsed.path.split("/") if p]
+
+    if host == "youtu.be" or host.endswith(".youtu.be"):
+        candidate = path_parts[0] if path_parts else None
+        return candidate if _is_video_id(candidate) else None
+
+    if not any(host == h or host.endswith("." + h) for h in _YOUTUBE_HOSTS):
+        return None
+
+    candidate = parse_qs(parsed.query).get("v", [None])[0]
+    if _is_video_id(candidate):
+        return candidate
+
+    if len(path_parts) >= 2 and path_parts[0] in _ID_PATH_PREFIXES:
+        candidate = path_parts[1]
+        return candidate if _is_video_id(candidate) else None
+    return None
+
+
+def canonical_watch_url(video_id):
+    """Returns the canonical watch URL yt-dlp reports as `webpage_url` for a video ID."""
+    return f"https://www.youtube.com/watch?v={video_id}"
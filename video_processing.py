@@ -1,5 +1,9 @@
 import subprocess
 import os
+import time
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 
 from processors.base import Colors
 
@@ -48,4 +52,449 @@ def generate_video_with_captions(video_path, audio_path, ass_path, output_path):
         return output_path
     except subprocess.CalledProcessError as e:
         print(f"{Colors.ERROR}[ERROR]{Colors.RESET} ffmpeg video generation failed: {e}")
-        return None
\ No newline at end of file
+        return None
+
+# --- Multi-Clip Extraction Engine ---
+
+REEL_VIDEO_FILTER = "scale=1080:1920:force_original_aspect_ratio=decrease,pad=1080:1920:(ow-iw)/2:(oh-ih)/2"
+HORIZONTAL_VIDEO_FILTER = "scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2"
+CLIP_ENCODE_ARGS = [
+    "-c:v", "libx264",
+    "-preset", "veryfast",
+    "-crf", "23",
+    "-c:a", "aac",
+    "-b:a", "128k",
+    "-avoid_negative_ts", "make_zero",
+]
+# Rough per-clip cost, in seconds of decoded source, of seeking separately: process
+# start-up plus decoding from the keyframe before the clip start.
+SEEK_OVERHEAD_SECONDS = 3.0
+# The `subtitles` filter demuxes through libavformat, so it can read a piped ASS
+# track (libass's own file loader in the `ass` filter needs a seekable file).
+SUBTITLES_FROM_STDIN = "subtitles=filename='pipe\\:0'"
+DEFAULT_CLIP_JOBS = max(1, (os.cpu_count() or 2) // 4)
+
+
+def default_ffmpeg_threads(jobs):
+    """Splits the CPU cores evenly between `jobs` concurrent ffmpeg processes."""
+    return max(1, (os.cpu_count() or 2) // max(1, jobs))
+
+
+class EncodeSlots:
+    """
+    Process-wide bound on concurrent clip encodes. Clip steps of different videos (and
+    the streaming renderer) each have their own worker threads, but every ffmpeg clip
+    encode first reserves slots here, so at most `size` encodes of `threads` threads
+    each run at once in the whole process.
+    """
+
+    def __init__(self, size=DEFAULT_CLIP_JOBS):
+        self.size = size
+        self._in_use = 0
+        self._condition = threading.Condition()
+
+    def resize(self, size):
+        with self._condition:
+            self.size = max(1, size)
+            self._condition.notify_all()
+
+    @contextmanager
+    def reserve(self, count=1):
+        """Holds `count` slots (at most all of them) while the block runs."""
+        with self._condition:
+            count = min(count, self.size)
+            self._condition.wait_for(lambda: self._in_use + count <= self.size)
+            self._in_use += count
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_use -= count
+                self._condition.notify_all()
+
+
+encode_slots = EncodeSlots()
+
+
+def clip_worker_budget(args):
+    """
+    Returns (concurrent ffmpeg processes, threads per process) for rendering clips.
+    `jobs` is also the size of the process-wide encode_slots, so the thread budget
+    holds across every video and step rendering at the same time.
+    """
+    jobs = getattr(args, "clip_jobs", None) or DEFAULT_CLIP_JOBS
+    threads = getattr(args, "ffmpeg_threads", None) or default_ffmpeg_threads(jobs)
+    if encode_slots.size != jobs:
+        encode_slots.resize(jobs)
+    return jobs, threads
+
+
+def _thread_args(threads):
+    return ["-threads", str(threads)] if threads else []
+
+
+def timestamp_to_seconds(value):
+    """Parses seconds, "SS.mmm", "HH:MM:SS.mmm" or SRT-style "HH:MM:SS,mmm" into float seconds."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = str(value).replace(",", ".")
+    if ":" not in value:
+        return float(value)
+    h, m, s = map(float, value.split(":"))
+    return h * 3600 + m * 60 + s
+
+
+def clip_window(start_time, end_time):
+    """Rounds a segment to whole seconds and pads it by one second on each side."""
+    start = max(int(round(timestamp_to_seconds(start_time))) - 1, 0)
+    end = int(round(timestamp_to_seconds(end_time))) + 1
+    return start, end
+
+
+def has_audio_stream(video_path):
+    """Returns True if ffprobe finds an audio stream in the file."""
+    try:
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-select_streams", "a", "-show_entries", "stream=index", "-of", "csv=p=0", video_path],
+            capture_output=True, text=True, check=True,
+        )
+        return bool(result.stdout.strip())
+    except (subprocess.CalledProcessError, OSError):
+        return True  # Assume audio; ffmpeg will report a clear error if it is missing.
+
+
+def plan_clip_extraction(clips):
+    """
+    Chooses how to cut `clips` (dicts with "start"/"end" seconds) out of a source.
+    "single_pass" decodes the span from the first start to the last end once and
+    trims every clip from that decode; "seek" runs one input-seeking ffmpeg per clip,
+    decoding only around each clip. Returns whichever decodes less.
+    """
+    if len(clips) < 2:
+        return "seek"
+    span = max(c["end"] for c in clips) - min(c["start"] for c in clips)
+    seek_cost = sum(c["end"] - c["start"] + SEEK_OVERHEAD_SECONDS for c in clips)
+    return "single_pass" if span <= seek_cost else "seek"
+
+
+def _with_subtitles(video_filter, subtitles):
+    return f"{video_filter},{SUBTITLES_FROM_STDIN}" if subtitles else video_filter
+
+
+def build_seek_clip_command(video_path, clip, video_filter, threads=None, subtitles=False):
+    """
+    One clip with accurate input seeking: only the GOP before `start` is decoded and
+    discarded. With `subtitles`, an ASS track for the clip is expected on stdin.
+    """
+    return [
+        "ffmpeg", "-y", "-nostdin",
+        "-ss", f"{clip['start']:.3f}",
+        "-t", f"{clip['end'] - clip['start']:.3f}",
+        "-i", video_path,
+        "-vf", _with_subtitles(video_filter, subtitles),
+    ] + CLIP_ENCODE_ARGS + _thread_args(threads) + [clip["output"]]
+
+
+def build_single_pass_command(video_path, clips, video_filter, with_audio=True, threads=None, subtitles=False):
+    """
+    All clips from one decode: seek to the first clip, read until the last one ends,
+    filter the span once, then split the streams and trim one branch per clip in a
+    single filter graph. With `subtitles`, an ASS track for the whole span (timed
+    from the first clip's start) is expected on stdin. `threads` is the budget of the
+    whole process: `-threads` applies per output encoder, so it is split between them.
+    """
+    seek = min(c["start"] for c in clips)
+    span = max(c["end"] for c in clips) - seek
+    count = len(clips)
+    output_threads = threads and max(1, threads // count)
+
+    graph = [
+        f"[0:v]{_with_subtitles(video_filter, subtitles)}[src]",
+        "[src]split=%d%s" % (count, "".join(f"[v{i}]" for i in range(count))),
+    ]
+    if with_audio:
+        graph.append("[0:a]asplit=%d%s" % (count, "".join(f"[a{i}]" for i in range(count))))
+    for i, clip in enumerate(clips):
+        start, end = clip["start"] - seek, clip["end"] - seek
+        graph.append(f"[v{i}]trim=start={start:.3f}:end={end:.3f},setpts=PTS-STARTPTS[vo{i}]")
+        if with_audio:
+            graph.append(f"[a{i}]atrim=start={start:.3f}:end={end:.3f},asetpts=PTS-STARTPTS[ao{i}]")
+
+    command = [
+        "ffmpeg", "-y", "-nostdin",
+        "-ss", f"{seek:.3f}",
+        "-t", f"{span:.3f}",
+        "-i", video_path,
+        "-filter_complex", ";".join(graph),
+    ]
+    for i, clip in enumerate(clips):
+        command += ["-map", f"[vo{i}]"]
+        if with_audio:
+            command += ["-map", f"[ao{i}]"]
+        command += CLIP_ENCODE_ARGS + _thread_args(output_threads) + ["-max_muxing_queue_size", "4096", clip["output"]]
+    return command
+
+
+def _render_concurrently(render, clips, jobs, action):
+    """
+    Calls `render(clip)` for every clip on up to `jobs` threads (each driving one
+    ffmpeg process). Returns the outputs that were written, in clip order.
+    """
+    def run(clip):
+        try:
+            with encode_slots.reserve():
+                render(clip)
+            return clip["output"]
+        except subprocess.CalledProcessError as e:
+            print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Failed to {action} {clip['output']}.")
+            print(f"ffmpeg stderr: {e.stderr[-2000:] if e.stderr else ''}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(clips)))) as pool:
+        return [output for output in pool.map(run, clips) if output]
+
+
+def _report_throughput(clips, written, started, jobs, threads):
+    elapsed = max(time.perf_counter() - started, 1e-6)
+    rendered = sum(c["end"] - c["start"] for c in clips if c["output"] in written)
+    print(
+        f"{Colors.INFO}[INFO]{Colors.RESET} Rendered {len(written)}/{len(clips)} clip(s), "
+        f"{rendered:.0f}s of video in {elapsed:.1f}s ({rendered / elapsed:.2f}x realtime, "
+        f"{jobs} job(s) x {threads or 'auto'} thread(s))."
+    )
+
+
+def extract_clips(video_path, clips, video_filter, jobs=1, threads=None, subtitles=None):
+    """
+    Renders every clip (dicts with "start", "end" seconds and "output" path) from
+    `video_path`. `subtitles(start, end)`, if given, returns the ASS text to burn in
+    for that window, timed from `start`; it is streamed to ffmpeg over stdin. Per-clip
+    renders run `jobs` ffmpeg processes at a time, each limited to `threads` threads.
+    Returns the list of output paths written.
+    """
+    if not clips:
+        return []
+    started = time.perf_counter()
+    strategy = plan_clip_extraction(clips)
+    print(f"{Colors.INFO}[INFO]{Colors.RESET} Extracting {len(clips)} clip(s) using {strategy.replace('_', '-')} decoding.")
+
+    if strategy == "single_pass":
+        # One process encodes every output, so it gets the whole thread budget,
+        # shared between its output encoders.
+        command = build_single_pass_command(
+            video_path, clips, video_filter, has_audio_stream(video_path), threads and threads * jobs, bool(subtitles)
+        )
+        seek = min(c["start"] for c in clips)
+        track = subtitles(seek, max(c["end"] for c in clips)) if subtitles else None
+        try:
+            # It uses the threads of `jobs` encodes, so it takes as many slots.
+            with encode_slots.reserve(jobs):
+                subprocess.run(command, input=track, check=True, capture_output=True, text=True)
+            written = [c["output"] for c in clips if os.path.exists(c["output"])]
+            _report_throughput(clips, written, started, 1, threads and threads * jobs)
+            return written
+        except subprocess.CalledProcessError as e:
+            print(f"{Colors.WARNING}[WARNING]{Colors.RESET} Single-pass clipping failed, falling back to per-clip seeking.")
+            print(f"ffmpeg stderr: {e.stderr[-2000:] if e.stderr else ''}")
+
+    def render(clip):
+        command = build_seek_clip_command(video_path, clip, video_filter, threads, bool(subtitles))
+        track = subtitles(clip["start"], clip["end"]) if subtitles else None
+        subprocess.run(command, input=track, check=True, capture_output=True, text=True)
+
+    written = _render_concurrently(render, clips, jobs, "clip")
+    _report_throughput(clips, written, started, jobs, threads)
+    return written
+
+
+# --- Smart Render (Stream-Copy GOP Interior) ---
+
+SMART_RENDER_CODECS = ("h264",)
+# ffprobe's H.264 profile names -> the matching libx264 profile.
+_X264_PROFILES = {
+    "baseline": "baseline",
+    "constrained baseline": "baseline",
+    "main": "main",
+    "high": "high",
+    "high 10": "high10",
+    "high 4:2:2": "high422",
+    "high 4:4:4 predictive": "high444",
+}
+# Codec parameters the re-encoded edges must share with the stream-copied interior
+# (they determine the SPS/PPS), or the joins decode with glitches.
+SMART_RENDER_MATCH_FIELDS = ("codec_name", "profile", "level", "pix_fmt", "width", "height")
+# Parts shorter than this (a rounding artefact of keyframe times) are not rendered.
+SMART_RENDER_EPSILON = 0.001
+# A concatenated clip may be this much shorter or longer than requested before it is rejected.
+SMART_RENDER_DURATION_TOLERANCE = 0.5
+
+
+def can_smart_render(keyframe_index):
+    """
+    Smart render needs an h264 source whose profile libx264 can reproduce (so the edges
+    can be encoded to match) and a keyframe index.
+    """
+    if not keyframe_index:
+        return False
+    stream = keyframe_index.get("stream") or {}
+    return (
+        stream.get("codec_name") in SMART_RENDER_CODECS
+        and (stream.get("profile") or "").lower() in _X264_PROFILES
+        and len(keyframe_index.get("keyframes") or []) >= 2
+    )
+
+
+def _edge_encode_args(stream, threads=None):
+    """Encoder settings for the re-encoded clip edges, matched to the copied interior."""
+    args = ["-c:v", "libx264", "-preset", "veryfast", "-crf", "18"] + _thread_args(threads)
+    profile = _X264_PROFILES.get((stream.get("profile") or "").lower())
+    if profile:
+        args += ["-profile:v", profile]
+    level = stream.get("level")
+    if isinstance(level, int) and level >= 10:
+        args += ["-level:v", f"{level / 10:.1f}"]  # ffprobe reports level_idc, e.g. 41 for 4.1
+    if stream.get("pix_fmt"):
+        args += ["-pix_fmt", stream["pix_fmt"]]
+    if stream.get("r_frame_rate") and stream["r_frame_rate"] != "0/0":
+        args += ["-r", stream["r_frame_rate"]]
+    return args
+
+
+def _track_timescale_args(stream):
+    """Keeps the source's video timebase in the MP4, so copied timestamps are not rounded."""
+    _, _, denominator = (stream.get("time_base") or "").partition("/")
+    return ["-video_track_timescale", denominator] if denominator.isdigit() else []
+
+
+def smart_render_plan(keyframes, start, end):
+    """
+    Splits [start, end] into the parts smart rendering produces, in order:
+    ("encode", s, e) for the partial GOP at either edge and ("copy", s, e) for the
+    whole GOPs between them. Returns None if the clip contains no whole GOP.
+    """
+    from keyframe_index import gop_interior
+
+    interior = gop_interior(keyframes, start, end)
+    if interior is None:
+        return None
+    copy_start, copy_end = interior
+    parts = []
+    if copy_start - start > SMART_RENDER_EPSILON:
+        parts.append(("encode", start, copy_start))
+    parts.append(("copy", copy_start, copy_end))
+    if end - copy_end > SMART_RENDER_EPSILON:
+        parts.append(("encode", copy_end, end))
+    return parts
+
+
+def _smart_render_part_command(video_path, kind, start, end, edge_args, output_path):
+    if kind == "copy":
+        # Nudge the seek past the keyframe's rounded timestamp so it cannot land on the previous GOP.
+        return [
+            "ffmpeg", "-y", "-nostdin", "-ss", f"{start + SMART_RENDER_EPSILON:.6f}", "-i", video_path,
+            "-t", f"{end - start:.6f}", "-an", "-c:v", "copy", "-bsf:v", "h264_mp4toannexb",
+            "-f", "mpegts", output_path,
+        ]
+    return (
+        ["ffmpeg", "-y", "-nostdin", "-ss", f"{start:.6f}", "-t", f"{end - start:.6f}", "-i", video_path, "-an"]
+        + edge_args + ["-f", "mpegts", output_path]
+    )
+
+
+def _codec_mismatch(source, part):
+    """The SMART_RENDER_MATCH_FIELDS on which `part` differs from `source`."""
+    return [field for field in SMART_RENDER_MATCH_FIELDS if source.get(field) != part.get(field)]
+
+
+def _probe_duration(path):
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+        capture_output=True, text=True, check=True,
+    )
+    return float(result.stdout.strip())
+
+
+def smart_render_clip(video_path, clip, keyframe_index, with_audio=True, threads=None):
+    """
+    Renders one clip at the source resolution by stream-copying every whole GOP inside
+    it and re-encoding only the partial GOPs at the two edges, then concatenating the
+    parts and muxing separately encoded audio. The edges are encoded with the source's
+    profile, level and pixel format and checked against it before the join, and the
+    joined clip's duration is checked after it. Returns False if the clip contains no
+    whole GOP or either check fails (the caller should re-encode it instead).
+    """
+    from keyframe_index import _probe_stream
+
+    start, end = clip["start"], clip["end"]
+    plan = smart_render_plan(keyframe_index["keyframes"], start, end)
+    if plan is None:
+        return False
+    stream = keyframe_index.get("stream") or {}
+    edge_args = _edge_encode_args(stream, threads)
+    part_prefix = f"{clip['output']}.part"
+    parts = [f"{part_prefix}{i}.ts" for i in range(len(plan))]
+    audio_path = f"{part_prefix}.m4a"
+    list_path = f"{part_prefix}.txt"
+
+    try:
+        for (kind, part_start, part_end), part in zip(plan, parts):
+            command = _smart_render_part_command(video_path, kind, part_start, part_end, edge_args, part)
+            subprocess.run(command, check=True, capture_output=True, text=True)
+            mismatch = _codec_mismatch(stream, _probe_stream(part)) if kind == "encode" else []
+            if mismatch:
+                print(
+                    f"{Colors.WARNING}[WARNING]{Colors.RESET} Re-encoded edge of {clip['output']} differs from the "
+                    f"source in {', '.join(mismatch)}; re-encoding the whole clip instead."
+                )
+                return False
+        if with_audio:
+            subprocess.run([
+                "ffmpeg", "-y", "-nostdin", "-ss", f"{start:.3f}", "-t", f"{end - start:.3f}", "-i", video_path,
+                "-vn", "-c:a", "aac", "-b:a", "128k", audio_path,
+            ], check=True, capture_output=True, text=True)
+        with open(list_path, "w", encoding="utf-8") as f:
+            for part in parts:
+                escaped = os.path.abspath(part).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        concat = ["ffmpeg", "-y", "-nostdin", "-f", "concat", "-safe", "0", "-i", list_path]
+        if with_audio:
+            concat += ["-i", audio_path, "-map", "0:v", "-map", "1:a"]
+        concat += ["-c", "copy"] + _track_timescale_args(stream) + ["-movflags", "+faststart", clip["output"]]
+        subprocess.run(concat, check=True, capture_output=True, text=True)
+
+        duration = _probe_duration(clip["output"])
+        if abs(duration - (end - start)) > SMART_RENDER_DURATION_TOLERANCE:
+            print(
+                f"{Colors.WARNING}[WARNING]{Colors.RESET} Smart-rendered {clip['output']} is {duration:.2f}s "
+                f"instead of {end - start:.2f}s; re-encoding it instead."
+            )
+            os.remove(clip["output"])
+            return False
+        return True
+    finally:
+        for path in parts + [audio_path, list_path]:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def smart_render_clips(video_path, clips, keyframe_index, jobs=1, threads=None):
+    """
+    Smart-renders each clip at the source resolution, `jobs` clips at a time. Clips
+    too short to contain a whole GOP are re-encoded with accurate input seeking.
+    Returns the written paths.
+    """
+    started = time.perf_counter()
+    with_audio = has_audio_stream(video_path)
+
+    def render(clip):
+        try:
+            rendered = smart_render_clip(video_path, clip, keyframe_index, with_audio, threads)
+        except (subprocess.CalledProcessError, ValueError) as e:
+            print(f"{Colors.WARNING}[WARNING]{Colors.RESET} Smart render of {clip['output']} failed ({e}); re-encoding it instead.")
+            rendered = False
+        if not rendered:
+            subprocess.run(build_seek_clip_command(video_path, clip, "null", threads), check=True, capture_output=True, text=True)
+
+    written = _render_concurrently(render, clips, jobs, "smart-render")
+    _report_throughput(clips, written, started, jobs, threads)
+    return written
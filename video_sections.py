@@ -0,0 +1,82 @@
+import os
+import json
+
+from processors.base import Colors
+from video_processing import clip_window
+
+# --- Section Downloads ---
+#
+# With --download-sections, only the parts of the video that clips are cut from are
+# downloaded: every clip window (already padded by clip_window) is widened by a
+# margin, overlapping ranges are merged, and each range becomes one section file.
+# The manifest's `video_sections` column records [{"start", "end", "path"}, ...];
+# the clip steps render each clip from the section that contains it, with times
+# shifted by the section start.
+
+SECTION_MARGIN_SECONDS = 5
+
+
+def plan_sections(segments, duration=None, margin=SECTION_MARGIN_SECONDS):
+    """Merged (start, end) download ranges in seconds covering every timestamps segment."""
+    ranges = []
+    for segment in segments:
+        if not segment.get("start_time") or not segment.get("end_time"):
+            continue
+        start, end = clip_window(segment["start_time"], segment["end_time"])
+        start = max(0, start - margin)
+        end = min(duration, end + margin) if duration else end + margin
+        ranges.append((start, end))
+    return _merge(sorted(ranges))
+
+
+def _merge(ranges):
+    merged = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def load_sections(entry):
+    """The entry's downloaded sections whose files exist, or [] if it has none."""
+    try:
+        sections = json.loads(entry.get("video_sections") or "[]")
+    except ValueError:
+        return []
+    return [s for s in sections if s.get("path") and os.path.exists(s["path"])]
+
+
+def sections_cover(sections, ranges):
+    """True if every (start, end) range lies inside one of the sections."""
+    return all(any(s["start"] <= start and end <= s["end"] for s in sections) for start, end in ranges)
+
+
+def clip_sources(entry, clips):
+    """
+    Groups clips by the file to cut them from: the full video when it was downloaded,
+    otherwise the section containing each clip. Returns [(path, offset, clips)], where
+    the clips' start/end are relative to `path` (i.e. shifted by `offset` seconds).
+    Clips outside every section are reported and skipped.
+    """
+    video_path = entry.get("video_path")
+    if video_path and os.path.exists(video_path):
+        return [(video_path, 0, clips)]
+
+    groups = {}
+    for clip in clips:
+        section = next(
+            (s for s in load_sections(entry) if s["start"] <= clip["start"] and clip["end"] <= s["end"]), None
+        )
+        if section is None:
+            print(f"{Colors.WARNING}[WARNING]{Colors.RESET} No downloaded section covers {clip['output']}, skipping it.")
+            continue
+        shifted = dict(clip, start=clip["start"] - section["start"], end=clip["end"] - section["start"])
+        groups.setdefault(section["path"], (section["start"], []))[1].append(shifted)
+    return [(path, offset, group) for path, (offset, group) in groups.items()]
+
+
+def has_clip_source(entry):
+    video_path = entry.get("video_path")
+    return bool(video_path and os.path.exists(video_path)) or bool(load_sections(entry))
@@ -1,8 +1,42 @@
 import os
-import yt_dlp
-import pandas as pd
 
 from processors.base import Colors
+from metadata_cache import MetadataCache, compact_video_info, DEFAULT_METADATA_TTL
+from url_parsing import extract_video_id
+from downloads import download_options
+
+# The --video-quality / --audio-quality defaults in cli.py.
+DEFAULT_VIDEO_QUALITY = "best"
+DEFAULT_AUDIO_QUALITY = "bestaudio"
+# Whisper resamples to 16 kHz mono, so the smallest audio-only format transcribes as
+# well as the best one at a fraction of the download.
+SMALLEST_AUDIO_FORMAT = "worstaudio[abr>=32]/worstaudio/bestaudio"
+# Source heights that fill the clip outputs: a 16:9 source is scaled to 1080x608 for
+# a 9:16 reel, and to 1920x1080 for --no-reel.
+REEL_SOURCE_HEIGHT = 720
+HORIZONTAL_SOURCE_HEIGHT = 1080
+# Video files are named .mp4 and smart rendering stream-copies H.264, so separate
+# video/audio streams are always merged into MP4 (not yt-dlp's default webm/mkv).
+MERGE_OUTPUT_FORMAT = "mp4"
+
+
+def capped_video_format(max_height):
+    """
+    yt-dlp format selector for the best video no taller than `max_height`,
+    preferring H.264 with AAC audio so the merge into MP4 needs no re-encode.
+    """
+    return (
+        f"bestvideo[height<={max_height}][vcodec^=avc1]+bestaudio[ext=m4a]"
+        f"/bestvideo[height<={max_height}]+bestaudio/best[height<={max_height}]/best"
+    )
+
+
+def _downloaded_file(output_path):
+    """Absolute path of a finished download, or None if yt-dlp wrote no file there."""
+    if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+        return os.path.abspath(output_path)
+    print(f"{Colors.ERROR}[ERROR]{Colors.RESET} The download finished but {output_path} was not written.")
+    return None
 
 def get_sanitized_base_name(yt_title, custom_filename=None):
     if custom_filename:
@@ -11,53 +45,99 @@ def get_sanitized_base_name(yt_title, custom_filename=None):
         )
     return "".join(c if c.isalnum() or c in " ._-" else "_" for c in yt_title)
 
-def get_video_info(url):
-    """Gets video info using yt-dlp."""
+def get_video_info(url, cache_dir=None, ttl=DEFAULT_METADATA_TTL, video_id=None):
+    """
+    Gets compact video metadata (see metadata_cache.compact_video_info).
+    When `cache_dir` is given, records are shared on disk by the video ID yt-dlp
+    resolved, so repeated lookups within `ttl` seconds make no extraction request.
+    Pass `video_id` when it is already known (e.g. from an earlier record) for URLs
+    the offline parser does not recognize; otherwise it is parsed from `url`.
+    """
+    cache = MetadataCache(cache_dir, ttl) if cache_dir else None
+    if cache:
+        record = cache.get(video_id or extract_video_id(url))
+        if record:
+            return record
+
     ydl_opts = {'quiet': True}
     try:
+        import yt_dlp
+
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             info = ydl.extract_info(url, download=False)
-            return info
     except Exception as e:
         print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Could not fetch YouTube video details for {url}: {e}")
         return None
 
-def download_video(video_info, base_name_for_paths, effective_video_dir, video_quality_arg):
-    """Downloads the video stream using yt-dlp."""
+    record = compact_video_info(info)
+    if cache:
+        cache.put(record)
+    return record
+
+def download_video(video_info, base_name_for_paths, effective_video_dir, video_quality_arg, progress=None):
+    """
+    Downloads the video stream using yt-dlp (resumable, see downloads.py).
+    `progress` is an optional downloads.DownloadProgress recording the transfer.
+    """
     video_url = video_info['webpage_url']
     video_filename = f"{base_name_for_paths}.mp4"
     output_path = os.path.join(effective_video_dir, video_filename)
-    
-    format_selector = video_quality_arg
 
-    ydl_opts = {
-        'format': format_selector,
-        'outtmpl': output_path,
-        'quiet': True,
-    }
+    ydl_opts = download_options(video_quality_arg, output_path, progress, merge_output_format=MERGE_OUTPUT_FORMAT)
 
     try:
+        import yt_dlp
+
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             ydl.download([video_url])
-        print(f"{Colors.SUCCESS}[SUCCESS]{Colors.RESET} Video downloaded: {os.path.abspath(output_path)}")
-        return os.path.abspath(output_path)
+        path = _downloaded_file(output_path)
+        if path:
+            print(f"{Colors.SUCCESS}[SUCCESS]{Colors.RESET} Video downloaded: {path}")
+        return path
     except Exception as e:
         print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Video download failed for {base_name_for_paths}: {e}")
         return None
 
-def download_audio_stream(video_info, base_name_for_paths, effective_audio_dir, audio_quality_arg):
-    """Downloads a dedicated audio stream using yt-dlp."""
+def download_video_section(video_info, base_name_for_paths, effective_video_dir, video_quality_arg, start, end):
+    """
+    Downloads only [start, end] seconds of the video using yt-dlp's download ranges.
+    Cuts are forced onto keyframes, so the file starts exactly at `start`.
+    """
+    video_url = video_info['webpage_url']
+    output_path = os.path.join(effective_video_dir, f"{base_name_for_paths}_section_{start}-{end}.mp4")
+
+    try:
+        import yt_dlp
+        from yt_dlp.utils import download_range_func
+
+        ydl_opts = download_options(
+            video_quality_arg,
+            output_path,
+            download_ranges=download_range_func(None, [(start, end)]),
+            force_keyframes_at_cuts=True,
+            merge_output_format=MERGE_OUTPUT_FORMAT,
+        )
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            ydl.download([video_url])
+        path = _downloaded_file(output_path)
+        if path:
+            print(f"{Colors.SUCCESS}[SUCCESS]{Colors.RESET} Video section {start}s-{end}s downloaded: {path}")
+        return path
+    except Exception as e:
+        print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Section download failed for {base_name_for_paths} ({start}s-{end}s): {e}")
+        return None
+
+def download_audio_stream(video_info, base_name_for_paths, effective_audio_dir, audio_quality_arg, progress=None):
+    """Downloads a dedicated audio stream using yt-dlp (resumable, see download_video)."""
     video_url = video_info['webpage_url']
     temp_audio_filename = f"{base_name_for_paths}_audiotemp.m4a"
     output_path = os.path.join(effective_audio_dir, temp_audio_filename)
 
-    ydl_opts = {
-        'format': audio_quality_arg,
-        'outtmpl': output_path,
-        'quiet': True,
-    }
+    ydl_opts = download_options(audio_quality_arg, output_path, progress)
 
     try:
+        import yt_dlp
+
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             ydl.download([video_url])
         print(f"{Colors.SUCCESS}[SUCCESS]{Colors.RESET} Raw audio stream downloaded: {os.path.abspath(output_path)}")
@@ -66,14 +146,6 @@ def download_audio_stream(video_info, base_name_for_paths, effective_audio_dir,
         print(f"{Colors.ERROR}[ERROR]{Colors.RESET} Raw audio stream download failed for {base_name_for_paths}: {e}")
         return None
 
-def get_yt_object_and_canonical_url(input_url):
-    """Creates a YouTube object and returns it along with the canonical URL."""
-    info = get_video_info(input_url)
-    if info:
-        return info, info.get('webpage_url')
-    return None, None
-
-
 def get_video_duration(video_path):
     """
     Get the duration of a video file in seconds.